@@ -1,7 +1,8 @@
+import hmac
 import os
 import re
 from urllib.parse import urlparse
-from flask import Flask, jsonify, request as flask_request
+from flask import Flask, Response, g, jsonify, request as flask_request
 from sqlalchemy.pool import NullPool
 from flask_sqlalchemy import SQLAlchemy
 from flask_restx import Api
@@ -87,7 +88,7 @@ def create_app():
 
     CORS(app, resources={r"/*": {"origins": cors_origins}},
             supports_credentials=True,
-            expose_headers=["Content-Type", "Authorization"],
+            expose_headers=["Content-Type", "Authorization", "X-DB-Statements", "X-DB-Time-Ms"],
             allow_headers=["Content-Type", "Authorization"],
             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
@@ -99,10 +100,25 @@ def create_app():
 
     # Initialize SessionLocal AFTER app & db are set up
     with app.app_context():
-        from app.models import User, Website, Metric, Alert, Container, Deployment, Pipeline, Log, SecurityFinding, OtelSpan  # ✅ Ensure models are registered
+        from app.models import User, Website, Metric, Alert, Container, Deployment, Pipeline, Log, SecurityFinding, OtelSpan, MonitorWorker, NotificationOutbox, MetricRollup, WebsiteStatus, RouteLatency, UptimeInterval, DeletedWebsite  # ✅ Ensure models are registered
         global SessionLocal
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db.engine)  # ✅ Fix: Initialize inside app context
 
+    # Write-behind buffer for metric rows (monitor results, /status checks)
+    from app.metric_buffer import metric_buffer
+    metric_buffer.init_app(app)
+
+    # Per-request SQL statement counts (headers and span attributes in debug mode)
+    from app import db_stats
+    db_stats.init_app(app)
+
+    from app.rollups import rollups_cli
+    from app.retention import retention_cli
+    from app.sla import sla_cli
+    app.cli.add_command(rollups_cli)  # flask rollups backfill
+    app.cli.add_command(retention_cli)  # flask retention run
+    app.cli.add_command(sla_cli)  # flask sla backfill
+
     from app.routes.alerts import alerts_ns
     from app.routes.websites import websites_ns
     from app.routes.metrics import metrics_ns
@@ -118,6 +134,7 @@ def create_app():
     from app.routes.security import security_ns
     from app.routes.telemetry import telemetry_ns
     from app.routes.billing import billing_ns
+    from app.routes.sla import sla_ns
 
     api.add_namespace(alerts_ns, path="/alerts")  # Register namespaces
     api.add_namespace(websites_ns, path="/websites")
@@ -134,11 +151,22 @@ def create_app():
     api.add_namespace(security_ns, path="/security")
     api.add_namespace(telemetry_ns, path="/telemetry")
     api.add_namespace(billing_ns, path="/billing")
+    api.add_namespace(sla_ns, path="/sla")
 
     # Initialise OpenTelemetry HTTP tracing (must be after all namespaces are registered)
     from app.telemetry import setup_telemetry
     setup_telemetry(app)
 
+    # A successful write by a signed-in user invalidates their cached summaries
+    from app.cache import response_cache
+
+    @app.after_request
+    def bump_response_cache(response):
+        user = g.get("current_user")
+        if user is not None and flask_request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response_cache.bump([user.id])
+        return response
+
     @app.route("/", methods=['GET'])
     def index_route():
         return jsonify({"message": "Watchly API is running! Health check passed."}), 200
@@ -151,6 +179,21 @@ def create_app():
     def healthz():
         return jsonify({"ok": True}), 200
 
+    # Prometheus scrape target for this process's monitor counters. Each
+    # worker process keeps its own registry, so scrape every worker. Disabled
+    # until METRICS_TOKEN is set: it is exempt from rate limiting.
+    @app.route("/internal/metrics", methods=["GET"])
+    @limiter.exempt
+    def internal_metrics():
+        token = os.getenv("METRICS_TOKEN", "")
+        if not token:
+            return jsonify({"error": "Metrics endpoint disabled; set METRICS_TOKEN"}), 404
+        supplied = flask_request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied or flask_request.args.get("token", ""), token):
+            return jsonify({"error": "Unauthorized"}), 401
+        from app.instrumentation import REGISTRY
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
     for rule in app.url_map.iter_rules():
         print(f"{rule.endpoint}: {rule.rule}")
 
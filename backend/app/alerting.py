@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from app import db, instrumentation
+from app.cache import response_cache
+from app.models import Alert, NotificationOutbox, User, Website
+from app.utils.logger import logger
+
+DOWN_ALERT = "Website Down"
+
+# Alerts can also be resolved or created through the API by another process;
+# the in-memory state is re-read from the database this often.
+RESYNC_SECONDS = int(os.getenv("MONITOR_ALERT_RESYNC_SECONDS", 300))
+
+# A site is only declared down once CONFIRM_FAILURES of CONFIRM_CHECKS
+# consecutive checks (the first failure plus quick re-checks) have failed.
+# CONFIRM_FAILURES=1 alerts on the first failure.
+CONFIRM_FAILURES = int(os.getenv("MONITOR_CONFIRM_FAILURES", 2))
+CONFIRM_CHECKS = int(os.getenv("MONITOR_CONFIRM_CHECKS", 3))
+
+EVALUATIONS = instrumentation.counter("watchly_alert_evaluations_total", "Check results run through the alert state machine")
+TRANSITIONS = instrumentation.counter("watchly_alert_transitions_total", "Recorded up/down alert transitions", ["kind"])
+CONFIRMING = instrumentation.gauge("watchly_alert_confirming_sites", "Sites inside a failure confirmation window")
+
+
+class AlertEvaluator:
+    """
+    In-memory alert state machine for the monitor.
+
+    Keeps the id of the open "Website Down" alert per website, hydrated from
+    the database once and refreshed every RESYNC_SECONDS. Evaluating a batch
+    of check results is pure in-memory work; the database is only touched
+    for actual up/down transitions, with one batched insert, one batched
+    update and one contact lookup per batch.
+
+    A failure on a site that is up starts a confirmation window instead of
+    an alert: the site stays in ``confirming`` until enough re-checks fail
+    (down transition) or the window runs out (treated as a blip).
+    """
+
+    def __init__(self, clock=time.monotonic, confirm_failures=None, confirm_checks=None):
+        self.open_alerts = {}  # website_id -> alert id of the unresolved "Website Down" alert
+        self.confirming = {}   # website_id -> [checks, failures] in the current confirmation window
+        self.confirm_failures = confirm_failures if confirm_failures is not None else CONFIRM_FAILURES
+        self.confirm_checks = max(confirm_checks if confirm_checks is not None else CONFIRM_CHECKS,
+                                  self.confirm_failures)
+        self._clock = clock
+        self._hydrated_at = None
+        # hydrate and apply run in worker threads for concurrent batches: a snapshot must not be swapped
+        # in over an apply that committed after it was read
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a re-read on next use (e.g. after this worker's shard changed)."""
+        self._hydrated_at = None
+
+    def needs_hydrate(self):
+        return self._hydrated_at is None or self._clock() - self._hydrated_at >= RESYNC_SECONDS
+
+    def hydrate(self):
+        with self._lock:
+            rows = db.session.execute(
+                db.select(Alert.website_id, Alert.id)
+                .where(Alert.alert_type == DOWN_ALERT, Alert.status == "unresolved")
+                .order_by(Alert.id)
+            ).all()
+            # If duplicates exist, the newest one wins (same as the old per-site query)
+            self.open_alerts = {row.website_id: row.id for row in rows}
+            self._hydrated_at = self._clock()
+
+    def evaluate(self, results):
+        """Return the (website_id, "down"|"up", result) transitions implied by ``results``."""
+        EVALUATIONS.inc(len(results))
+        transitions = []
+        for result in results:
+            website_id = result["website_id"]
+            if website_id in self.open_alerts:
+                self.confirming.pop(website_id, None)
+                if result["uptime"] != 0:
+                    transitions.append((website_id, "up", result))
+            elif self._confirmed_down(website_id, result["uptime"] == 0):
+                transitions.append((website_id, "down", result))
+        CONFIRMING.set(len(self.confirming))
+        return transitions
+
+    def _confirmed_down(self, website_id, failed):
+        window = self.confirming.get(website_id)
+        if window is None:
+            if not failed:
+                return False
+            window = self.confirming[website_id] = [0, 0]
+        window[0] += 1
+        window[1] += failed
+        if window[1] >= self.confirm_failures:
+            del self.confirming[website_id]
+            return True
+        if window[0] >= self.confirm_checks:
+            del self.confirming[website_id]  # not enough failures: a blip, not an outage
+        return False
+
+    def apply(self, transitions):
+        """
+        Persist ``transitions`` and update the in-memory state after commit.
+
+        The notification for each transition is written to the outbox in the
+        same transaction as the Alert change, so an email is queued if and
+        only if the alert was recorded. Returns the queued notification dicts.
+        """
+        if not transitions:
+            return []
+        with self._lock:
+            return self._apply(transitions)
+
+    def _apply(self, transitions):
+        website_ids = [website_id for website_id, _, _ in transitions]
+        contacts = {
+            row.id: row
+            for row in db.session.execute(
+                db.select(Website.id, Website.url, Website.user_id, User.email)
+                .join(User, User.id == Website.user_id)
+                .where(Website.id.in_(website_ids))
+            ).all()
+        }
+
+        now = datetime.utcnow()
+        down = [(website_id, result) for website_id, kind, result in transitions
+                if kind == "down" and website_id in contacts]
+        up = [(website_id, result) for website_id, kind, result in transitions if kind == "up"]
+
+        created = {}
+        if down:
+            inserted = db.session.execute(
+                db.insert(Alert).returning(Alert.id, Alert.website_id),
+                [
+                    {"website_id": website_id, "alert_type": DOWN_ALERT, "status": "unresolved", "timestamp": now}
+                    for website_id, _ in down
+                ],
+            ).all()
+            created = {row.website_id: row.id for row in inserted}
+
+        if up:
+            db.session.execute(
+                db.update(Alert)
+                .where(
+                    Alert.website_id.in_([website_id for website_id, _ in up]),
+                    Alert.alert_type == DOWN_ALERT,
+                    Alert.status == "unresolved",
+                )
+                .values(status="resolved")
+            )
+
+        notifications = []
+        for website_id, result in down:
+            contact = contacts[website_id]
+            notifications.append(
+                {"alert_id": created[website_id], **down_notification(contact.email, contact.url, result)}
+            )
+        for website_id, result in up:
+            if website_id in contacts:
+                contact = contacts[website_id]
+                notifications.append(
+                    {"alert_id": self.open_alerts[website_id], **up_notification(contact.email, contact.url, result)}
+                )
+        if notifications:
+            db.session.execute(db.insert(NotificationOutbox), [
+                {
+                    "alert_id": n["alert_id"],
+                    "to_email": n["to"],
+                    "subject": n["subject"],
+                    "message": n["message"],
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }
+                for n in notifications
+            ])
+
+        db.session.commit()
+        response_cache.bump(contact.user_id for contact in contacts.values())
+
+        TRANSITIONS.inc(len(down), kind="down")
+        TRANSITIONS.inc(len(up), kind="up")
+        for website_id, _ in down:
+            self.open_alerts[website_id] = created[website_id]
+            logger.info(f"New alert created for {contacts[website_id].url} - Type: {DOWN_ALERT}")
+        for website_id, _ in up:
+            self.open_alerts.pop(website_id, None)
+            if website_id in contacts:
+                logger.info(f"✅ Resolved: {contacts[website_id].url} is back online.")
+        return notifications
+
+
+def _latest_status(result):
+    uptime_percent = f"{(result['uptime'] * 100):.1f}%"
+    response_time = f"{result['response_time']:.2f} ms" if result["response_time"] > 0 else "N/A"
+    return uptime_percent, response_time
+
+
+def down_notification(email, url, result):
+    uptime_percent, response_time = _latest_status(result)
+    return {
+        "to": email,
+        "subject": f"⚠️ Alert: {url} is DOWN!",
+        "message": f"""
+            🚨 **Website Down Alert** 🚨
+
+            Your monitored website **{url}** is currently down.
+
+            **Latest Status:**
+            - Uptime: {uptime_percent}
+            - Response Time: {response_time}
+
+            Please verify immediately.
+
+            Regards,
+            **Watchly Monitoring**
+            """,
+    }
+
+
+def up_notification(email, url, result):
+    uptime_percent, response_time = _latest_status(result)
+    return {
+        "to": email,
+        "subject": f"✅ Resolved: {url} is back UP!",
+        "message": f"""
+                ✅ **Website Back Online** ✅
+
+                Good news! **{url}** is back up.
+
+                **Latest Status:**
+                - Uptime: {uptime_percent}
+                - Response Time: {response_time}
+
+                Regards,
+                **Watchly Monitoring**
+                """,
+    }
@@ -0,0 +1,208 @@
+import heapq
+import math
+import mmap
+import os
+import shutil
+from array import array
+from datetime import datetime, timedelta
+
+from app import db, probe
+from app.models import Metric, Website
+
+# Expired metrics are moved here (instead of being discarded) when set. Every process reading
+# archived data (API workers serving exports and /metrics range history) must see the same directory.
+# Analytics and dashboards never read it: their long-range aggregates come from the rollup tables.
+ARCHIVE_DIR = os.getenv("METRIC_ARCHIVE_DIR", "")
+BATCH_ROWS = 10000  # rows read from the metric table per append
+
+# One fixed-width file per column in <website_id>/<YYYY-MM>/, all holding the same number of values.
+# Integer NULLs are stored as -1, float NULLs as NaN.
+COLUMNS = (
+    ("id", "q"), ("timestamp", "q"), ("response_time", "d"), ("uptime", "d"), ("status_code", "q"),
+    ("response_bytes", "q"), ("failure_class", "b"), ("dns_ms", "d"), ("connect_ms", "d"), ("tls_ms", "d"),
+    ("ttfb_ms", "d"), ("transfer_ms", "d"),
+)
+FAILURE_CLASSES = (probe.FAILURE_TIMEOUT, probe.FAILURE_DNS, probe.FAILURE_CONNECT_REFUSED, probe.FAILURE_CONNECT,
+                   probe.FAILURE_TLS, probe.FAILURE_HTTP, probe.FAILURE_OTHER)
+
+_EPOCH = datetime(1970, 1, 1)
+_NULLABLE_INTS = ("status_code", "response_bytes")
+
+
+def _micros(timestamp):
+    return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+
+def _encode(name, value):
+    if name == "timestamp":
+        return _micros(value)
+    if name == "failure_class":
+        if value is None:
+            return -1
+        return FAILURE_CLASSES.index(value if value in FAILURE_CLASSES else probe.FAILURE_OTHER)
+    if value is None:
+        return -1 if name in _NULLABLE_INTS else math.nan
+    return value
+
+
+def _decode(name, value):
+    if name == "timestamp":
+        return _EPOCH + timedelta(microseconds=value)
+    if name == "failure_class":
+        return None if value < 0 else FAILURE_CLASSES[value]
+    if name in _NULLABLE_INTS:
+        return None if value < 0 else value
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _month(timestamp):
+    return f"{timestamp:%Y-%m}"
+
+
+class Segment:
+    """
+    The memory-mapped columns of one website-month. Appends touch every
+    column file in turn, so a crash can leave them at different lengths;
+    only the first ``len(segment)`` values (the shortest column) count.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._maps, self.columns = {}, {}
+        lengths = []
+        for name, typecode in COLUMNS:
+            file_path = os.path.join(path, f"{name}.bin")
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            lengths.append(size // array(typecode).itemsize)
+            if size:
+                with open(file_path, "rb") as handle:
+                    self._maps[name] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.length = min(lengths)
+        if not self.length:
+            return
+        for name, typecode in COLUMNS:
+            # Only the cast view may outlive this block, or the map could not be closed
+            with memoryview(self._maps[name]) as whole, whole[:self.length * array(typecode).itemsize] as used:
+                self.columns[name] = used.cast(typecode)
+
+    def __len__(self):
+        return self.length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in self.columns.values():
+            view.release()
+        self.columns = {}
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps = {}
+
+    def rows(self, since=None, until=None):
+        """Decoded rows with ``since <= timestamp < until``, ordered by (timestamp, id)."""
+        if not self.length:
+            return []
+        timestamps, ids = self.columns["timestamp"], self.columns["id"]
+        low = _micros(since) if since else -2**63
+        high = _micros(until) if until else 2**63
+        picked = sorted((timestamps[index], ids[index], index) for index in range(self.length)
+                        if low <= timestamps[index] < high)
+        return [{name: _decode(name, self.columns[name][index]) for name, _ in COLUMNS}
+                for _, _, index in picked]
+
+
+def _segment_path(website_id, month, root=None):
+    return os.path.join(root or ARCHIVE_DIR, str(website_id), month)
+
+
+def append(website_id, month, rows, root=None):
+    """
+    Append metric rows (mappings) to a website-month, skipping ids already
+    there, so a pass interrupted before its delete can safely run again.
+    Returns how many rows were written.
+    """
+    path = _segment_path(website_id, month, root)
+    os.makedirs(path, exist_ok=True)
+    with Segment(path) as segment:
+        length = len(segment)
+        stored = set(segment.columns["id"]) if length else set()
+    rows = [row for row in rows if row["id"] not in stored]
+
+    for name, typecode in COLUMNS:
+        file_path = os.path.join(path, f"{name}.bin")
+        with open(file_path, "ab") as handle:
+            handle.truncate(length * array(typecode).itemsize)  # drop the tail of a torn append
+            array(typecode, (_encode(name, row[name]) for row in rows)).tofile(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+    return len(rows)
+
+
+def archive_expired(cutoff, root=None, batch_rows=BATCH_ROWS, partition=None):
+    """
+    Copy the metrics older than ``cutoff`` of every live website into the
+    archive. The caller deletes them from the table afterwards. With a
+    Postgres ``partition`` name only the rows stored in that partition are
+    copied, so exactly what the caller then drops is archived. Returns how
+    many rows were newly archived.
+    """
+    columns = [Metric.website_id] + [getattr(Metric, name) for name, _ in COLUMNS]
+    statement = db.select(*columns).where(Metric.timestamp < cutoff, Metric.website_id.in_(db.select(Website.id)))
+    if partition:
+        statement = statement.where(
+            db.text("metric.tableoid = CAST(:partition AS regclass)").bindparams(partition=f'"{partition}"'))
+    statement = statement.order_by(Metric.website_id, Metric.id).execution_options(yield_per=batch_rows)
+    written = 0
+    for batch in db.session.execute(statement).mappings().partitions():
+        groups = {}
+        for row in batch:
+            groups.setdefault((row["website_id"], _month(row["timestamp"])), []).append(row)
+        for (website_id, month), rows in groups.items():
+            written += append(website_id, month, rows, root)
+    return written
+
+
+def read(website_ids, since=None, until=None, root=None):
+    """
+    Archived rows of ``website_ids`` with ``since <= timestamp < until``,
+    ordered by (timestamp, id). Each month is decoded only when reached.
+    """
+    root = root or ARCHIVE_DIR
+    if not root:
+        return iter(())
+
+    def website_rows(website_id):
+        directory = os.path.join(root, str(website_id))
+        if not os.path.isdir(directory):
+            return
+        low = _month(since) if since else ""
+        high = _month(until) if until else "~"
+        for month in sorted(name for name in os.listdir(directory) if low <= name <= high):
+            with Segment(os.path.join(directory, month)) as segment:
+                rows = segment.rows(since, until)
+            for row in rows:
+                row["website_id"] = website_id
+                yield row
+
+    return heapq.merge(*(website_rows(website_id) for website_id in website_ids),
+                       key=lambda row: (row["timestamp"], row["id"]))
+
+
+def purge_orphans(root=None):
+    """Remove the archives of websites that no longer exist. Returns how many were removed."""
+    root = root or ARCHIVE_DIR
+    if not root or not os.path.isdir(root):
+        return 0
+    live = {str(website_id) for website_id in db.session.execute(db.select(Website.id)).scalars()}
+    removed = 0
+    for name in os.listdir(root):
+        if name.isdigit() and name not in live:
+            shutil.rmtree(os.path.join(root, name))
+            removed += 1
+    return removed
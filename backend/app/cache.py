@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request
+
+from app import instrumentation
+from app.utils.logger import logger
+
+# Cached summaries are served for at most this long; 0 disables the cache. A user's entries are
+# dropped earlier as soon as their data version moves (see bump).
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 15))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048))  # in-process LRU size
+# Shared by every worker and the monitor when set, so the monitor's bumps reach the API workers.
+# Without it each process has its own cache and the monitor's writes only show after the TTL.
+REDIS_URL = os.getenv("REDIS_URL", "")
+WAIT_SECONDS = 10  # how long a request waits for an identical one already computing
+
+_PREFIX = "watchly:cache:"
+
+REQUESTS = instrumentation.counter("watchly_response_cache_requests_total",
+                                   "Cacheable summary requests by outcome", ["endpoint", "result"])
+
+
+class MemoryBackend:
+    """Per-process LRU of (expiry, value) entries plus per-user data versions."""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries if max_entries is not None else MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def version(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend:
+    """Entries and versions in Redis; entries expire through Redis TTLs."""
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=1)
+
+    def get(self, key):
+        raw = self._client.get(_PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(_PREFIX + key, json.dumps(value), px=int(ttl * 1000))
+
+    def version(self, user_id):
+        return int(self._client.get(f"{_PREFIX}version:{user_id}") or 0)
+
+    def bump(self, user_ids):
+        pipeline = self._client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.incr(f"{_PREFIX}version:{user_id}")
+        pipeline.execute()
+
+    def clear(self):
+        for key in self._client.scan_iter(f"{_PREFIX}*"):
+            self._client.delete(key)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class ResponseCache:
+    """
+    Caches (body, status) of per-user GET endpoints under the user's data
+    version, so a bump makes every cached response of that user stale at
+    once. Identical concurrent misses in a process compute once
+    (single-flight); the others wait for that result.
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        self.ttl = ttl if ttl is not None else TTL_SECONDS
+        if backend is None:
+            backend = RedisBackend(REDIS_URL) if REDIS_URL.startswith(("redis://", "rediss://")) else MemoryBackend()
+        self.backend = backend
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def bump(self, user_ids):
+        """Invalidate the cached responses of ``user_ids`` (call after their data changed and committed)."""
+        user_ids = set(user_ids)
+        if not user_ids or not self.ttl:
+            return
+        try:
+            self.backend.bump(user_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Response cache bump failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._flights.clear()
+        self.backend.clear()
+
+    def _single_flight(self, key, compute):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(WAIT_SECONDS) and flight.result is not None:
+                return flight.result
+            return compute()  # the leader failed or is stuck: compute our own
+        try:
+            flight.result = compute()
+            return flight.result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def cached(self, endpoint):
+        """Decorate a ``get(self, current_user)`` Resource method (under token_required)."""
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(resource, current_user, *args, **kwargs):
+                if not self.ttl:
+                    return f(resource, *args, current_user=current_user, **kwargs)
+                try:
+                    version = self.backend.version(current_user.id)
+                    key = f"{endpoint}:{current_user.id}:{version}:{request.query_string.decode()}"
+                    hit = self.backend.get(key)
+                except Exception as e:
+                    logger.warning(f"⚠️ Response cache unavailable: {str(e)}")
+                    return f(resource, *args, current_user=current_user, **kwargs)
+                if hit is not None:
+                    REQUESTS.inc(endpoint=endpoint, result="hit")
+                    return tuple(hit)
+
+                def compute():
+                    REQUESTS.inc(endpoint=endpoint, result="miss")
+                    body, status = f(resource, *args, current_user=current_user, **kwargs)
+                    if status == 200:
+                        try:
+                            self.backend.set(key, [body, status], self.ttl)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Response cache write failed: {str(e)}")
+                    return body, status
+
+                return self._single_flight(key, compute)
+
+            return decorated
+
+        return decorator
+
+
+response_cache = ResponseCache()
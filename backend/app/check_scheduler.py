@@ -0,0 +1,147 @@
+import heapq
+import time
+import zlib
+
+
+class CheckScheduler:
+    """
+    Deadline heap that decides which check keys are due.
+
+    A key is whatever the caller schedules: the monitor uses check keys (see
+    ``app.monitor.check_key``), so one entry serves every website sharing a
+    request. Each key is ordered by its next-due time on the monotonic clock.
+    Keys are re-armed relative to their previous deadline (not to the moment
+    they actually ran) so the cadence does not drift, and first-run times
+    are spread over a window using a stable hash of the key so a restart
+    does not fire every check in the same second.
+    """
+
+    def __init__(self, min_interval=10, start_spread=60, clock=time.monotonic, lag_observer=None):
+        self.min_interval = min_interval
+        self.start_spread = start_spread
+        self._clock = clock
+        self._lag_observer = lag_observer  # called with each dispatched entry's lag in seconds
+        self._heap = []       # (due, generation, key) — stale items are skipped lazily
+        self._entries = {}    # key -> {"due", "interval", "generation"}
+        self._generation = 0
+        self._lag = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0, "missed": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def interval_for(self, key):
+        entry = self._entries.get(key)
+        return entry["interval"] if entry else None
+
+    def _phase(self, key, interval):
+        """Stable offset in [0, min(interval, start_spread)) derived from the key."""
+        window = max(min(interval, self.start_spread), 1)
+        return (zlib.crc32(str(key).encode()) % int(window * 1000)) / 1000.0
+
+    def _push(self, key, due, interval):
+        self._generation += 1
+        self._entries[key] = {
+            "due": due,
+            "interval": interval,
+            "generation": self._generation,
+        }
+        heapq.heappush(self._heap, (due, self._generation, key))
+
+    def schedule(self, key, interval, now=None):
+        """Add a key, or update its interval if it is already scheduled."""
+        now = self._clock() if now is None else now
+        interval = max(float(interval), self.min_interval)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._push(key, now + self._phase(key, interval), interval)
+        elif entry["interval"] != interval:
+            # Never push an existing deadline further out than the new interval allows
+            due = min(entry["due"], now + interval)
+            self._push(key, due, interval)
+
+    def reschedule(self, key, delay, now=None):
+        """Move a key's next deadline to ``delay`` seconds from now."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        now = self._clock() if now is None else now
+        self._push(key, now + delay, entry["interval"])
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def sync(self, intervals, now=None):
+        """
+        Reconcile the heap with the current set of keys.
+
+        ``intervals`` maps key -> interval in seconds; keys missing from it
+        are dropped, new ones are phased in, changed ones re-armed.
+        """
+        now = self._clock() if now is None else now
+        for key in list(self._entries):
+            if key not in intervals:
+                self.remove(key)
+        for key, interval in intervals.items():
+            self.schedule(key, interval, now=now)
+
+    def pop_due(self, now=None, limit=None):
+        """Return every key whose deadline has passed and re-arm them."""
+        now = self._clock() if now is None else now
+        due_keys = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due_keys) >= limit:
+                break
+            due, generation, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry["generation"] != generation:
+                continue  # removed or re-armed since this item was pushed
+
+            lag = now - due
+            self._lag["count"] += 1
+            self._lag["total"] += lag
+            self._lag["last"] = lag
+            self._lag["max"] = max(self._lag["max"], lag)
+            if self._lag_observer is not None:
+                self._lag_observer(lag)
+
+            next_due = due + entry["interval"]
+            if next_due <= now:
+                # We fell more than a full interval behind; skip the missed slots
+                # instead of firing a burst of catch-up checks.
+                missed = int((now - next_due) // entry["interval"]) + 1
+                self._lag["missed"] += missed
+                next_due += missed * entry["interval"]
+            self._push(key, next_due, entry["interval"])
+            due_keys.append(key)
+        return due_keys
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the earliest live deadline, or None when nothing is scheduled."""
+        now = self._clock() if now is None else now
+        while self._heap:
+            due, generation, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is None or entry["generation"] != generation:
+                heapq.heappop(self._heap)
+                continue
+            return max(due - now, 0.0)
+        return None
+
+    def lag_stats(self, reset=False):
+        """Schedule lag (seconds between a key's deadline and its dispatch)."""
+        count = self._lag["count"]
+        stats = {
+            "dispatched": count,
+            "avg_lag": round(self._lag["total"] / count, 3) if count else 0.0,
+            "max_lag": round(self._lag["max"], 3),
+            "last_lag": round(self._lag["last"], 3),
+            "missed_slots": self._lag["missed"],
+            "scheduled": len(self._entries),
+        }
+        if reset:
+            self._lag = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0, "missed": 0}
+        return stats
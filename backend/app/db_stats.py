@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from opentelemetry import trace as otel_trace
+from sqlalchemy import event
+
+from app import db, instrumentation
+from app.utils.logger import logger
+
+# Requests issuing more SQL statements than this are logged (0 disables the warning)
+STATEMENT_BUDGET = int(os.getenv("DB_STATEMENT_BUDGET", 50))
+# Report the counts as X-DB-Statements / X-DB-Time-Ms headers and span attributes outside debug mode too
+EXPOSE = os.getenv("DB_STATS_HEADERS", "").lower() in ("1", "true", "yes")
+
+STATEMENTS = instrumentation.histogram("watchly_request_db_statements", "SQL statements issued per HTTP request",
+                                       buckets=(1, 2, 5, 10, 20, 50, 100, 250))
+
+_local = threading.local()
+
+
+class StatementStats:
+    """SQL statements executed, and the seconds spent in them, while active."""
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+def _active():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("watchly_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("watchly_started")
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    for stats in _active():
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+@contextmanager
+def count_statements():
+    """Count the statements this thread executes inside the block (blocks may nest)."""
+    stats = StatementStats()
+    _active().append(stats)
+    try:
+        yield stats
+    finally:
+        _active().remove(stats)
+
+
+def init_app(app):
+    """
+    Count the SQL statements and DB time of every request. With the app in
+    debug mode (or DB_STATS_HEADERS set) they are returned as response
+    headers and set on the request span, so an endpoint going O(n) in
+    queries shows up on the first call.
+    """
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_statement_count():
+        g.db_stats = StatementStats()
+        _active().append(g.db_stats)
+
+    @app.after_request
+    def report_statement_count(response):
+        stats = g.get("db_stats")
+        if stats is None:
+            return response
+        STATEMENTS.observe(stats.statements)
+        if STATEMENT_BUDGET and stats.statements > STATEMENT_BUDGET:
+            logger.warning(f"⚠️ {request.method} {request.path} issued {stats.statements} SQL statements "
+                           f"(budget {STATEMENT_BUDGET})")
+        if app.debug or EXPOSE:
+            milliseconds = round(stats.seconds * 1000, 2)
+            response.headers["X-DB-Statements"] = str(stats.statements)
+            response.headers["X-DB-Time-Ms"] = str(milliseconds)
+            span = otel_trace.get_current_span()
+            span.set_attribute("db.statement_count", stats.statements)
+            span.set_attribute("db.time_ms", milliseconds)
+        return response
+
+    @app.teardown_request
+    def stop_statement_count(exc):
+        stats = g.pop("db_stats", None)
+        if stats is not None and stats in _active():
+            _active().remove(stats)
@@ -0,0 +1,34 @@
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indexes of ``threshold`` points of the
+    series (xs ascending) that keep its visual shape. The first and last
+    points are always kept; each bucket in between contributes the point
+    forming the largest triangle with the previous pick and the average of
+    the next bucket, so spikes and dips survive the downsampling.
+    """
+    size = len(xs)
+    if threshold >= size:
+        return list(range(size))
+    if threshold <= 2:
+        return [0, size - 1][:max(threshold, 0)]
+
+    every = (size - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, size)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        ax, ay = xs[anchor], ys[anchor]
+        best_area, best = -1.0, None
+        for index in range(int(bucket * every) + 1, int((bucket + 1) * every) + 1):
+            area = abs((ax - avg_x) * (ys[index] - ay) - (ax - xs[index]) * (avg_y - ay))
+            if area > best_area:
+                best_area, best = area, index
+        selected.append(best)
+        anchor = best
+    selected.append(size - 1)
+    return selected
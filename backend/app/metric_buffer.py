@@ -0,0 +1,168 @@
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+from datetime import datetime
+
+from app import db, instrumentation, rollups, sla, website_status
+from app.cache import response_cache
+from app.models import Metric, Website
+from app.utils.logger import logger
+
+# Rows are written when this many are waiting, or every FLUSH_SECONDS,
+# whichever comes first. If the database is unreachable the buffer keeps at
+# most MAX_ROWS and drops the oldest rows beyond that.
+FLUSH_ROWS = int(os.getenv("METRIC_BUFFER_FLUSH_ROWS", 500))
+FLUSH_SECONDS = float(os.getenv("METRIC_BUFFER_FLUSH_SECONDS", 2))
+MAX_ROWS = int(os.getenv("METRIC_BUFFER_MAX_ROWS", 50000))
+
+FLUSH_DURATION = instrumentation.histogram("watchly_metric_flush_seconds", "Time to write one buffered batch of metrics")
+FLUSH_SIZE = instrumentation.histogram("watchly_metric_flush_rows", "Rows written per metric flush",
+                                       buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000))
+BUFFERED = instrumentation.gauge("watchly_metric_buffer_rows", "Metric rows waiting to be written")
+DROPPED = instrumentation.counter("watchly_metric_rows_dropped_total", "Metric rows dropped because the buffer was full")
+FLUSH_ERRORS = instrumentation.counter("watchly_metric_flush_errors_total", "Metric flushes that failed and were retried")
+
+_COLUMNS = [column.name for column in Metric.__table__.columns if column.name != "id"]
+
+
+def _copy_rows(rows):
+    """Postgres: stream the batch through COPY ... FROM STDIN on the session's connection (psycopg2 only)."""
+    data = io.StringIO()
+    writer = csv.writer(data)
+    for row in rows:
+        # Unquoted empty fields are NULL in COPY's CSV format
+        writer.writerow(["" if row.get(column) is None else row[column] for column in _COLUMNS])
+    data.seek(0)
+
+    # Same transaction as the rollup upsert, so a failed flush leaves neither behind
+    connection = db.session.connection().connection
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY metric ({', '.join(_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", data)
+
+
+def write_metrics(rows):
+    """
+    Insert metric rows with the fastest path the dialect offers and fold them
+    into the rollup tables, website status snapshots and uptime intervals,
+    all in one transaction. Rows for websites deleted since the check are
+    dropped.
+    """
+    if not rows:
+        return
+    website_ids = {row["website_id"] for row in rows}
+    owners = dict(db.session.execute(db.select(Website.id, Website.user_id).where(Website.id.in_(website_ids))).all())
+    live = set(owners)
+    if live != website_ids:
+        rows = [row for row in rows if row["website_id"] in live]
+    if not rows:
+        db.session.commit()
+        return
+    try:
+        if db.engine.dialect.name == "postgresql" and db.engine.dialect.driver == "psycopg2":
+            _copy_rows(rows)
+        else:
+            # SQLAlchemy turns this into executemany (SQLite) or multi-row INSERT ... VALUES (insertmanyvalues)
+            db.session.execute(db.insert(Metric), [{column: row.get(column) for column in _COLUMNS} for row in rows])
+        rollups.record(rows)
+        website_status.record(rows)
+        sla.record(rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    response_cache.bump(owners[row["website_id"]] for row in rows)
+
+
+class MetricBuffer:
+    """
+    Write-behind buffer for Metric rows.
+
+    The monitor and ``/status`` hand their rows to ``add`` and return
+    immediately; a background thread writes them in batches. Rows are kept
+    in memory until written, so a crash can lose up to one flush interval of
+    metrics. Callers that need the new row's id must insert directly.
+    """
+
+    def __init__(self, app=None, flush_rows=None, flush_seconds=None, max_rows=None):
+        self.flush_rows = flush_rows if flush_rows is not None else FLUSH_ROWS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else FLUSH_SECONDS
+        self.max_rows = max_rows if max_rows is not None else MAX_ROWS
+        self.app = None
+        self._rows = []
+        self._lock = threading.Lock()        # guards _rows
+        self._flush_lock = threading.Lock()  # one writer at a time
+        self._wake = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        if not getattr(self, "_atexit_registered", False):
+            atexit.register(self.flush)
+            self._atexit_registered = True
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, rows):
+        now = datetime.utcnow()
+        rows = [row if row.get("timestamp") else {**row, "timestamp": now} for row in rows]
+        with self._lock:
+            self._rows.extend(rows)
+            pending = self._trim()
+        BUFFERED.set(pending)
+        self._ensure_thread()
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def _trim(self):
+        """Drop the oldest rows beyond max_rows (hold _lock). Returns the rows left."""
+        overflow = len(self._rows) - self.max_rows
+        if overflow > 0:
+            del self._rows[:overflow]
+            DROPPED.inc(overflow)
+        return len(self._rows)
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    write_metrics(rows)
+            except Exception as e:
+                FLUSH_ERRORS.inc()
+                logger.error(f"❌ Failed to write {len(rows)} buffered metrics, will retry: {str(e)}")
+                with self._lock:
+                    self._rows[:0] = rows  # back in front of the rows added meanwhile, so trimming drops them first
+                    pending = self._trim()
+                BUFFERED.set(pending)
+                return 0
+            FLUSH_DURATION.observe(time.perf_counter() - started)
+            FLUSH_SIZE.observe(len(rows))
+            BUFFERED.set(len(self._rows))
+            return len(rows)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="metric-buffer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+
+metric_buffer = MetricBuffer()
@@ -41,22 +41,100 @@ class User(db.Model):
 #Website Model
 class Website(db.Model):
     __tablename__ = 'website'
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse ids: metrics of deleted websites are purged lazily
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False, index=True)
     url = db.Column(db.String(200), nullable=False)
     name = db.Column(db.String(100), nullable=False)
-    frequency = db.Column(db.Integer, default=5)
-    metrics = db.relationship('Metric', backref='website', cascade="all, delete", passive_deletes=True)
+    frequency = db.Column(db.Integer, default=300)  # check interval in seconds
+    cold_connection = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # skip the pooled client
+    check_mode = db.Column(db.String(10), nullable=True)  # get / head / stream; NULL uses MONITOR_DEFAULT_CHECK_MODE
+    max_body_bytes = db.Column(db.Integer, nullable=True)  # stream mode read cap; NULL uses MONITOR_MAX_BODY_BYTES
+    max_frequency = db.Column(db.Integer, nullable=True)  # adaptive backoff ceiling in seconds; NULL keeps a fixed cadence
+    # Watermark for the monitor's incremental site registry
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.now(), index=True)
+    # No foreign key: metrics outlive their website until retention drops them (see app.retention)
+    metrics = db.relationship('Metric', primaryjoin='Website.id == foreign(Metric.website_id)', viewonly=True)
     alerts = db.relationship('Alert', backref='website', cascade="all, delete", passive_deletes=True)
+    rollups = db.relationship('MetricRollup', backref='website', cascade="all, delete", passive_deletes=True)
+    current_status = db.relationship('WebsiteStatus', backref='website', uselist=False, cascade="all, delete",
+                                     passive_deletes=True)
 
-#Metric Model
+#Metric Model — range-partitioned by timestamp on Postgres (see app.retention)
 class Metric(db.Model):
+    # History reads are per website over a time range (and also serve website_id-only lookups)
+    __table_args__ = (db.Index("ix_metric_website_id_timestamp", "website_id", "timestamp"),)
+
     id =db.Column(db.Integer, primary_key=True)
-    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete="CASCADE"), nullable=False, index=True)
+    website_id = db.Column(db.Integer, nullable=False)
     response_time = db.Column(db.Float, nullable=False)
     uptime = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Check breakdown recorded by the monitor (ms); NULL for manually added metrics
+    status_code = db.Column(db.Integer, nullable=True)
+    response_bytes = db.Column(db.Integer, nullable=True)
+    failure_class = db.Column(db.String(20), nullable=True)  # timeout, dns, connect_refused, tls, http_error...
+    dns_ms = db.Column(db.Float, nullable=True)
+    connect_ms = db.Column(db.Float, nullable=True)
+    tls_ms = db.Column(db.Float, nullable=True)
+    ttfb_ms = db.Column(db.Float, nullable=True)
+    transfer_ms = db.Column(db.Float, nullable=True)
+
+#DeletedWebsite Model — deleted websites whose raw metrics app.retention has yet to purge (metric has no foreign key)
+class DeletedWebsite(db.Model):
+    __tablename__ = 'deleted_website'
+
+    website_id = db.Column(db.Integer, primary_key=True)  # website ids are never reused
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+#MetricRollup Model — per-website metric aggregates at minute / hour / day resolution, kept by app.rollups
+class MetricRollup(db.Model):
+    __tablename__ = 'metric_rollup'
+
+    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete="CASCADE"), primary_key=True)
+    resolution = db.Column(db.Integer, primary_key=True)  # bucket width in seconds: 60, 3600, 86400
+    bucket_start = db.Column(db.DateTime, primary_key=True)  # UTC, aligned to the resolution
+    count = db.Column(db.Integer, nullable=False, default=0)
+    up_count = db.Column(db.Float, nullable=False, default=0.0)  # sum of uptime (1 per successful check)
+    latency_count = db.Column(db.Integer, nullable=False, default=0)  # checks with response_time > 0
+    latency_sum = db.Column(db.Float, nullable=False, default=0.0)
+    latency_min = db.Column(db.Float, nullable=True)
+    latency_max = db.Column(db.Float, nullable=True)
+    # Latency histogram (ms): < 50, 50-200, 200-500, 500-1000, >= 1000
+    bucket_50 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_200 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_500 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_1000 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_inf = db.Column(db.Integer, nullable=False, default=0)
+    latency_sketch = db.Column(db.LargeBinary, nullable=True)  # app.sketch.LatencySketch of the positive latencies
+
+#WebsiteStatus Model — latest check of each website, upserted with every metric flush (see app.website_status)
+class WebsiteStatus(db.Model):
+    __tablename__ = 'website_status'
+
+    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete="CASCADE"), primary_key=True)
+    status = db.Column(db.String(10), nullable=False)  # up / down
+    uptime = db.Column(db.Float, nullable=False)
+    response_time = db.Column(db.Float, nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    failure_class = db.Column(db.String(20), nullable=True)
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    last_checked_at = db.Column(db.DateTime, nullable=False)
+    last_change_at = db.Column(db.DateTime, nullable=False)  # when status last flipped (or first check)
+
+#UptimeInterval Model — up / down periods of each website, opened and closed on state changes (see app.sla)
+class UptimeInterval(db.Model):
+    __tablename__ = 'uptime_interval'
+    __table_args__ = (db.Index("ix_uptime_interval_website_id_started_at", "website_id", "started_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete="CASCADE"), nullable=False)
+    state = db.Column(db.String(10), nullable=False)  # up / down
+    started_at = db.Column(db.DateTime, nullable=False)  # check that changed the state
+    ended_at = db.Column(db.DateTime, nullable=True)  # first check in another state; NULL while current
+    cause = db.Column(db.String(20), nullable=True)  # failure_class that opened a down interval
 
 #Alert Model
 class Alert(db.Model):
@@ -138,6 +216,49 @@ class OtelSpan(db.Model):
     error_message    = db.Column(db.Text,        nullable=True)
 
 
+#RouteLatency Model — hourly per-route request counts and latency sketches, kept by the span exporter
+class RouteLatency(db.Model):
+    __tablename__ = 'route_latency'
+
+    http_method    = db.Column(db.String(10),  primary_key=True)
+    http_route     = db.Column(db.String(200), primary_key=True)
+    bucket_start   = db.Column(db.DateTime,    primary_key=True)   # UTC hour
+    count          = db.Column(db.Integer,     nullable=False, default=0)
+    error_count    = db.Column(db.Integer,     nullable=False, default=0)
+    duration_sum   = db.Column(db.Float,       nullable=False, default=0.0)
+    latency_sketch = db.Column(db.LargeBinary, nullable=True)      # app.sketch.LatencySketch of duration_ms
+
+
+#NotificationOutbox Model — alert emails written with the Alert row, delivered by app.notifications
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('alert.id', ondelete="SET NULL"), nullable=True, index=True)
+    to_email = db.Column(db.String(200), nullable=False)
+    subject = db.Column(db.String(300), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claimed_by = db.Column(db.String(100), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+
+#MonitorWorker Model — heartbeat lease for each process running the website monitor
+class MonitorWorker(db.Model):
+    __tablename__ = 'monitor_worker'
+
+    id = db.Column(db.String(100), primary_key=True)  # hostname:pid:nonce
+    hostname = db.Column(db.String(100), nullable=False)
+    pid = db.Column(db.Integer, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
 #Pipeline Model
 class Pipeline(db.Model):
     __tablename__ = 'pipeline'
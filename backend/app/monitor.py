@@ -1,193 +1,522 @@
 import asyncio
-import httpx
 import atexit
-from apscheduler.schedulers.background import BackgroundScheduler
-from app import create_app, db
-from app.models import Website, Metric, Alert, User
+import httpx
+import threading
+from app import instrumentation
+from app.check_scheduler import CheckScheduler
+from app.alerting import AlertEvaluator
+from app.notifications import OutboxDispatcher
+from app.metric_buffer import metric_buffer
+from app.registry import SiteRegistry
+from app.retention import RetentionJob
+from app.probe import CHECK_MODES, FAILURE_HTTP, MODE_GET, MODE_STREAM, normalize_url, probe, timed_transport
+from app.sharding import WorkerMembership, HEARTBEAT_SECONDS
 from datetime import datetime
-from sqlalchemy.orm import sessionmaker
 from app.utils.logger import logger
-from sqlalchemy.sql import text  # Ensure text is imported
 import time
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-scheduler = BackgroundScheduler()
+# Website.frequency is stored in seconds. The monitor sleeps until the next
+# deadline in the heap below; the site list is re-read every SITE_SYNC_SECONDS.
+DEFAULT_FREQUENCY_SECONDS = 300
+MIN_FREQUENCY_SECONDS = int(os.getenv("MONITOR_MIN_FREQUENCY_SECONDS", 10))
+SITE_SYNC_SECONDS = int(os.getenv("MONITOR_SITE_SYNC_SECONDS", 30))
+START_SPREAD_SECONDS = int(os.getenv("MONITOR_START_SPREAD_SECONDS", 60))
+
+# Check outcome fields stored on each Metric row
+METRIC_FIELDS = ("response_time", "uptime", "status_code", "response_bytes", "failure_class",
+                 "dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "transfer_ms")
+
+# Self-instrumentation, exposed on /internal/metrics
+CHECKS = instrumentation.counter("watchly_monitor_checks_total", "HTTP checks performed, by outcome "
+                                 "(up or failure class)", ["outcome"])
+CHECK_SECONDS = instrumentation.histogram("watchly_monitor_check_duration_seconds", "Wall time of one HTTP check")
+BATCH_SECONDS = instrumentation.histogram("watchly_monitor_batch_seconds",
+                                          "Dispatch-to-done time of one batch of checks",
+                                          buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120))
+TICK_SECONDS = instrumentation.histogram("watchly_monitor_tick_seconds",
+                                         "Loop work per wake-up (heartbeat, sync and dispatch)")
+SCHEDULE_LAG_SECONDS = instrumentation.histogram("watchly_monitor_schedule_lag_seconds",
+                                                 "Delay between a check's deadline and its dispatch")
+IN_FLIGHT = instrumentation.gauge("watchly_monitor_in_flight", "Check groups dispatched and not yet finished")
+SCHEDULED = instrumentation.gauge("watchly_monitor_scheduled_groups", "Check groups in this worker's schedule")
+SITES = instrumentation.gauge("watchly_monitor_sites", "Websites known to this worker's site registry")
+SERVICE_COUNTERS = {
+    name: instrumentation.counter(f"watchly_monitor_{name}_total", documentation)
+    for name, documentation in (
+        ("dispatched", "Check groups dispatched"),
+        ("completed", "Website results stored (after fan-out)"),
+        ("overruns", "Deadlines skipped because the previous check was still running"),
+        ("shed", "Deadlines dropped because too many checks were pending"),
+        ("errors", "Batches that failed with an exception"),
+        ("deduplicated", "Website checks served by another website's request"),
+        ("rechecks", "Failure confirmation re-checks scheduled"),
+    )
+}
+
+check_scheduler = CheckScheduler(min_interval=MIN_FREQUENCY_SECONDS, start_spread=START_SPREAD_SECONDS,
+                                 lag_observer=SCHEDULE_LAG_SECONDS.observe)
+alert_evaluator = AlertEvaluator()
+
+
+def frequency_seconds(frequency):
+    """Normalise a Website.frequency value into a check interval in seconds."""
+    if not frequency or frequency <= 0:
+        return DEFAULT_FREQUENCY_SECONDS
+    return max(int(frequency), MIN_FREQUENCY_SECONDS)
+
+
+# A failed check on a healthy site is re-checked after CONFIRM_DELAY_SECONDS
+# until app.alerting confirms or dismisses the outage. Sites with a
+# max_frequency back off (interval doubles every STABLE_CHECKS consecutive
+# successful checks, up to max_frequency) and drop back on the first failure.
+CONFIRM_DELAY_SECONDS = float(os.getenv("MONITOR_CONFIRM_DELAY_SECONDS", 5))
+STABLE_CHECKS = int(os.getenv("MONITOR_STABLE_CHECKS", 10))
+
+
+def adaptive_interval(target, streak):
+    """Check interval for ``target`` after ``streak`` consecutive successful checks."""
+    if not target.max_frequency or streak < STABLE_CHECKS:
+        return target.interval
+    ceiling = frequency_seconds(target.max_frequency)
+    if ceiling <= target.interval:
+        return target.interval
+    return min(target.interval * 2 ** min(streak // STABLE_CHECKS, 16), ceiling)
+
+
+# Shared HTTP client settings. One pooled client lives for the whole monitor
+# worker so repeat checks reuse keep-alive connections instead of paying a
+# fresh TCP + TLS handshake every time.
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("MONITOR_REQUEST_TIMEOUT_SECONDS", 5))
+MAX_CONNECTIONS = int(os.getenv("MONITOR_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MONITOR_MAX_KEEPALIVE_CONNECTIONS", 50))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("MONITOR_KEEPALIVE_EXPIRY_SECONDS", 60))
+HTTP2_ENABLED = os.getenv("MONITOR_HTTP2", "0").lower() in ("1", "true", "yes")
+
+_http_client = None
+
+
+def _http2_available():
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401 — optional dependency (pip install httpx[http2])
+        return True
+    except ImportError:
+        logger.warning("⚠️ MONITOR_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1.")
+        return False
+
+
+def get_http_client():
+    """Return the monitor's long-lived pooled AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            transport=timed_transport(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                http2=_http2_available(),
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+# Per-site check mode defaults (see app/probe.py): get, head or stream
+DEFAULT_CHECK_MODE = os.getenv("MONITOR_DEFAULT_CHECK_MODE", MODE_GET).lower()
+DEFAULT_MAX_BODY_BYTES = int(os.getenv("MONITOR_MAX_BODY_BYTES", 65536))
+
+
+def check_settings(website):
+    """Resolve a website's (check_mode, max_body_bytes), falling back to the monitor defaults."""
+    mode = website.check_mode or DEFAULT_CHECK_MODE
+    if mode not in CHECK_MODES:
+        mode = MODE_GET
+    max_body_bytes = website.max_body_bytes if website.max_body_bytes is not None else DEFAULT_MAX_BODY_BYTES
+    return mode, max_body_bytes
+
+
+def check_key(website):
+    """
+    Dedup key for a website's check: sites with the same normalized URL and
+    check settings send an identical request, so one fetch serves them all.
+    """
+    mode, max_body_bytes = check_settings(website)
+    body_cap = str(max_body_bytes) if mode == MODE_STREAM else ""
+    return "|".join((normalize_url(website.url), mode, body_cap, "cold" if website.cold_connection else ""))
+
+
+site_registry = SiteRegistry(frequency_seconds, check_key)
+
 
 # Function to check Website status
-async def check_websites(website):
+async def check_websites(website, client=None):
     logger.info(f"🔎 Checking website: {website.url}")
 
-    async with httpx.AsyncClient() as client:
-        try:
-            start_time = datetime.utcnow()
+    with CHECK_SECONDS.time():
+        if website.cold_connection or client is None:
+            # Opted out of pooling: measure a cold connection every time
+            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS, transport=timed_transport()) as cold_client:
+                outcome = await probe(cold_client, website.url, REQUEST_TIMEOUT_SECONDS, *check_settings(website))
+        else:
+            outcome = await probe(client, website.url, REQUEST_TIMEOUT_SECONDS, *check_settings(website))
+    CHECKS.inc(outcome=outcome["failure_class"] or "up")
 
-            response = await client.get(website.url, timeout=5, follow_redirects=True)
-            response_time = (datetime.utcnow() - start_time).total_seconds() * 1000  # Convert to ms
-
-            # Allows 2xx-3xx as Up for redirects
-            if 200 <= response.status_code < 400:
-                uptime = 1
-            else:
-                uptime = 0
-            if uptime == 0:
-                logger.warning(f"⚠️ {website.url} responded with {response.status_code}, marking as DOWN.")
-
-        except httpx.RequestError as e:
-            # Connection failed - Website is down
-            response_time = 0  # ✅ Ensure response_time is not None
-            uptime = 0
-            logger.error(f"❌ {website.url} is DOWN - Connection Failed: {str(e)}")
+    if outcome["failure_class"] == FAILURE_HTTP:
+        logger.warning(f"⚠️ {website.url} responded with {outcome['status_code']}, marking as DOWN.")
+    elif outcome["failure_class"]:
+        logger.error(f"❌ {website.url} is DOWN - {outcome['failure_class']}: {outcome.get('error')}")
 
     # ✅ Ensure timestamp is declared
     timestamp = datetime.utcnow()
 
     result = {
         "website_id": website.id,  # ✅ Use website.id instead of website
-        "response_time": response_time,
-        "uptime": uptime,
         "timestamp": timestamp,
+        **{field: outcome[field] for field in METRIC_FIELDS},
     }
 
-    # ✅ Save to DB
-    # db.session.execute(
-    #    text("INSERT INTO metric (website_id, response_time, uptime, timestamp) VALUES (:website_id, :response_time, :uptime, :timestamp)"),
-    #   {"website_id": website.id, "response_time": response_time, "uptime": uptime, "timestamp": timestamp}  # ✅ Corrected reference
-    #)
+    return result  # ✅ Always return result
+
 
-    # db.session.commit()
+# Concurrency limits for the long-lived monitor loop
+MAX_IN_FLIGHT = int(os.getenv("MONITOR_MAX_IN_FLIGHT", 50))     # concurrent HTTP checks
+MAX_PENDING = int(os.getenv("MONITOR_MAX_PENDING", 1000))       # dispatched but unfinished sites
+
+
+def _with_app_context(app, fn, *args):
+    """Run a synchronous DB helper inside an app context (called via asyncio.to_thread)."""
+    with app.app_context():
+        return fn(*args)
+
+
+def _save_results(results):
+    # Write-behind: app.metric_buffer batches rows across ticks and writes them off the event loop
+    metric_buffer.add([
+        {
+            "website_id": result["website_id"],  # ✅ Fixed reference to website_id
+            "timestamp": result["timestamp"],
+            **{field: result[field] for field in METRIC_FIELDS},
+        }
+        for result in results
+    ])
+
+
+async def run_checks(app, targets, client, semaphore, evaluator=None, dispatcher=None):
+    """
+    Check the given registry targets, store their metrics and evaluate alerts.
+
+    Targets sharing a check key are fetched once and the result is fanned
+    out into a Metric row (and alert evaluation) for each of them.
+    """
+    evaluator = evaluator if evaluator is not None else alert_evaluator
+    groups = {}
+    for target in targets:
+        groups.setdefault(target.key, []).append(target)
+
+    async def limited_check(members):
+        async with semaphore:
+            result = await check_websites(members[0], client)
+        return [result] + [{**result, "website_id": website.id} for website in members[1:]]
+
+    fanned_out = await asyncio.gather(*(limited_check(members) for members in groups.values()))
+    results = [result for group_results in fanned_out for result in group_results]
+    if not results:
+        return results
+
+    _save_results(results)
+    logger.info(f"✅ Queued {len(results)} metrics")
+
+    # Alert state lives in memory; only up/down transitions reach the database
+    if evaluator.needs_hydrate():
+        await asyncio.to_thread(_with_app_context, app, evaluator.hydrate)
+    transitions = evaluator.evaluate(results)
+    if transitions:
+        # Emails are queued in the outbox with the alert and sent by the dispatcher
+        notifications = await asyncio.to_thread(_with_app_context, app, evaluator.apply, transitions)
+        if notifications and dispatcher is not None:
+            dispatcher.wake()
+    return results
 
-    return result  # ✅ Always return result
 
 # Function to check all websites
 async def check_all_websites(app):
-    with app.app_context():
-        websites = db.session.execute(db.select(Website)).scalars().all()
-        semaphore = asyncio.Semaphore(10)
-
-        async def limited_check(website):
-            async with semaphore:
-                return await check_websites(website)
-
-        tasks = [limited_check(website) for website in websites]
-        results = await asyncio.gather(*tasks)
-
-        db.session.bulk_insert_mappings(Metric, [
-            {
-                "website_id": result["website_id"],  # ✅ Fixed reference to website_id
-                "response_time": result["response_time"],
-                "uptime": result["uptime"],
-                "timestamp": result["timestamp"]
-            }
-            for result in results
-        ])
-        db.session.commit()
-        print("✅ Metrics saved successfully!")
-
-        # Run alerts concurrently
-        alert_tasks = [
-            check_for_alert(result["website_id"], "Website Down", app)
-            if result["uptime"] == 0
-            else check_for_alert(result["website_id"], "Website Up", app)
-            for result in results
-        ]
-        await asyncio.gather(*alert_tasks)
-
-# Function to check alert conditions
-async def check_for_alert(website_id, alert_type, app):
-    from app.utils.email_utils import send_email_via_cloudflare as send_email_async
-    with app.app_context():
-        website = db.session.get(Website, website_id)
-        if not website:
-            logger.error(f"Alert triggered for non-existent website ID {website_id}")
-            return
+    """One pass: sync the schedule and check every website that is due right now."""
+    await asyncio.to_thread(_with_app_context, app, site_registry.refresh)
+    check_scheduler.sync(site_registry.intervals())
+
+    due_ids = [website_id for key in check_scheduler.pop_due() for website_id in site_registry.groups.get(key, ())]
+    if not due_ids:
+        return []
+    return await run_checks(app, site_registry.get(due_ids), get_http_client(), asyncio.Semaphore(MAX_IN_FLIGHT))
+
+
+class MonitorService:
+    """
+    Long-lived monitoring worker.
+
+    Runs on a single event loop for the life of the process: it sleeps until
+    the next deadline in the check scheduler, dispatches due sites as a batch,
+    and bounds concurrency with a semaphore. A site that is still being
+    checked when its next deadline arrives is coalesced (skipped and counted
+    as an overrun) rather than stacked behind itself.
+
+    The scheduler's unit is a check key (see ``check_key``), not a website:
+    every website sharing a key is served by the same request. A group fires
+    at its most frequent member's interval, and each member is only included
+    once its own interval has elapsed. Member intervals adapt to their
+    success streak (see ``adaptive_interval``), and a failure unconfirmed by
+    the alert evaluator pulls the group's next check in to
+    CONFIRM_DELAY_SECONDS.
+
+    Websites come from a ``SiteRegistry`` that is refreshed incrementally, so
+    a sync only reads the rows that changed.
+
+    With a ``membership`` the service only checks the keys that hash to this
+    worker on the shared ring, and re-syncs whenever workers join or their
+    leases expire.
+    """
+
+    def __init__(self, app, scheduler=None, membership=None, evaluator=None, registry=None):
+        self.app = app
+        self.scheduler = scheduler if scheduler is not None else check_scheduler
+        self.evaluator = evaluator if evaluator is not None else alert_evaluator
+        self.registry = registry if registry is not None else site_registry
+        self.membership = membership
+        self.dispatcher = OutboxDispatcher(app, membership.worker_id if membership else "monitor")
+        self.retention = RetentionJob(app, membership)
+        self.in_flight = set()  # check keys currently being fetched
+        self._member_due = {}   # website_id -> monotonic time its own interval next elapses
+        self._streaks = {}      # website_id -> consecutive successful checks
+        self.stats = {"dispatched": 0, "completed": 0, "overruns": 0, "shed": 0, "errors": 0, "deduplicated": 0,
+                      "rechecks": 0}
+        self._tasks = set()
+        self._next_sync = 0.0
+        self._next_heartbeat = 0.0
+        self._resync = True
+        self._loop = None
+        self._stop = None
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+        client = get_http_client()
+        if self.membership:
+            self.registry.set_owner(self.membership.owns)
+        dispatcher_task = asyncio.create_task(self.dispatcher.run(self._stop))
+        retention_task = asyncio.create_task(self.retention.run(self._stop))
+        try:
+            while not self._stop.is_set():
+                with TICK_SECONDS.time():
+                    if self.membership and time.monotonic() >= self._next_heartbeat:
+                        await self._heartbeat()
+                    if time.monotonic() >= self._next_sync:
+                        await self._sync()
+                    self._dispatch(client)
+                await self._sleep()
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._stop.set()
+            self.dispatcher.wake()
+            await asyncio.gather(dispatcher_task, retention_task, return_exceptions=True)
+            await asyncio.to_thread(metric_buffer.flush)
+            await close_http_client()
+            if self.membership:
+                try:
+                    await asyncio.to_thread(_with_app_context, self.app, self.membership.leave)
+                except Exception as e:
+                    logger.error(f"❌ Failed to release monitor lease: {str(e)}")
+
+    def _count(self, name, amount=1):
+        self.stats[name] += amount
+        SERVICE_COUNTERS[name].inc(amount)
+
+    def stop(self):
+        """Ask the loop to exit after in-flight checks finish (safe from any thread)."""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def _heartbeat(self):
+        try:
+            changed = await asyncio.to_thread(_with_app_context, self.app, self.membership.heartbeat)
+            if changed:
+                self._next_sync = 0.0  # pick up / hand off sites right away
+                self._resync = True
+                self.registry.set_owner(self.membership.owns)
+                self.evaluator.invalidate()
+        except Exception as e:
+            logger.error(f"❌ Monitor heartbeat failed: {str(e)}")
+        self._next_heartbeat = time.monotonic() + HEARTBEAT_SECONDS
+
+    async def _sync(self):
+        try:
+            changed = await asyncio.to_thread(_with_app_context, self.app, self.registry.refresh)
+            if changed or self._resync:
+                self.scheduler.sync(self._intervals())
+                targets = self.registry.targets
+                self._member_due = {website_id: due for website_id, due in self._member_due.items()
+                                    if website_id in targets}
+                self._streaks = {website_id: streak for website_id, streak in self._streaks.items()
+                                 if website_id in targets}
+                self._resync = False
+        except Exception as e:
+            logger.error(f"❌ Failed to refresh monitored websites: {str(e)}")
+        self._next_sync = time.monotonic() + SITE_SYNC_SECONDS
+        SCHEDULED.set(len(self.scheduler))
+        SITES.set(len(self.registry))
+
+        lag = self.scheduler.lag_stats(reset=True)
+        logger.info(
+            f"⏱️ Monitor: {lag['scheduled']} check groups, {len(self.in_flight)} in flight, "
+            f"lag avg {lag['avg_lag']}s / max {lag['max_lag']}s, missed slots {lag['missed_slots']}, "
+            f"overruns {self.stats['overruns']}, shed {self.stats['shed']}, "
+            f"deduplicated {self.stats['deduplicated']}, confirmation re-checks {self.stats['rechecks']}"
+        )
+
+    def _member_interval(self, website_id, interval):
+        target = self.registry.targets.get(website_id)
+        if target is None:
+            return interval
+        return adaptive_interval(target, self._streaks.get(website_id, 0))
+
+    def _group_interval(self, members):
+        return min(self._member_interval(website_id, interval) for website_id, interval in members.items())
+
+    def _intervals(self):
+        return {key: self._group_interval(members) for key, members in self.registry.groups.items()}
+
+    def _due_members(self, key, now):
+        members = self.registry.groups.get(key, {})
+        intervals = {website_id: self._member_interval(website_id, interval) for website_id, interval in members.items()}
+        # Half a group interval of slack keeps members on the group's beat
+        slack = min(intervals.values(), default=0) / 2
+        due = [website_id for website_id, interval in intervals.items()
+               if self._member_due.get(website_id, 0.0) <= now + slack]
+        for website_id in due:
+            self._member_due[website_id] = now + intervals[website_id]
+        return due
+
+    def _adapt(self, keys, results):
+        """Update success streaks, re-arm groups whose interval changed and schedule confirmation re-checks."""
+        for result in results:
+            website_id = result["website_id"]
+            self._streaks[website_id] = self._streaks.get(website_id, 0) + 1 if result["uptime"] else 0
+
+        for key in keys:
+            members = self.registry.groups.get(key)
+            if not members:
+                continue
+            self.scheduler.schedule(key, self._group_interval(members))
+            confirming = [website_id for website_id in members if website_id in self.evaluator.confirming]
+            if confirming:
+                for website_id in confirming:
+                    self._member_due[website_id] = 0.0
+                if self.scheduler.interval_for(key) > CONFIRM_DELAY_SECONDS:
+                    self.scheduler.reschedule(key, CONFIRM_DELAY_SECONDS)
+                    self._count("rechecks")
+
+    def _dispatch(self, client):
+        now = time.monotonic()
+        keys, website_ids = [], []
+        for key in self.scheduler.pop_due():
+            if key in self.in_flight:  # single-flight: never two requests for one group
+                self._count("overruns")
+                continue
+            if len(self.in_flight) >= MAX_PENDING:
+                self._count("shed")
+                continue
+            members = self._due_members(key, now)
+            if not members:
+                continue
+            self.in_flight.add(key)
+            keys.append(key)
+            website_ids.extend(members)
+
+        if keys:
+            self._count("dispatched", len(keys))
+            self._count("deduplicated", len(website_ids) - len(keys))
+            IN_FLIGHT.set(len(self.in_flight))
+            task = asyncio.create_task(self._run_batch(keys, self.registry.get(website_ids), client))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, keys, targets, client):
+        started = time.perf_counter()
+        try:
+            results = await run_checks(self.app, targets, client, self._semaphore, self.evaluator, self.dispatcher)
+            self._count("completed", len(results))
+            self._adapt(keys, results)
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"❌ Monitoring batch of {len(targets)} sites failed: {str(e)}")
+        finally:
+            self.in_flight.difference_update(keys)
+            IN_FLIGHT.set(len(self.in_flight))
+            BATCH_SECONDS.observe(time.perf_counter() - started)
+
+    async def _sleep(self):
+        wake_at = self._next_sync
+        if self.membership:
+            wake_at = min(wake_at, self._next_heartbeat)
+        delay = max(wake_at - time.monotonic(), 0.0)
+        until_due = self.scheduler.seconds_until_next()
+        if until_due is not None:
+            delay = min(delay, until_due)
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=max(delay, 0.05))
+        except asyncio.TimeoutError:
+            pass
 
-        user = db.session.get(User, website.user_id)
-        if not user:
-            logger.error(f"User not found for alert on website {website.url}")
-            return
+_service = None
+_service_lock = threading.Lock()
 
-        # Fetch latest uptime & response time
-        latest_metric = db.session.query(Metric).filter_by(website_id=website_id).order_by(Metric.timestamp.desc()).first()
-        uptime_percent = f"{(latest_metric.uptime * 100):.1f}%" if latest_metric else "N/A"
-        response_time = f"{latest_metric.response_time:.2f} ms" if latest_metric and latest_metric.response_time > 0 else "N/A"
-
-        existing_alert = Alert.query.filter_by(
-            website_id=website_id,
-            alert_type="Website Down",
-            status="unresolved"
-        ).first()
-
-        if alert_type == "Website Down":
-            if existing_alert:
-                logger.info(f"Skipping duplicate 'Website Down' alert for {website.url} (Already unresolved)")
-                return  # ✅ Prevent duplicate emails
-
-            # Create new alert if no unresolved alert exists
-            new_alert = Alert(
-                website_id=website_id,
-                alert_type=alert_type,
-                status="unresolved",
-                timestamp=datetime.utcnow(),
-            )
-            db.session.add(new_alert)
-            db.session.commit()
-            logger.info(f"New alert created for {website.url} - Type: {alert_type}")
-
-            # ✅ Send Email Alert with Uptime & Response Time
-            subject = f"⚠️ Alert: {website.url} is DOWN!"
-            content = f"""
-            🚨 **Website Down Alert** 🚨
-
-            Your monitored website **{website.url}** is currently down.
-
-            **Latest Status:**
-            - Uptime: {uptime_percent}
-            - Response Time: {response_time}
-
-            Please verify immediately.
-
-            Regards,
-            **Watchly Monitoring**
-            """
-            await send_email_async(user.email, subject, content)
-
-        elif alert_type == "Website Up":
-            if existing_alert:
-                existing_alert.status = "resolved"  # ✅ Mark as resolved
-                db.session.commit()
-                logger.info(f"✅ Resolved: {website.url} is back online.")
-
-                # ✅ Send recovery notification
-                subject = f"✅ Resolved: {website.url} is back UP!"
-                content = f"""
-                ✅ **Website Back Online** ✅
-
-                Good news! **{website.url}** is back up.
-
-                **Latest Status:**
-                - Uptime: {uptime_percent}
-                - Response Time: {response_time}
-
-                Regards,
-                **Watchly Monitoring**
-                """
-                await send_email_async(user.email, subject, content)
-
-def run_monitoring_task(app):
-    """Runs the async check_all_websites() function in a synchronous context."""
-    asyncio.run(check_all_websites(app))
-
-def start_monitoring(app):
-    """Starts the APScheduler job for monitoring websites at intervals."""
-    if not scheduler.running:  # ✅ Prevent multiple schedulers
+
+def start_monitoring(app, sharded=True):
+    """
+    Runs the monitoring service on its own event loop (blocks the calling thread).
+
+    Every Gunicorn worker (on every host) runs one; with ``sharded`` the
+    websites are partitioned between them through DB-backed leases.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None:  # ✅ Prevent multiple monitors
+            print("🚀 Monitor is already running. Skipping duplicate start.")
+            return
         print("✅ Starting monitoring service...")
-        scheduler.add_job(run_monitoring_task, "interval", seconds=30, args=[app])
-        scheduler.start()
-    else:
-        print("🚀 Scheduler is already running. Skipping duplicate start.")
+        membership = WorkerMembership() if sharded else None
+        if membership:
+            # Daemon threads die without unwinding; release the lease on interpreter exit
+            atexit.register(_release_lease, app, membership)
+        _service = MonitorService(app, membership=membership)
+    asyncio.run(_service.run())
+
+
+def _release_lease(app, membership):
+    try:
+        _with_app_context(app, membership.leave)
+    except Exception as e:
+        logger.error(f"❌ Failed to release monitor lease: {str(e)}")
+
+
+def stop_monitoring():
+    if _service is not None:
+        _service.stop()
 
 if __name__ == "__main__":
     from app import create_app
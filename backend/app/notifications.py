@@ -0,0 +1,170 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import httpx
+
+from app import db, instrumentation
+from app.models import NotificationOutbox
+from app.utils import email_utils
+from app.utils.logger import logger
+
+POLL_SECONDS = float(os.getenv("NOTIFY_POLL_SECONDS", 5))
+BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", 50))
+CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", 5))
+MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", 6))
+TIMEOUT_SECONDS = float(os.getenv("NOTIFY_TIMEOUT_SECONDS", 10))
+# A row stuck in "sending" this long belongs to a worker that died mid-delivery
+CLAIM_TIMEOUT_SECONDS = int(os.getenv("NOTIFY_CLAIM_TIMEOUT_SECONDS", 300))
+
+DELIVERIES = instrumentation.counter("watchly_notification_deliveries_total",
+                                     "Outbox delivery attempts by outcome", ["outcome"])
+DELIVERY_SECONDS = instrumentation.histogram("watchly_notification_delivery_seconds", "Time to deliver one email")
+# Set by the dispatcher as it claims and records rows, so only monitor processes report it
+QUEUE_DEPTH = instrumentation.gauge("watchly_notification_queue_depth", "Outbox rows waiting to be delivered")
+
+
+def _update_queue_depth():
+    QUEUE_DEPTH.set(db.session.execute(
+        db.select(db.func.count()).select_from(NotificationOutbox)
+        .where(NotificationOutbox.status.in_(("pending", "sending")))
+    ).scalar())
+
+
+def _with_app_context(app, fn, *args):
+    with app.app_context():
+        return fn(*args)
+
+
+class OutboxDispatcher:
+    """
+    Delivers queued alert emails from the ``notification_outbox`` table.
+
+    Runs as a task on the monitor's event loop, independent of the checks,
+    so a slow email endpoint never stalls monitoring. Rows are claimed with
+    a conditional UPDATE so several workers can dispatch side by side, sent
+    through one pooled client with bounded concurrency, and retried with
+    exponential backoff until NOTIFY_MAX_ATTEMPTS, after which they are
+    marked failed.
+    """
+
+    def __init__(self, app, worker_id="dispatcher", send=None):
+        self.app = app
+        self.worker_id = worker_id
+        self._send = send or email_utils.send_email_via_cloudflare
+        self._wake = None
+
+    def wake(self):
+        """Deliver newly queued rows now instead of at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self, stop):
+        self._wake = asyncio.Event()
+        async with httpx.AsyncClient(timeout=TIMEOUT_SECONDS,
+                                     limits=httpx.Limits(max_connections=CONCURRENCY)) as client:
+            while not stop.is_set():
+                try:
+                    delivered = await self.dispatch_once(client)
+                except Exception as e:
+                    logger.error(f"❌ Outbox dispatch failed: {str(e)}")
+                    delivered = 0
+                if delivered >= BATCH_SIZE:
+                    continue  # more may be waiting
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_once(self, client):
+        """Claim one batch of due rows, deliver them, and record the outcome. Returns the batch size."""
+        rows = await asyncio.to_thread(_with_app_context, self.app, self._claim)
+        if not rows:
+            return 0
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def deliver(row):
+            async with semaphore:
+                try:
+                    with DELIVERY_SECONDS.time():
+                        sent = await self._send(row["to_email"], row["subject"], row["message"], client=client)
+                except Exception as e:
+                    logger.error(f"❌ Outbox delivery {row['id']} raised: {str(e)}")
+                    return row["id"], str(e) or type(e).__name__
+                return row["id"], None if sent else "Sender reported failure"
+
+        outcomes = await asyncio.gather(*(deliver(row) for row in rows))
+        attempts = {row["id"]: row["attempts"] for row in rows}
+        await asyncio.to_thread(_with_app_context, self.app, self._record, outcomes, attempts)
+        return len(rows)
+
+    def _claim(self):
+        now = datetime.utcnow()
+        claimable = db.or_(
+            NotificationOutbox.status == "pending",
+            db.and_(
+                NotificationOutbox.status == "sending",
+                NotificationOutbox.claimed_at < now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS),
+            ),
+        )
+        candidate_ids = db.session.execute(
+            db.select(NotificationOutbox.id)
+            .where(claimable, NotificationOutbox.next_attempt_at <= now)
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        _update_queue_depth()
+        if not candidate_ids:
+            return []
+
+        # Only rows still claimable at UPDATE time become ours
+        db.session.execute(
+            db.update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(candidate_ids), claimable)
+            .values(status="sending", claimed_by=self.worker_id, claimed_at=now)
+        )
+        db.session.commit()
+
+        claimed = db.session.execute(
+            db.select(NotificationOutbox.id, NotificationOutbox.to_email, NotificationOutbox.subject,
+                      NotificationOutbox.message, NotificationOutbox.attempts)
+            .where(NotificationOutbox.id.in_(candidate_ids),
+                   NotificationOutbox.status == "sending",
+                   NotificationOutbox.claimed_by == self.worker_id)
+        ).all()
+        return [row._asdict() for row in claimed]
+
+    def _record(self, outcomes, attempts):
+        """Store delivery ``outcomes`` ((id, error or None) pairs): sent, retried later or failed for good."""
+        now = datetime.utcnow()
+        sent_ids = [outbox_id for outbox_id, error in outcomes if error is None]
+        DELIVERIES.inc(len(sent_ids), outcome="sent")
+        if sent_ids:
+            db.session.execute(
+                db.update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(sent_ids))
+                .values(status="sent", sent_at=now, attempts=NotificationOutbox.attempts + 1, last_error=None)
+            )
+
+        for outbox_id, error in outcomes:
+            if error is None:
+                continue
+            attempt = attempts[outbox_id] + 1
+            DELIVERIES.inc(outcome="error")
+            if attempt >= MAX_ATTEMPTS:
+                values = {"status": "failed"}
+                logger.error(f"❌ Notification {outbox_id} permanently failed after {attempt} attempts: {error}")
+            else:
+                values = {"status": "pending",
+                          "next_attempt_at": now + timedelta(seconds=email_utils.backoff_seconds(attempt))}
+            db.session.execute(
+                db.update(NotificationOutbox)
+                .where(NotificationOutbox.id == outbox_id)
+                .values(attempts=attempt, last_error=error[:1000], **values)
+            )
+        db.session.commit()
+        _update_queue_depth()
+        if sent_ids:
+            logger.info(f"📨 Delivered {len(sent_ids)} queued notifications")
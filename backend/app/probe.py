@@ -0,0 +1,255 @@
+import asyncio
+import contextvars
+import ipaddress
+import socket
+import ssl
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import httpcore
+import httpx
+
+# Per-request phase accumulator, visible to the network backend below. Each
+# check runs in its own task, so connections opened for it see its dict.
+_phases = contextvars.ContextVar("watchly_probe_phases", default=None)
+
+FAILURE_TIMEOUT = "timeout"
+FAILURE_DNS = "dns"
+FAILURE_CONNECT_REFUSED = "connect_refused"
+FAILURE_CONNECT = "connect_error"
+FAILURE_TLS = "tls"
+FAILURE_HTTP = "http_error"
+FAILURE_OTHER = "request_error"
+
+# Check modes. "get" downloads the whole body; "head" sends HEAD (falling back
+# to a headers-only GET when the server rejects it); "stream" reads at most
+# max_body_bytes of the body (0 = stop after the headers) and drops the rest.
+MODE_GET = "get"
+MODE_HEAD = "head"
+MODE_STREAM = "stream"
+CHECK_MODES = (MODE_GET, MODE_HEAD, MODE_STREAM)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """
+    Canonical form of a check URL: scheme and host lowercased, default port,
+    fragment and trailing "?" dropped, empty path as "/". Two URLs with the
+    same normal form get the same response from the target.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class _TimedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Wraps httpcore's network backend to resolve hostnames itself, so DNS time
+    is reported separately from the TCP connect. The TLS SNI hostname is
+    passed by httpcore independently, so connecting to the resolved address
+    does not change certificate checks.
+    """
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        phases = _phases.get()
+        if phases is None or _is_ip(host):
+            return await self._inner.connect_tcp(host, port, timeout=timeout, local_address=local_address,
+                                                 socket_options=socket_options)
+
+        started = time.perf_counter()
+        try:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout
+            )
+        except asyncio.TimeoutError:
+            phases["failure"] = FAILURE_DNS
+            raise httpcore.ConnectTimeout(f"DNS lookup for {host} timed out")
+        except OSError as e:
+            phases["failure"] = FAILURE_DNS
+            raise httpcore.ConnectError(str(e)) from e
+        finally:
+            phases["dns_ms"] += (time.perf_counter() - started) * 1000
+
+        if timeout is not None:
+            timeout = max(timeout - (time.perf_counter() - started), 0.001)
+
+        last_error = None
+        for address in dict.fromkeys(info[4][0] for info in infos):
+            try:
+                return await self._inner.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                                     socket_options=socket_options)
+            except httpcore.ConnectError as e:
+                last_error = e
+        raise last_error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._inner.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self._inner.sleep(seconds)
+
+
+def timed_transport(**kwargs):
+    """AsyncHTTPTransport whose connections report DNS time separately."""
+    transport = httpx.AsyncHTTPTransport(**kwargs)
+    pool = getattr(transport, "_pool", None)
+    backend = getattr(pool, "_network_backend", None)
+    if backend is not None:
+        # httpx does not expose network_backend; without it DNS stays folded into connect_ms
+        pool._network_backend = _TimedNetworkBackend(backend)
+    return transport
+
+
+def _new_phases():
+    return {"dns_ms": 0.0, "connect_ms": 0.0, "tls_ms": 0.0, "ttfb_ms": 0.0, "transfer_ms": 0.0,
+            "failure": None, "_marks": {}, "_tls_open": False}
+
+
+def _tracer(phases):
+    """httpcore trace hook that turns connection/request events into phase durations."""
+    marks = phases["_marks"]
+
+    async def trace(event_name, info):
+        now = time.perf_counter()
+        if event_name.endswith(".started"):
+            marks[event_name[:-len(".started")]] = now
+            if event_name.endswith(".send_request_headers.started"):
+                # Kept apart from the step's own mark, which its .complete event pops
+                marks[event_name.split(".")[0] + ".request_sent"] = now
+            if event_name == "connection.start_tls.started":
+                phases["_tls_open"] = True
+            return
+        if not (event_name.endswith(".complete") or event_name.endswith(".failed")):
+            return
+
+        step = event_name.rsplit(".", 1)[0]
+        started = marks.pop(step, None)
+        if started is None:
+            return
+        elapsed = (now - started) * 1000
+        if step == "connection.connect_tcp":
+            phases["connect_ms"] += elapsed
+        elif step == "connection.start_tls":
+            phases["tls_ms"] += elapsed
+            phases["_tls_open"] = not event_name.endswith(".complete")
+        elif step.endswith("receive_response_headers"):
+            # TTFB: from starting to send the request to the response headers arriving
+            sent = marks.pop(step.split(".")[0] + ".request_sent", started)
+            phases["ttfb_ms"] += (now - sent) * 1000
+        elif step.endswith("receive_response_body"):
+            phases["transfer_ms"] += elapsed
+
+    return trace
+
+
+def _classify(error, phases):
+    if phases["failure"]:
+        return phases["failure"]
+    if isinstance(error, httpx.TimeoutException):
+        return FAILURE_TIMEOUT
+    cause = error
+    while cause is not None:
+        if isinstance(cause, ConnectionRefusedError):
+            return FAILURE_CONNECT_REFUSED
+        if isinstance(cause, ssl.SSLError):
+            return FAILURE_TLS
+        if isinstance(cause, socket.gaierror):
+            return FAILURE_DNS
+        cause = cause.__cause__ or cause.__context__
+    if phases["_tls_open"]:
+        return FAILURE_TLS
+    message = str(error).lower()
+    if "refused" in message:
+        return FAILURE_CONNECT_REFUSED
+    if isinstance(error, httpx.ConnectError):
+        return FAILURE_CONNECT
+    return FAILURE_OTHER
+
+
+def _close_body_phase(phases):
+    """Count a body read that was abandoned before httpcore reported it complete."""
+    now = time.perf_counter()
+    for step in [step for step in phases["_marks"] if step.endswith("receive_response_body")]:
+        phases["transfer_ms"] += (now - phases["_marks"].pop(step)) * 1000
+
+
+async def _stream(client, url, timeout, phases, max_body_bytes):
+    request = client.build_request("GET", url, timeout=timeout, extensions={"trace": _tracer(phases)})
+    response = await client.send(request, stream=True, follow_redirects=True)
+    try:
+        if max_body_bytes > 0:
+            async for _ in response.aiter_raw():
+                if response.num_bytes_downloaded >= max_body_bytes:
+                    break
+        _close_body_phase(phases)
+    finally:
+        # An unfinished body cannot be reused, so httpcore drops that connection
+        await response.aclose()
+    return response
+
+
+async def probe(client, url, timeout, mode=MODE_GET, max_body_bytes=0):
+    """
+    Fetch ``url`` and return the check outcome with per-phase timings.
+
+    All durations are milliseconds on the monotonic clock. ``connect_ms``
+    excludes DNS; phases of redirect hops are summed.
+    """
+    phases = _new_phases()
+    token = _phases.set(phases)
+    started = time.perf_counter()
+    outcome = {"status_code": None, "response_bytes": None, "failure_class": None}
+    try:
+        if mode == MODE_HEAD:
+            response = await client.head(url, timeout=timeout, follow_redirects=True,
+                                         extensions={"trace": _tracer(phases)})
+            if response.status_code in (405, 501):
+                response = await _stream(client, url, timeout, phases, 0)
+        elif mode == MODE_STREAM:
+            response = await _stream(client, url, timeout, phases, max_body_bytes)
+        else:
+            response = await client.get(url, timeout=timeout, follow_redirects=True,
+                                        extensions={"trace": _tracer(phases)})
+        outcome["status_code"] = response.status_code
+        outcome["response_bytes"] = response.num_bytes_downloaded
+        # Allows 2xx-3xx as Up for redirects
+        outcome["uptime"] = 1 if 200 <= response.status_code < 400 else 0
+        if not outcome["uptime"]:
+            outcome["failure_class"] = FAILURE_HTTP
+        outcome["response_time"] = (time.perf_counter() - started) * 1000
+    except httpx.RequestError as e:
+        outcome["uptime"] = 0
+        outcome["response_time"] = 0
+        outcome["failure_class"] = _classify(e, phases)
+        outcome["error"] = str(e)
+    finally:
+        _phases.reset(token)
+
+    for name in ("dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "transfer_ms"):
+        outcome[name] = round(phases[name], 3)
+    # The connect_tcp trace span wraps our own DNS lookup
+    outcome["connect_ms"] = round(max(phases["connect_ms"] - phases["dns_ms"], 0.0), 3)
+    return outcome
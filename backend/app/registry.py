@@ -0,0 +1,130 @@
+import os
+import time
+from datetime import timedelta
+
+from app import db
+from app.models import Website
+from app.utils.logger import logger
+
+# Rows committed slightly out of order can carry an updated_at just below the
+# watermark; re-reading this window every refresh makes sure they are seen.
+WATERMARK_OVERLAP_SECONDS = int(os.getenv("MONITOR_REGISTRY_OVERLAP_SECONDS", 60))
+# Deleted websites leave no updated_at behind, so ids are reconciled this often.
+RECONCILE_SECONDS = int(os.getenv("MONITOR_REGISTRY_RECONCILE_SECONDS", 300))
+
+_COLUMNS = (Website.id, Website.url, Website.frequency, Website.max_frequency, Website.check_mode,
+            Website.max_body_bytes, Website.cold_connection, Website.updated_at)
+
+
+class CheckTarget:
+    """What the monitor needs to check one website; attribute names match ``Website``."""
+
+    __slots__ = ("id", "url", "frequency", "max_frequency", "check_mode", "max_body_bytes", "cold_connection",
+                 "interval", "key")
+
+    def __init__(self, row, interval, key):
+        self.id = row.id
+        self.url = row.url
+        self.frequency = row.frequency
+        self.max_frequency = row.max_frequency
+        self.check_mode = row.check_mode
+        self.max_body_bytes = row.max_body_bytes
+        self.cold_connection = row.cold_connection
+        self.interval = interval
+        self.key = key
+
+    def settings(self):
+        return (self.url, self.interval, self.max_frequency, self.check_mode, self.max_body_bytes,
+                self.cold_connection, self.key)
+
+
+class SiteRegistry:
+    """
+    In-memory registry of check targets for the monitor.
+
+    Loaded once with a narrow column select, then refreshed from the rows
+    whose ``Website.updated_at`` is past the last watermark, so a tick never
+    re-reads the whole table. ``groups`` holds the check keys this worker
+    owns, mapped to {website_id: interval}, and is maintained incrementally.
+    """
+
+    def __init__(self, interval_for, key_for, clock=time.monotonic):
+        self.targets = {}  # website_id -> CheckTarget
+        self.groups = {}   # check key -> {website_id: interval}, owned keys only
+        self._interval_for = interval_for
+        self._key_for = key_for
+        self._clock = clock
+        self._owns = None
+        self._watermark = None
+        self._next_reconcile = 0.0
+
+    def __len__(self):
+        return len(self.targets)
+
+    def get(self, website_ids):
+        return [self.targets[website_id] for website_id in website_ids if website_id in self.targets]
+
+    def set_owner(self, owns):
+        """Re-filter ``groups`` for a new shard assignment without touching the database."""
+        self._owns = owns
+        self.groups = {}
+        for target in self.targets.values():
+            self._link(target)
+
+    def reset(self):
+        """Drop everything; the next refresh does a full load."""
+        self.targets = {}
+        self.groups = {}
+        self._watermark = None
+        self._next_reconcile = 0.0
+
+    def intervals(self):
+        # A group is fetched as often as its most frequent subscriber needs
+        return {key: min(members.values()) for key, members in self.groups.items()}
+
+    def refresh(self):
+        """Apply website changes since the last refresh. Returns True if any target changed."""
+        query = db.select(*_COLUMNS)
+        if self._watermark is not None:
+            query = query.where(Website.updated_at >= self._watermark - timedelta(seconds=WATERMARK_OVERLAP_SECONDS))
+        rows = db.session.execute(query).all()
+
+        changed = False
+        for row in rows:
+            changed |= self._upsert(row)
+            if row.updated_at is not None and (self._watermark is None or row.updated_at > self._watermark):
+                self._watermark = row.updated_at
+
+        if self._clock() >= self._next_reconcile:
+            live = set(db.session.execute(db.select(Website.id)).scalars())
+            for website_id in [website_id for website_id in self.targets if website_id not in live]:
+                self._unlink(self.targets.pop(website_id))
+                changed = True
+            self._next_reconcile = self._clock() + RECONCILE_SECONDS
+
+        if changed:
+            logger.info(f"🗂️ Site registry: {len(self.targets)} websites in {len(self.groups)} owned check groups")
+        return changed
+
+    def _upsert(self, row):
+        target = CheckTarget(row, self._interval_for(row.frequency), None)
+        target.key = self._key_for(target)
+        old = self.targets.get(row.id)
+        if old is not None:
+            if old.settings() == target.settings():
+                return False
+            self._unlink(old)
+        self.targets[row.id] = target
+        self._link(target)
+        return True
+
+    def _link(self, target):
+        if self._owns is None or self._owns(target.key):
+            self.groups.setdefault(target.key, {})[target.id] = target.interval
+
+    def _unlink(self, target):
+        members = self.groups.get(target.key)
+        if members is not None:
+            members.pop(target.id, None)
+            if not members:
+                del self.groups[target.key]
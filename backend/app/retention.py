@@ -0,0 +1,276 @@
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+
+from app import archive, db, instrumentation, rollups
+from app.models import DeletedWebsite, Metric, MetricRollup, RouteLatency
+from app.utils.logger import logger
+
+# Raw metrics older than this are removed (whole partitions on Postgres); 0, the default, keeps them forever.
+# Aggregates outlive them in the rollup tables, whose finer resolutions expire on their own schedule.
+RETENTION_DAYS = int(os.getenv("METRIC_RETENTION_DAYS", 0))
+PARTITION_DAYS = int(os.getenv("METRIC_PARTITION_DAYS", 1))          # width of one Postgres partition
+PREMAKE_PARTITIONS = int(os.getenv("METRIC_PREMAKE_PARTITIONS", 3))  # future partitions kept ready
+INTERVAL_SECONDS = int(os.getenv("METRIC_RETENTION_INTERVAL_SECONDS", 3600))
+BATCH_ROWS = int(os.getenv("METRIC_RETENTION_BATCH_ROWS", 5000))     # rows per delete on the fallback path
+ROUTE_LATENCY_RETENTION_DAYS = int(os.getenv("ROUTE_LATENCY_RETENTION_DAYS", 7))  # hourly API route sketches
+
+LEADER_KEY = "metric-retention"  # the worker owning this key on the shard ring runs the job
+
+RUN_SECONDS = instrumentation.histogram("watchly_retention_run_seconds", "Time for one retention pass",
+                                        buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300))
+PARTITIONS_DROPPED = instrumentation.counter("watchly_metric_partitions_dropped_total",
+                                             "Expired metric partitions dropped")
+ROWS_ARCHIVED = instrumentation.counter("watchly_metric_rows_archived_total",
+                                        "Expired metrics copied to the cold archive")
+ROWS_DELETED = instrumentation.counter("watchly_retention_rows_deleted_total",
+                                       "Rows deleted by retention", ["kind"])
+
+_BOUNDS = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _with_app_context(app, fn, *args):
+    with app.app_context():
+        return fn(*args)
+
+
+def is_partitioned():
+    """True when ``metric`` is a native Postgres partitioned table."""
+    if db.engine.dialect.name != "postgresql":
+        return False
+    return db.session.execute(db.text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'metric' AND pg_table_is_visible(c.oid)"
+    )).first() is not None
+
+
+def _parse_bound(value):
+    value = value.strip().strip("'")
+    return None if value in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(value)
+
+
+def partitions():
+    """(name, lower, upper) of every range partition of ``metric``; MINVALUE/MAXVALUE bounds are None."""
+    rows = db.session.execute(db.text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'metric' AND pg_table_is_visible(p.oid)"
+    )).all()
+    found = []
+    for name, bound in rows:
+        match = _BOUNDS.search(bound or "")
+        if match:  # the DEFAULT partition has no range
+            found.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(found, key=lambda partition: partition[2] or datetime.max)
+
+
+def ensure_partitions(now, count=None):
+    """Create the partition holding ``now`` and the next ``count`` ones. Returns how many were created."""
+    count = count if count is not None else PREMAKE_PARTITIONS
+    width = timedelta(days=PARTITION_DAYS)
+    start = rollups.floor_time(now, PARTITION_DAYS * rollups.DAY)
+    existing = partitions()
+
+    created = 0
+    for index in range(count + 1):
+        lower = start + index * width
+        upper = lower + width
+        if any((low is None or low < upper) and (high is None or lower < high) for _, low, high in existing):
+            continue
+        try:
+            db.session.execute(db.text(
+                f'CREATE TABLE IF NOT EXISTS "metric_p{lower:%Y%m%d}" PARTITION OF metric '
+                f"FOR VALUES FROM ('{lower:%Y-%m-%d %H:%M:%S}') TO ('{upper:%Y-%m-%d %H:%M:%S}')"
+            ))
+            db.session.commit()
+            created += 1
+        except Exception as e:
+            # Usually rows for this range already sit in metric_default; they stay queryable there
+            db.session.rollback()
+            logger.error(f"❌ Could not create metric partition for {lower:%Y-%m-%d}: {str(e)}")
+    return created
+
+
+def expired_partitions(cutoff):
+    """Names of the partitions whose whole range is older than ``cutoff``."""
+    return [name for name, _, upper in partitions() if upper is not None and upper <= cutoff]
+
+
+def drop_expired_partitions(cutoff, archive_rows=False):
+    """
+    Drop every partition whose whole range is older than ``cutoff``, copying
+    each into the cold archive first when ``archive_rows`` is set. Rows left
+    in the table (the partition holding the cutoff) are never archived, so
+    the archive and the table do not overlap. Returns (partitions dropped,
+    rows archived).
+    """
+    dropped = archived = 0
+    for name in expired_partitions(cutoff):
+        if archive_rows:
+            # Copy first, so a failed copy drops nothing
+            rows = archive.archive_expired(cutoff, partition=name)
+            ROWS_ARCHIVED.inc(rows)
+            archived += rows
+        db.session.execute(db.text(f'DROP TABLE IF EXISTS "{name}"'))
+        db.session.commit()
+        dropped += 1
+        logger.info(f"🗑️ Dropped metric partition {name}")
+    PARTITIONS_DROPPED.inc(dropped)
+    return dropped, archived
+
+
+def delete_expired_rows(cutoff, batch_rows=None):
+    """
+    Fallback for SQLite and unpartitioned tables: delete rows older than
+    ``cutoff`` one primary-key window at a time, committing in between so
+    writers are never blocked for long. Ids grow with time, so the walk
+    stops at the first window holding nothing older than the cutoff.
+    """
+    batch_rows = batch_rows or BATCH_ROWS
+    low, high = db.session.execute(db.select(db.func.min(Metric.id), db.func.max(Metric.id))).one()
+    deleted = 0
+    while low is not None and low <= high:
+        window = db.and_(Metric.id >= low, Metric.id < low + batch_rows)
+        oldest = db.session.execute(db.select(db.func.min(Metric.timestamp)).where(window)).scalar()
+        if oldest is not None and oldest >= cutoff:
+            break
+        deleted += db.session.execute(db.delete(Metric).where(window, Metric.timestamp < cutoff)).rowcount
+        db.session.commit()
+        low += batch_rows
+    ROWS_DELETED.inc(deleted, kind="expired")
+    return deleted
+
+
+def forget_websites(website_ids):
+    """Queue the raw metrics of deleted ``website_ids`` for the next purge (caller commits)."""
+    if website_ids:
+        db.session.execute(db.insert(DeletedWebsite), [{"website_id": website_id} for website_id in website_ids])
+
+
+def purge_orphans(batch_rows=None):
+    """
+    Delete, in batches, the metrics of websites queued by ``forget_websites``.
+    Each website costs index range deletes on (website_id, timestamp), not a
+    scan of the metric table. Returns the number of rows deleted.
+    """
+    batch_rows = batch_rows or BATCH_ROWS
+    orphans = db.session.execute(db.select(DeletedWebsite.website_id)).scalars().all()
+    deleted = 0
+    for website_id in orphans:
+        while True:
+            batch = db.select(Metric.id).where(Metric.website_id == website_id).limit(batch_rows)
+            removed = db.session.execute(db.delete(Metric).where(Metric.id.in_(batch))).rowcount
+            db.session.commit()
+            deleted += removed
+            if removed < batch_rows:
+                break
+        db.session.execute(db.delete(DeletedWebsite).where(DeletedWebsite.website_id == website_id))
+        db.session.commit()
+    ROWS_DELETED.inc(deleted, kind="orphaned")
+    return deleted
+
+
+def prune_rollups(now):
+    """Downsample: drop minute / hour rollups past their retention (the coarser rows remain)."""
+    pruned = 0
+    for resolution, days in rollups.RETENTION_DAYS.items():
+        if not days:
+            continue
+        cutoff = rollups.floor_time(now - timedelta(days=days), resolution)
+        pruned += db.session.execute(db.delete(MetricRollup).where(
+            MetricRollup.resolution == resolution, MetricRollup.bucket_start < cutoff
+        )).rowcount
+        db.session.commit()
+    ROWS_DELETED.inc(pruned, kind="rollup")
+    return pruned
+
+
+def prune_route_latency(now):
+    """Drop hourly route_latency rows older than ROUTE_LATENCY_RETENTION_DAYS."""
+    if not ROUTE_LATENCY_RETENTION_DAYS:
+        return 0
+    cutoff = now - timedelta(days=ROUTE_LATENCY_RETENTION_DAYS)
+    pruned = db.session.execute(db.delete(RouteLatency).where(RouteLatency.bucket_start < cutoff)).rowcount
+    db.session.commit()
+    ROWS_DELETED.inc(pruned, kind="route_latency")
+    return pruned
+
+
+def run_retention(now=None, retention_days=None):
+    """One retention pass. Returns a summary of what changed."""
+    now = now or datetime.utcnow()
+    retention_days = retention_days if retention_days is not None else RETENTION_DAYS
+    summary = {"partitions_created": 0, "partitions_dropped": 0, "rows_archived": 0, "rows_deleted": 0,
+               "orphans_deleted": 0, "archives_removed": 0, "rollups_pruned": 0, "route_buckets_pruned": 0}
+    with RUN_SECONDS.time():
+        partitioned = is_partitioned()
+        if partitioned:
+            summary["partitions_created"] = ensure_partitions(now)
+        if retention_days:
+            cutoff = now - timedelta(days=retention_days)
+            # Moved rather than discarded when the archive is enabled
+            if partitioned:
+                summary["partitions_dropped"], summary["rows_archived"] = drop_expired_partitions(
+                    cutoff, archive_rows=bool(archive.ARCHIVE_DIR))
+            else:
+                if archive.ARCHIVE_DIR:
+                    # Copy first, so a failed copy deletes nothing
+                    summary["rows_archived"] = archive.archive_expired(cutoff)
+                    ROWS_ARCHIVED.inc(summary["rows_archived"])
+                summary["rows_deleted"] = delete_expired_rows(cutoff)
+        summary["orphans_deleted"] = purge_orphans()
+        summary["archives_removed"] = archive.purge_orphans()
+        summary["rollups_pruned"] = prune_rollups(now)
+        summary["route_buckets_pruned"] = prune_route_latency(now)
+    return summary
+
+
+class RetentionJob:
+    """
+    Runs ``run_retention`` every METRIC_RETENTION_INTERVAL_SECONDS on the
+    monitor's event loop, in a worker thread. With a shard ``membership``
+    only the worker that owns LEADER_KEY on the ring does the work.
+    """
+
+    def __init__(self, app, membership=None, interval=None):
+        self.app = app
+        self.membership = membership
+        self.interval = interval if interval is not None else INTERVAL_SECONDS
+
+    def leads(self):
+        return self.membership is None or self.membership.owns(LEADER_KEY)
+
+    async def run(self, stop):
+        # Give the first heartbeat time to build the ring before deciding who leads
+        delay = min(self.interval, 60)
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            delay = self.interval
+            if not self.leads():
+                continue
+            try:
+                summary = await asyncio.to_thread(_with_app_context, self.app, run_retention)
+                if any(summary.values()):
+                    logger.info(f"🧹 Metric retention: {summary}")
+            except Exception as e:
+                logger.error(f"❌ Metric retention failed: {str(e)}")
+
+
+retention_cli = AppGroup("retention", help="Metric partitions, retention and downsampling.")
+
+
+@retention_cli.command("run")
+@click.option("--days", type=int, help="raw retention in days (default METRIC_RETENTION_DAYS, 0 keeps all)")
+def run_command(days):
+    """Run one retention pass now."""
+    summary = run_retention(retention_days=days)
+    for name, value in summary.items():
+        click.echo(f"{name}: {value}")
@@ -0,0 +1,282 @@
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Metric, MetricRollup
+from app.sketch import LatencySketch, merge_stored
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+# Upper bounds (ms) of the latency histogram; the last column counts >= 1000ms
+LATENCY_BOUNDS = (50, 200, 500, 1000)
+BUCKET_COLUMNS = ("bucket_50", "bucket_200", "bucket_500", "bucket_1000", "bucket_inf")
+SUM_COLUMNS = ("count", "up_count", "latency_count", "latency_sum") + BUCKET_COLUMNS
+
+# Finer rollups are downsampled away (see app.retention) once coarser ones cover them; 0 keeps forever
+RETENTION_DAYS = {
+    MINUTE: int(os.getenv("METRIC_ROLLUP_MINUTE_RETENTION_DAYS", 7)),
+    HOUR: int(os.getenv("METRIC_ROLLUP_HOUR_RETENTION_DAYS", 90)),
+    DAY: 0,
+}
+
+BACKFILL_BATCH_ROWS = 10000
+
+_EPOCH = datetime(1970, 1, 1)
+_KEY = ("website_id", "resolution", "bucket_start")
+
+
+def floor_time(timestamp, resolution):
+    seconds = int((timestamp - _EPOCH).total_seconds()) // resolution * resolution
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def ceil_time(timestamp, resolution):
+    start = floor_time(timestamp, resolution)
+    return start if start == timestamp else start + timedelta(seconds=resolution)
+
+
+def _empty(website_id, resolution, bucket_start):
+    row = {"website_id": website_id, "resolution": resolution, "bucket_start": bucket_start,
+           "latency_min": None, "latency_max": None, "latency_sketch": None}
+    row.update((column, 0) for column in SUM_COLUMNS)
+    return row
+
+
+def aggregate(metrics):
+    """
+    Fold metric rows (dicts with website_id, response_time, uptime and
+    timestamp) into rollup rows for every resolution, keyed by
+    (website_id, resolution, bucket_start).
+    """
+    rollups = {}
+    now = datetime.utcnow()
+    for metric in metrics:
+        timestamp = metric.get("timestamp") or now
+        response_time = metric.get("response_time") or 0.0
+        for resolution in RESOLUTIONS:
+            key = (metric["website_id"], resolution, floor_time(timestamp, resolution))
+            row = rollups.get(key)
+            if row is None:
+                row = rollups[key] = _empty(*key)
+            row["count"] += 1
+            row["up_count"] += metric.get("uptime") or 0.0
+            if response_time > 0:
+                row["latency_count"] += 1
+                row["latency_sum"] += response_time
+                row["latency_min"] = response_time if row["latency_min"] is None else min(row["latency_min"], response_time)
+                row["latency_max"] = response_time if row["latency_max"] is None else max(row["latency_max"], response_time)
+                row[BUCKET_COLUMNS[bisect_right(LATENCY_BOUNDS, response_time)]] += 1
+                if row["latency_sketch"] is None:
+                    row["latency_sketch"] = LatencySketch()
+                row["latency_sketch"].add(response_time)
+    return rollups
+
+
+def _upsert_statement(dialect):
+    table = MetricRollup.__table__
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    least = db.func.least if dialect == "postgresql" else db.func.min  # two-argument min() is scalar in SQLite
+    greatest = db.func.greatest if dialect == "postgresql" else db.func.max
+
+    statement = insert(table)
+    excluded = statement.excluded
+    updates = {column: table.c[column] + excluded[column] for column in SUM_COLUMNS}
+    # Either side may be NULL when a bucket has only zero-latency (failed) checks
+    updates["latency_min"] = least(db.func.coalesce(table.c.latency_min, excluded.latency_min),
+                                   db.func.coalesce(excluded.latency_min, table.c.latency_min))
+    updates["latency_max"] = greatest(db.func.coalesce(table.c.latency_max, excluded.latency_max),
+                                      db.func.coalesce(excluded.latency_max, table.c.latency_max))
+    return statement.on_conflict_do_update(index_elements=list(_KEY), set_=updates)
+
+
+def _merge_rows(rows):
+    """Read-modify-write fallback for dialects without INSERT ... ON CONFLICT."""
+    for row in rows:
+        sketch = row["latency_sketch"]
+        row = {**row, "latency_sketch": sketch.to_bytes() if sketch else None}
+        existing = db.session.get(MetricRollup, tuple(row[column] for column in _KEY))
+        if existing is None:
+            db.session.add(MetricRollup(**row))
+            continue
+        if sketch:
+            existing.latency_sketch = LatencySketch.from_bytes(existing.latency_sketch).merge(sketch).to_bytes()
+        for column in SUM_COLUMNS:
+            setattr(existing, column, getattr(existing, column) + row[column])
+        for column, pick in (("latency_min", min), ("latency_max", max)):
+            values = [value for value in (getattr(existing, column), row[column]) if value is not None]
+            setattr(existing, column, pick(values) if values else None)
+    db.session.flush()
+
+
+def apply(rollups):
+    """Add aggregated rows onto the stored rollups in the current session (caller commits)."""
+    if not rollups:
+        return
+    # A stable order keeps concurrent flushes from locking the same rows in opposite orders
+    rows = [rollups[key] for key in sorted(rollups)]
+    dialect = db.engine.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        db.session.execute(_upsert_statement(dialect),
+                           [{column: value for column, value in row.items() if column != "latency_sketch"}
+                            for row in rows])
+        # Sketches don't add in SQL; merge them into the rows the upsert just locked
+        merge_stored(MetricRollup, MetricRollup.latency_sketch,
+                     {key: row["latency_sketch"] for key, row in rollups.items() if row["latency_sketch"]})
+    else:
+        _merge_rows(rows)
+
+
+def record(metrics):
+    """Roll freshly written metric rows into the rollup tables (caller commits)."""
+    apply(aggregate(metrics))
+
+
+def covering_clause(website_ids, since=None, resolution=DAY):
+    """
+    Filter for the rollup rows covering ``since`` until now, using the
+    coarsest resolution no wider than ``resolution`` that fits: minutes up
+    to the first full hour, hours up to the first full day, then days. The
+    window starts at the minute containing ``since`` (or the hour, once
+    minute rollups that old have been downsampled away); without ``since``
+    every ``resolution`` row matches.
+    """
+    clause = MetricRollup.website_id.in_(website_ids)
+    if since is None:
+        return db.and_(clause, MetricRollup.resolution == resolution)
+
+    now = datetime.utcnow()
+    levels = [level for level in RESOLUTIONS if level <= resolution and
+              (not RETENTION_DAYS[level] or since >= now - timedelta(days=RETENTION_DAYS[level]))] or [resolution]
+    start = floor_time(since, levels[0])
+    clauses = []
+    for index, level in enumerate(levels):
+        level_clause = db.and_(MetricRollup.resolution == level, MetricRollup.bucket_start >= start)
+        if index + 1 < len(levels):
+            start = ceil_time(since, levels[index + 1])
+            level_clause = db.and_(level_clause, MetricRollup.bucket_start < start)
+        clauses.append(level_clause)
+    return db.and_(clause, db.or_(*clauses))
+
+
+def covering(website_ids, since=None, resolution=DAY):
+    """Rollup rows matching ``covering_clause``."""
+    return MetricRollup.query.filter(covering_clause(website_ids, since, resolution)).all()
+
+
+def grouped_totals(website_ids, since, resolution, *keys):
+    """
+    Sum the covering rollups in SQL, one row mapping per distinct ``keys``
+    (labelled column expressions) with every SUM_COLUMNS total.
+    """
+    sums = [db.func.coalesce(db.func.sum(MetricRollup.__table__.c[column]), 0).label(column)
+            for column in SUM_COLUMNS]
+    statement = db.select(*keys, *sums).where(covering_clause(website_ids, since, resolution)).group_by(*keys)
+    return db.session.execute(statement).mappings().all()
+
+
+def totals(rollups):
+    """Combine rollup rows (models or dicts) into a single row-shaped dict with a merged sketch."""
+    combined = _empty(None, None, None)
+    combined["latency_sketch"] = LatencySketch()
+    for rollup in rollups:
+        row = rollup if isinstance(rollup, dict) else {column: getattr(rollup, column) for column in combined}
+        for column in SUM_COLUMNS:
+            combined[column] += row[column]
+        sketch = row["latency_sketch"]
+        if sketch:
+            combined["latency_sketch"].merge(sketch if isinstance(sketch, LatencySketch)
+                                             else LatencySketch.from_bytes(sketch))
+        if row["latency_min"] is not None:
+            combined["latency_min"] = min(v for v in (combined["latency_min"], row["latency_min"]) if v is not None)
+        if row["latency_max"] is not None:
+            combined["latency_max"] = max(v for v in (combined["latency_max"], row["latency_max"]) if v is not None)
+    return combined
+
+
+def percentile(row, p):
+    """
+    p-th latency percentile of a ``totals`` row: from its sketch (within
+    sketch.RELATIVE_ACCURACY), or from the coarse histogram when some of its
+    rows predate sketches.
+    """
+    sketch = row["latency_sketch"]
+    if sketch is not None and sketch.count == row["latency_count"]:
+        return sketch.percentile(p)
+    return estimate_percentile(row, p)
+
+
+def estimate_percentile(row, p):
+    """
+    Approximate the p-th latency percentile from a row's histogram by
+    interpolating inside the bucket that holds it (clamped to min/max).
+    """
+    total = row["latency_count"]
+    if not total:
+        return 0.0
+    rank = min(int(total * p / 100), total - 1)
+    low_edges = (0,) + LATENCY_BOUNDS
+    high_edges = LATENCY_BOUNDS + (row["latency_max"],)
+    seen = 0
+    for column, low, high in zip(BUCKET_COLUMNS, low_edges, high_edges):
+        count = row[column]
+        if rank < seen + count:
+            low = max(low, row["latency_min"])
+            high = min(high, row["latency_max"])
+            return low + (high - low) * (rank - seen + 0.5) / count
+        seen += count
+    return row["latency_max"]
+
+
+def backfill(since=None, until=None, website_ids=None, batch_rows=BACKFILL_BATCH_ROWS):
+    """
+    Rebuild rollups from raw metrics for whole UTC days from ``since`` (or
+    the beginning) up to ``until`` (or now), one website per transaction.
+
+    Existing rollups in the range are replaced. Checks written while a
+    range is being rebuilt can be counted twice, so run it with the monitor
+    stopped or pass an ``until`` before live data. Returns the number of
+    metrics read.
+    """
+    since = floor_time(since, DAY) if since is not None else None
+    until = floor_time(until, DAY) if until is not None else None
+    if website_ids is None:
+        website_ids = db.session.execute(db.select(Metric.website_id).distinct()).scalars().all()
+
+    read = 0
+    for website_id in website_ids:
+        stale = db.delete(MetricRollup).where(MetricRollup.website_id == website_id)
+        metrics = (db.select(Metric.website_id, Metric.response_time, Metric.uptime, Metric.timestamp)
+                   .where(Metric.website_id == website_id))
+        if since is not None:
+            stale = stale.where(MetricRollup.bucket_start >= since)
+            metrics = metrics.where(Metric.timestamp >= since)
+        if until is not None:
+            stale = stale.where(MetricRollup.bucket_start < until)
+            metrics = metrics.where(Metric.timestamp < until)
+        db.session.execute(stale)
+
+        result = db.session.execute(metrics.execution_options(yield_per=batch_rows))
+        for batch in result.mappings().partitions():
+            record(batch)
+            read += len(batch)
+        db.session.commit()
+    return read
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the metric rollup tables.")
+
+
+@rollups_cli.command("backfill")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), help="first UTC day to rebuild")
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), help="UTC day to stop before")
+@click.option("--website", "website_ids", type=int, multiple=True, help="limit to these website ids")
+def backfill_command(since, until, website_ids):
+    """Rebuild rollups from the raw metric table."""
+    read = backfill(since, until, list(website_ids) or None)
+    click.echo(f"Rolled up {read} metrics")
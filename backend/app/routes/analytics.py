@@ -1,8 +1,9 @@
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
-from app.models import Website, Metric, Alert
+from app.cache import response_cache
+from app import db, rollups
+from app.models import Website, Alert, MetricRollup
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 analytics_ns = Namespace('analytics', description="Analytics Endpoints")
 
@@ -10,6 +11,7 @@ analytics_ns = Namespace('analytics', description="Analytics Endpoints")
 @analytics_ns.route('/summary')
 class AnalyticsSummary(Resource):
     @token_required
+    @response_cache.cached("analytics")
     def get(self, current_user):
         """Get aggregated analytics for the authenticated user (last 30 days)"""
         websites = Website.query.filter_by(user_id=current_user.id).all()
@@ -25,72 +27,67 @@ class AnalyticsSummary(Resource):
                 "website_performance": [],
             }, 200
 
-        # All-time total checks
-        total_checks = Metric.query.filter(
-            Metric.website_id.in_(website_ids)
-        ).count()
+        # All-time total checks (sum of the daily rollups)
+        total_checks = db.session.query(db.func.coalesce(db.func.sum(MetricRollup.count), 0)).filter(
+            MetricRollup.website_id.in_(website_ids),
+            MetricRollup.resolution == rollups.DAY
+        ).scalar()
 
-        # All-time total alerts
-        total_alerts = Alert.query.filter(
-            Alert.website_id.in_(website_ids)
-        ).count()
-
-        # Last 30 days metrics
+        # Alerts per website: all time and last 30 days, in one grouped query
         since_30d = datetime.utcnow() - timedelta(days=30)
-        recent_metrics = Metric.query.filter(
-            Metric.website_id.in_(website_ids),
-            Metric.timestamp >= since_30d
-        ).all()
+        alert_rows = db.session.query(
+            Alert.website_id,
+            db.func.count(Alert.id),
+            db.func.count(db.case((Alert.timestamp >= since_30d, Alert.id))),
+        ).filter(Alert.website_id.in_(website_ids)).group_by(Alert.website_id).all()
+        total_alerts = sum(total for _, total, _ in alert_rows)
+        alerts_30d = {wid: recent for wid, _, recent in alert_rows}
+
+        # Last 30 days of rollups (days, plus hours/minutes at the ragged start), summed per website
+        by_site = {row["website_id"]: row for row in
+                   rollups.grouped_totals(website_ids, since_30d, rollups.DAY, MetricRollup.website_id)}
+        recent_count = sum(row["count"] for row in by_site.values())
 
         avg_response_time = 0.0
         uptime_percentage = 0.0
-        if recent_metrics:
-            avg_response_time = sum(m.response_time for m in recent_metrics) / len(recent_metrics)
-            uptime_percentage = (sum(m.uptime for m in recent_metrics) / len(recent_metrics)) * 100
+        if recent_count:
+            avg_response_time = sum(row["latency_sum"] for row in by_site.values()) / recent_count
+            uptime_percentage = (sum(row["up_count"] for row in by_site.values()) / recent_count) * 100
 
         # Response time trend: last 30 days grouped by day
-        daily = defaultdict(lambda: {"total": 0.0, "count": 0})
-        for m in recent_metrics:
-            key = m.timestamp.strftime("%b %d")
-            daily[key]["total"] += m.response_time
-            daily[key]["count"] += 1
+        bucket_day = db.func.date(MetricRollup.bucket_start, type_=db.Date).label("day")
+        daily = {row["day"].strftime("%b %d"): row for row in
+                 rollups.grouped_totals(website_ids, since_30d, rollups.DAY, bucket_day)}
 
         response_trend = []
         for i in range(29, -1, -1):
             day = datetime.utcnow() - timedelta(days=i)
             key = day.strftime("%b %d")
             if key in daily and daily[key]["count"] > 0:
-                avg = daily[key]["total"] / daily[key]["count"]
+                avg = daily[key]["latency_sum"] / daily[key]["count"]
                 response_trend.append({"day": key, "response_time": round(avg, 1)})
             else:
                 response_trend.append({"day": key, "response_time": None})
 
         # Per-website performance (last 30 days)
-        website_map = {w.id: w for w in websites}
         website_performance = []
-        for wid in website_ids:
-            site_metrics = [m for m in recent_metrics if m.website_id == wid]
-            if site_metrics:
-                avg_rt = sum(m.response_time for m in site_metrics) / len(site_metrics)
-                uptime_pct = (sum(m.uptime for m in site_metrics) / len(site_metrics)) * 100
+        for w in websites:
+            site = by_site.get(w.id)
+            if site and site["count"]:
+                avg_rt = site["latency_sum"] / site["count"]
+                uptime_pct = (site["up_count"] / site["count"]) * 100
             else:
                 avg_rt = 0.0
                 uptime_pct = 0.0
 
-            site_alerts = Alert.query.filter(
-                Alert.website_id == wid,
-                Alert.timestamp >= since_30d
-            ).count()
-
-            w = website_map[wid]
             website_performance.append({
-                "id": wid,
+                "id": w.id,
                 "name": w.name,
                 "url": w.url,
                 "avg_response_time": round(avg_rt, 1),
                 "uptime_percentage": round(uptime_pct, 2),
-                "checks": len(site_metrics),
-                "alerts_30d": site_alerts,
+                "checks": site["count"] if site else 0,
+                "alerts_30d": alerts_30d.get(w.id, 0),
             })
 
         # Sort by uptime descending (best performing first)
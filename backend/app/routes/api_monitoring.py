@@ -1,22 +1,19 @@
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
-from app.models import Website, Metric
+from app.cache import response_cache
+from app import rollups
+from app.models import Website
 from datetime import datetime, timedelta
 
 api_monitoring_ns = Namespace('api-monitoring', description="API Monitoring")
 
-
-def _percentile(sorted_values, p):
-    if not sorted_values:
-        return 0.0
-    idx = int(len(sorted_values) * p / 100)
-    idx = min(idx, len(sorted_values) - 1)
-    return sorted_values[idx]
+LATENCY_BUCKET_LABELS = ("< 50ms", "50-200ms", "200-500ms", "500ms-1s", "> 1s")
 
 
 @api_monitoring_ns.route('/summary')
 class ApiMonitoringSummary(Resource):
     @token_required
+    @response_cache.cached("api-monitoring")
     def get(self, current_user):
         """Derive API monitoring stats from website metrics (last 30 days)"""
         websites = Website.query.filter_by(user_id=current_user.id).all()
@@ -34,33 +31,26 @@ class ApiMonitoringSummary(Resource):
         website_map = {w.id: w for w in websites}
         website_ids = list(website_map.keys())
 
-        all_metrics = Metric.query.filter(
-            Metric.website_id.in_(website_ids),
-            Metric.timestamp >= since_30d,
-        ).all()
-
-        # Group metrics by website
+        # Group the 30-day rollups by website
         by_site = {wid: [] for wid in website_ids}
-        for m in all_metrics:
-            by_site[m.website_id].append(m)
+        for r in rollups.covering(website_ids, since_30d, rollups.DAY):
+            by_site[r.website_id].append(r)
 
         endpoints = []
-        all_response_times = []
+        site_totals = []
 
-        for wid, metrics in by_site.items():
+        for wid, site_rollups in by_site.items():
             w = website_map[wid]
-            response_times = sorted([m.response_time for m in metrics if m.response_time > 0])
-            all_response_times.extend(response_times)
-
-            if response_times:
-                p50 = round(_percentile(response_times, 50), 1)
-                p95 = round(_percentile(response_times, 95), 1)
-                p99 = round(_percentile(response_times, 99), 1)
-            else:
-                p50 = p95 = p99 = 0.0
-
-            total = len(metrics)
-            errors = sum(1 for m in metrics if m.uptime == 0)
+            site = rollups.totals(site_rollups)
+            site_totals.append(site)
+
+            # Percentiles come from the merged latency sketches of the covering rollups
+            p50 = round(rollups.percentile(site, 50), 1)
+            p95 = round(rollups.percentile(site, 95), 1)
+            p99 = round(rollups.percentile(site, 99), 1)
+
+            total = site["count"]
+            errors = round(total - site["up_count"])
             error_rate = round((errors / total) * 100, 2) if total else 0.0
             uptime_pct = round(((total - errors) / total) * 100, 2) if total else 0.0
 
@@ -88,25 +78,18 @@ class ApiMonitoringSummary(Resource):
         endpoints.sort(key=lambda e: status_order.get(e["status"], 3))
 
         # Overall stats
-        avg_latency = round(sum(all_response_times) / len(all_response_times), 1) if all_response_times else 0.0
-        total_checks = len(all_metrics)
-        total_errors = sum(1 for m in all_metrics if m.uptime == 0)
+        overall = rollups.totals(site_totals)
+        avg_latency = round(overall["latency_sum"] / overall["latency_count"], 1) if overall["latency_count"] else 0.0
+        total_checks = overall["count"]
+        total_errors = round(total_checks - overall["up_count"])
         overall_error_rate = round((total_errors / total_checks) * 100, 2) if total_checks else 0.0
         overall_uptime = round(100 - overall_error_rate, 2)
 
-        # Latency distribution buckets
-        rt_all = sorted([m.response_time for m in all_metrics if m.response_time > 0])
-        buckets = [
-            ("< 50ms",    lambda v: v < 50),
-            ("50-200ms",  lambda v: 50 <= v < 200),
-            ("200-500ms", lambda v: 200 <= v < 500),
-            ("500ms-1s",  lambda v: 500 <= v < 1000),
-            ("> 1s",      lambda v: v >= 1000),
-        ]
+        # Latency distribution buckets (the rollup histogram)
         latency_distribution = []
-        total_rt = len(rt_all) or 1
-        for label, fn in buckets:
-            count = sum(1 for v in rt_all if fn(v))
+        total_rt = overall["latency_count"] or 1
+        for label, column in zip(LATENCY_BUCKET_LABELS, rollups.BUCKET_COLUMNS):
+            count = overall[column]
             latency_distribution.append({
                 "label": label,
                 "count": count,
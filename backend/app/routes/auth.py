@@ -2,9 +2,10 @@ import os
 from datetime import datetime, timedelta
 from flask_restx import Namespace, Resource, fields
 from functools import wraps
-from flask import jsonify, request
-from app.models import User, Website, Metric, Alert
+from flask import g, jsonify, request
+from app.models import User, Website, Alert, MetricRollup, WebsiteStatus, UptimeInterval
 from app import db, limiter
+from app.retention import forget_websites
 import jwt
 from app.utils.logger import logger
 from flask_jwt_extended import create_access_token
@@ -83,7 +84,8 @@ def token_required(f):
                 logger.warning("Unauthorized access attempt: Invalid token")
                 return {"error": "Invalid token!"}, 401
 
-            #Pass current user to route
+            #Pass current user to route (and keep it for after_request hooks)
+            g.current_user = current_user
             return f(*args, **kwargs, current_user=current_user)
 
     return decorated
@@ -286,11 +288,14 @@ class DeleteUser(Resource):
             logger.warning(f"Delete request for non-existent User ID {current_user.id}")
             return {"error": "User not found"}, 404
 
-        websites = Website.query.filter_by(user_id=user.id).all()
-        for website in websites:
-            Metric.query.filter_by(website_id=website.id).delete()
-            Alert.query.filter_by(website_id=website.id).delete()
-            db.session.delete(website)
+        # Delete the websites with their alerts, rollups, status and intervals; raw metrics are queued for the
+        # retention job
+        website_ids = db.session.execute(db.select(Website.id).filter_by(user_id=user.id)).scalars().all()
+        if website_ids:
+            forget_websites(website_ids)
+            for model in (Alert, MetricRollup, WebsiteStatus, UptimeInterval):
+                model.query.filter(model.website_id.in_(website_ids)).delete(synchronize_session=False)
+            Website.query.filter(Website.id.in_(website_ids)).delete(synchronize_session=False)
 
         db.session.delete(user)
         db.session.commit()
@@ -1,6 +1,7 @@
 from flask import request
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
+from app.cache import response_cache
 from app.models import Container
 from app import db
 from datetime import datetime
@@ -75,6 +76,7 @@ class ContainerItem(Resource):
 @containers_ns.route('/summary')
 class ContainerSummary(Resource):
     @token_required
+    @response_cache.cached("containers")
     def get(self, current_user):
         """Get container counts by status"""
         containers = Container.query.filter_by(user_id=current_user.id).all()
@@ -1,6 +1,9 @@
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
-from app.models import Website, Metric, Alert
+from app.cache import response_cache
+from app import rollups
+from app.models import Website, Alert
+from app.website_status import with_status
 from datetime import datetime, timedelta
 
 dashboard_ns = Namespace('dashboard', description="Dashboard Summary Endpoints")
@@ -9,9 +12,12 @@ dashboard_ns = Namespace('dashboard', description="Dashboard Summary Endpoints")
 @dashboard_ns.route('/summary')
 class DashboardSummary(Resource):
     @token_required
+    @response_cache.cached("dashboard")
     def get(self, current_user):
         """Get aggregated dashboard metrics for the authenticated user"""
-        websites = Website.query.filter_by(user_id=current_user.id).all()
+        # Websites with their latest check (one join against website_status)
+        rows = with_status(Website.query.filter_by(user_id=current_user.id)).all()
+        websites = [w for w, _ in rows]
         website_ids = [w.id for w in websites]
 
         if not website_ids:
@@ -31,12 +37,8 @@ class DashboardSummary(Resource):
             Alert.status == "unresolved"
         ).count()
 
-        # Latest metric per website for KPI cards
-        latest_metrics = []
-        for wid in website_ids:
-            m = Metric.query.filter_by(website_id=wid).order_by(Metric.timestamp.desc()).first()
-            if m:
-                latest_metrics.append(m)
+        # Latest check per website for KPI cards
+        latest_metrics = [s for _, s in rows if s is not None]
 
         avg_response_time = 0.0
         uptime_percentage = 0.0
@@ -44,20 +46,15 @@ class DashboardSummary(Resource):
             avg_response_time = sum(m.response_time for m in latest_metrics) / len(latest_metrics)
             uptime_percentage = (sum(m.uptime for m in latest_metrics) / len(latest_metrics)) * 100
 
-        # Response time trend: last 24h grouped by hour
+        # Response time trend: last 24h grouped by hour (hourly rollups, minutes for the first partial hour)
         since = datetime.utcnow() - timedelta(hours=24)
-        trend_metrics = Metric.query.filter(
-            Metric.website_id.in_(website_ids),
-            Metric.timestamp >= since
-        ).order_by(Metric.timestamp.asc()).all()
-
         hourly = {}
-        for m in trend_metrics:
-            key = m.timestamp.strftime("%H:00")
+        for r in rollups.covering(website_ids, since, rollups.HOUR):
+            key = r.bucket_start.strftime("%H:00")
             if key not in hourly:
                 hourly[key] = {"total": 0, "count": 0}
-            hourly[key]["total"] += m.response_time
-            hourly[key]["count"] += 1
+            hourly[key]["total"] += r.latency_sum
+            hourly[key]["count"] += r.count
 
         response_trend = [
             {"time": k, "response_time": round(v["total"] / v["count"], 1)}
@@ -81,13 +78,12 @@ class DashboardSummary(Resource):
 
         # Per-website current status
         website_statuses = []
-        for w in websites:
-            m = Metric.query.filter_by(website_id=w.id).order_by(Metric.timestamp.desc()).first()
+        for w, m in rows:
             website_statuses.append({
                 "id": w.id,
                 "name": w.name,
                 "url": w.url,
-                "status": "up" if (m and m.uptime >= 0.5) else "down",
+                "status": m.status if m else "down",
                 "response_time": round(m.response_time, 1) if m else 0,
                 "uptime_pct": round(m.uptime * 100, 2) if m else 0,
             })
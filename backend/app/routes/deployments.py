@@ -1,6 +1,7 @@
 from flask import request
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
+from app.cache import response_cache
 from app.models import Deployment
 from app import db
 
@@ -54,6 +55,7 @@ class DeploymentItem(Resource):
 @deployments_ns.route('/summary')
 class DeploymentSummary(Resource):
     @token_required
+    @response_cache.cached("deployments")
     def get(self, current_user):
         """Get deployment counts by status"""
         deployments = Deployment.query.filter_by(user_id=current_user.id).all()
@@ -1,9 +1,20 @@
-from flask import request
+import base64
+import csv
+import heapq
+import io
+import json
+import zlib
+from array import array
+from itertools import islice
+from types import SimpleNamespace
+from flask import Response, request, stream_with_context
 from flask_restx import Namespace, Resource, fields
 from app.models import Metric, Website
-from app import db
+from app import archive, db, rollups, sla, website_status
 from datetime import datetime
+from app.downsample import lttb
 from app.routes.auth import token_required
+from app.utils.time_utils import utc_arg
 
 metrics_ns = Namespace('metrics', description="Website Metrics Endpoints")
 sites_ns = Namespace('sites', description="Manage Monitoring Frequency")
@@ -14,21 +25,159 @@ metric_model = metrics_ns.model("Metric", {
     "website_id": fields.Integer,
     "uptime": fields.Float,
     "response_time": fields.Float,
-    "timestamp": fields.DateTime
+    "timestamp": fields.DateTime,
+    "status_code": fields.Integer(description="HTTP status of the final response"),
+    "response_bytes": fields.Integer(description="Bytes received"),
+    "failure_class": fields.String(description="timeout, dns, connect_refused, connect_error, tls, http_error or request_error"),
+    "dns_ms": fields.Float(description="DNS resolution time in ms"),
+    "connect_ms": fields.Float(description="TCP connect time in ms"),
+    "tls_ms": fields.Float(description="TLS handshake time in ms"),
+    "ttfb_ms": fields.Float(description="Request sent to first response byte in ms"),
+    "transfer_ms": fields.Float(description="Response body transfer time in ms")
 })
 
+EXPORT_COLUMNS = ("id", "website_id", "timestamp", "uptime", "response_time", "status_code", "response_bytes",
+                  "failure_class", "dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "transfer_ms")
+EXPORT_BATCH_ROWS = 5000  # rows fetched from the cursor and written per response chunk
+
 create_metric_model = metrics_ns.model("CreateMetric", {
     "website_id": fields.Integer(required=True, description="Website ID"),
     "response_time": fields.Float(required=True, description="Response time in ms"),
     "uptime": fields.Float(required=True, description="Uptime status (1=Up, 0=Down)")
 })
 
+HISTORY_PAGE_ROWS = 1000    # default page size of a range query
+MAX_HISTORY_ROWS = 10000    # cap on limit and points
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _metric_dict(metric):
+    return {
+        "id": metric.id,
+        "website_id": metric.website_id,
+        "uptime": float(metric.uptime),  # Ensure numeric uptime
+        "response_time": float(metric.response_time),  #  Ensure numeric response time
+        "timestamp": metric.timestamp.isoformat(),
+        "status_code": metric.status_code,
+        "response_bytes": metric.response_bytes,
+        "failure_class": metric.failure_class,
+        "dns_ms": metric.dns_ms,
+        "connect_ms": metric.connect_ms,
+        "tls_ms": metric.tls_ms,
+        "ttfb_ms": metric.ttfb_ms,
+        "transfer_ms": metric.transfer_ms
+    }
+
+
+def _encode_cursor(metric):
+    return base64.urlsafe_b64encode(f"{metric.timestamp.isoformat()}|{metric.id}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, metric_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(metric_id)
+    except ValueError:
+        raise ValueError("Invalid 'cursor'")
+
+
+def _archived(website_id, since, until, after=None):
+    """Archived rows of the range (metrics past retention) as metric-like objects, past the ``after`` position."""
+    if after is not None:
+        since = max(since, after[0]) if since else after[0]
+    for row in archive.read([website_id], since, until):
+        if after is None or (row["timestamp"], row["id"]) > after:
+            yield SimpleNamespace(**row)
+
+
+def _order(metric):
+    return metric.timestamp, metric.id
+
+
+def _downsampled(query, points, archived):
+    """
+    LTTB over response_time: reads only (id, timestamp, response_time) of the
+    range, table and ``archived()`` rows merged in order, then loads the
+    ``points`` chosen rows. Returns (rows, total rows).
+    """
+    ids, xs, ys, cold = array("q"), array("d"), array("d"), bytearray()
+    result = db.session.execute(query.with_entities(Metric.id, Metric.timestamp, Metric.response_time)
+                                .statement.execution_options(yield_per=EXPORT_BATCH_ROWS))
+    hot_points = ((timestamp, metric_id, response_time, False) for metric_id, timestamp, response_time in result)
+    cold_points = ((metric.timestamp, metric.id, metric.response_time, True) for metric in archived())
+    for timestamp, metric_id, response_time, archived_row in heapq.merge(cold_points, hot_points):
+        ids.append(metric_id)
+        xs.append((timestamp - _EPOCH).total_seconds())
+        ys.append(response_time)
+        cold.append(archived_row)
+
+    picked = lttb(xs, ys, points)
+    chosen = [ids[index] for index in picked if not cold[index]]
+    chosen_cold = {ids[index] for index in picked if cold[index]}
+    rows = [metric for metric in archived() if metric.id in chosen_cold] if chosen_cold else []
+    for start in range(0, len(chosen), 500):
+        rows.extend(Metric.query.filter(Metric.id.in_(chosen[start:start + 500])).all())
+    rows.sort(key=_order)
+    return rows, len(ids)
+
+
+def _history(current_user, website_id):
+    """
+    Range mode of GET /metrics: keyset pages, or one LTTB-downsampled series.
+    Metrics moved to the cold archive by retention are merged in, so a range
+    reaching past retention still returns them.
+    """
+    since, until = utc_arg("from"), utc_arg("to")
+    cursor = request.args.get("cursor")
+    points = request.args.get("points", type=int)
+    limit = request.args.get("limit", type=int, default=HISTORY_PAGE_ROWS)
+    if points is not None and cursor:
+        raise ValueError("'points' returns the whole range; it cannot be combined with 'cursor'")
+    if points is not None and not 3 <= points <= MAX_HISTORY_ROWS:
+        raise ValueError(f"'points' must be between 3 and {MAX_HISTORY_ROWS}")
+    if not 1 <= limit <= MAX_HISTORY_ROWS:
+        raise ValueError(f"'limit' must be between 1 and {MAX_HISTORY_ROWS}")
+    after = _decode_cursor(cursor) if cursor else None
+
+    if not Website.query.filter_by(id=website_id, user_id=current_user.id).first():
+        return {"error": "Website not found or unauthorized"}, 404
+
+    query = Metric.query.filter(Metric.website_id == website_id)
+    if since:
+        query = query.filter(Metric.timestamp >= since)
+    if until:
+        query = query.filter(Metric.timestamp < until)
+    query = query.order_by(Metric.timestamp, Metric.id)
+
+    if points is not None:
+        rows, total = _downsampled(query, points, lambda: _archived(website_id, since, until))
+        return {"metrics": [_metric_dict(metric) for metric in rows], "next_cursor": None,
+                "total": total, "downsampled": len(rows) < total}, 200
+
+    if after:
+        query = query.filter(db.tuple_(Metric.timestamp, Metric.id) > after)
+    merged = heapq.merge(_archived(website_id, since, until, after), query.limit(limit + 1), key=_order)
+    rows = list(islice(merged, limit + 1))
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"metrics": [_metric_dict(metric) for metric in rows[:limit]], "next_cursor": next_cursor}, 200
+
+
 # Route to fetch all metrics for a specific website
 @metrics_ns.route('', '/')
 @metrics_ns.route('', '/')
 class GetMetrics(Resource):
+    @metrics_ns.doc(params={
+        "website_id": "Website ID (required)",
+        "limit": "Without a range: the latest N rows, newest first (default 10). "
+                 f"With one: page size (default {HISTORY_PAGE_ROWS}, max {MAX_HISTORY_ROWS})",
+        "from": "Start of the range, ISO 8601 UTC (inclusive); switches to oldest-first range mode",
+        "to": "End of the range, ISO 8601 UTC (exclusive)",
+        "cursor": "next_cursor of the previous page",
+        "points": "Downsample the whole range to about this many points (LTTB on response_time)",
+    })
     @metrics_ns.response(200, "Metrics retrieved successfully!", [metric_model])
     @metrics_ns.response(400, "Website ID is required")
+    @metrics_ns.response(404, "Website not found or unauthorized")
     @token_required
     def get(self, current_user):
         """Fetch all metrics for a specific website"""
@@ -38,6 +187,13 @@ class GetMetrics(Resource):
         if not website_id:
             return {"error": "Website ID is required"}, 400
 
+        # Any range parameter answers {"metrics": [...], "next_cursor": ...}, oldest first
+        if any(name in request.args for name in ("from", "to", "cursor", "points")):
+            try:
+                return _history(current_user, website_id)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
         query = Metric.query.filter_by(website_id=website_id).order_by(Metric.timestamp.desc())
 
         if limit > 0:
@@ -54,13 +210,98 @@ class GetMetrics(Resource):
                 "timestamp": None  # No timestamp available
             }], 200
 
-        return [{
-            "id": metric.id,
-            "website_id": metric.website_id,
-            "uptime": float(metric.uptime),  # Ensure numeric uptime
-            "response_time": float(metric.response_time),  #  Ensure numeric response time
-            "timestamp": metric.timestamp.isoformat()
-        } for metric in metrics], 200
+        return [_metric_dict(metric) for metric in metrics], 200
+
+def _csv(lines):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(lines)
+    return buffer.getvalue()
+
+
+def _encode_rows(rows, fmt):
+    """One response chunk: the rows as CSV lines or NDJSON objects."""
+    rows = [{column: row[column].isoformat() if column == "timestamp" else row[column] for column in EXPORT_COLUMNS}
+            for row in rows]
+    if fmt == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    return _csv([row[column] for column in EXPORT_COLUMNS] for row in rows)
+
+
+def _export_chunks(archived, statement, fmt, compress):
+    """
+    Stream the ``archived`` rows, then the result of ``statement``, in
+    EXPORT_BATCH_ROWS chunks. yield_per keeps only one batch in memory (a
+    server-side cursor on Postgres); archived months are read one at a time.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 writes a gzip container
+
+    def encode(text):
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        yield encode(_csv([EXPORT_COLUMNS]))
+    archived = iter(archived)
+    while rows := list(islice(archived, EXPORT_BATCH_ROWS)):
+        yield encode(_encode_rows(rows, fmt))
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_ROWS))
+    for rows in result.mappings().partitions():
+        yield encode(_encode_rows(rows, fmt))
+    if compressor:
+        yield compressor.flush()
+
+
+# Route to stream metrics out in bulk
+@metrics_ns.route('/export')
+class ExportMetrics(Resource):
+    @metrics_ns.doc(params={
+        "website_id": "Website to export (default: all of your websites)",
+        "from": "Start of the range, ISO 8601 UTC (inclusive)",
+        "to": "End of the range, ISO 8601 UTC (exclusive)",
+        "format": "csv (default) or ndjson",
+        "gzip": "true to download the export gzip-compressed",
+    })
+    @metrics_ns.response(200, "Metrics streamed as CSV or NDJSON")
+    @metrics_ns.response(400, "Invalid format or time range")
+    @metrics_ns.response(404, "Website not found or unauthorized")
+    @token_required
+    def get(self, current_user):
+        """Stream metrics for a time range as CSV or NDJSON, oldest first"""
+        fmt = request.args.get("format", "csv").lower()
+        if fmt not in ("csv", "ndjson"):
+            return {"error": "Invalid format. Choose csv or ndjson."}, 400
+        try:
+            since, until = utc_arg("from"), utc_arg("to")
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if since and until and since >= until:
+            return {"error": "'from' must be before 'to'"}, 400
+
+        website_id = request.args.get("website_id", type=int)
+        if website_id:
+            if not Website.query.filter_by(id=website_id, user_id=current_user.id).first():
+                return {"error": "Website not found or unauthorized"}, 404
+            website_ids = [website_id]
+        else:
+            website_ids = db.session.execute(
+                db.select(Website.id).where(Website.user_id == current_user.id)
+            ).scalars().all()
+        scope = Metric.website_id.in_(website_ids)
+
+        statement = db.select(*(getattr(Metric, column) for column in EXPORT_COLUMNS)).where(scope)
+        if since:
+            statement = statement.where(Metric.timestamp >= since)
+        if until:
+            statement = statement.where(Metric.timestamp < until)
+        statement = statement.order_by(Metric.timestamp, Metric.id)
+
+        compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+        filename = f"metrics-{website_id or 'all'}.{fmt}" + (".gz" if compress else "")
+        mimetype = "application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/x-ndjson")
+        # Metrics past retention live in the cold archive (when enabled) and come first
+        archived = archive.read(website_ids, since, until)
+        return Response(stream_with_context(_export_chunks(archived, statement, fmt, compress)), mimetype=mimetype,
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 # Route to add a new metric
 @metrics_ns.route('/add')
@@ -68,6 +309,7 @@ class AddMetric(Resource):
     @metrics_ns.expect(create_metric_model)
     @metrics_ns.response(201, "Metric added successfully!", metric_model)
     @metrics_ns.response(400, "Missing required fields")
+    @metrics_ns.response(404, "Website not found or unauthorized")
     @token_required
     def post(self, current_user):
         """Add a new metric for a website"""
@@ -78,6 +320,9 @@ class AddMetric(Resource):
 
         if not website_id or response_time is None or uptime is None:
             return {"error": "Missing required fields"}, 400
+        # metric has no foreign key to website: only live websites of this user take new rows
+        if not Website.query.filter_by(id=website_id, user_id=current_user.id).first():
+            return {"error": "Website not found or unauthorized"}, 404
 
         new_metric = Metric(
             website_id=website_id,
@@ -87,6 +332,11 @@ class AddMetric(Resource):
         )
 
         db.session.add(new_metric)
+        row = {"website_id": website_id, "response_time": response_time, "uptime": uptime,
+               "timestamp": new_metric.timestamp}
+        rollups.record([row])
+        website_status.record([row])
+        sla.record([row])
         db.session.commit()
 
         return {
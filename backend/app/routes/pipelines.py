@@ -2,6 +2,7 @@ import json
 from flask import request
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
+from app.cache import response_cache
 from app.models import Pipeline
 from app import db
 
@@ -57,6 +58,7 @@ class PipelineItem(Resource):
 @pipelines_ns.route('/summary')
 class PipelineSummary(Resource):
     @token_required
+    @response_cache.cached("pipelines")
     def get(self, current_user):
         """Get pipeline counts by status"""
         pipelines = Pipeline.query.filter_by(user_id=current_user.id).all()
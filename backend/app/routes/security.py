@@ -1,6 +1,7 @@
 from flask import request
 from flask_restx import Namespace, Resource
 from app.routes.auth import token_required
+from app.cache import response_cache
 from app.models import SecurityFinding
 from app import db
 
@@ -64,6 +65,7 @@ class SecurityItem(Resource):
 @security_ns.route('/summary')
 class SecuritySummary(Resource):
     @token_required
+    @response_cache.cached("security")
     def get(self, current_user):
         """Get security finding counts by severity and status"""
         findings = SecurityFinding.query.filter_by(user_id=current_user.id).all()
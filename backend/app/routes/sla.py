@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from flask import request
+from flask_restx import Namespace, Resource
+
+from app import sla
+from app.models import Website
+from app.routes.auth import token_required
+from app.utils.time_utils import utc_arg
+
+sla_ns = Namespace('sla', description="Uptime SLA from state-change intervals")
+
+_WINDOW_PARAMS = {
+    "from": "Start of the window, ISO 8601 UTC (default: 30 days ago)",
+    "to": "End of the window, ISO 8601 UTC (default: now)",
+}
+
+
+def _window():
+    until = utc_arg("to") or datetime.utcnow()
+    since = utc_arg("from") or until - timedelta(days=30)
+    if since >= until:
+        raise ValueError("'from' must be before 'to'")
+    return since, until
+
+
+@sla_ns.route('')
+class SlaSummary(Resource):
+    @sla_ns.doc(params={"website_id": "Only this website (default: all of yours)", **_WINDOW_PARAMS})
+    @sla_ns.response(400, "Invalid time range")
+    @sla_ns.response(404, "Website not found or unauthorized")
+    @token_required
+    def get(self, current_user):
+        """Exact uptime percentage, downtime minutes and incidents per website for a window"""
+        try:
+            since, until = _window()
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        query = Website.query.filter_by(user_id=current_user.id)
+        website_id = request.args.get("website_id", type=int)
+        if website_id:
+            query = query.filter_by(id=website_id)
+        websites = query.all()
+        if website_id and not websites:
+            return {"error": "Website not found or unauthorized"}, 404
+
+        summary = sla.summarize([w.id for w in websites], since, until)
+        result = []
+        for w in websites:
+            site = summary[w.id]
+            uptime = site["uptime_percentage"]
+            result.append({
+                "id": w.id,
+                "name": w.name,
+                "url": w.url,
+                "uptime_percentage": round(uptime, 4) if uptime is not None else None,
+                "downtime_minutes": round(site["downtime_minutes"], 2),
+                "monitored_minutes": round(site["monitored_minutes"], 2),
+                "coverage_percentage": round(site["coverage_percentage"], 2),
+                "incidents": site["incidents"],
+            })
+        return {"from": since.isoformat(), "to": until.isoformat(), "websites": result}, 200
+
+
+@sla_ns.route('/<int:website_id>/intervals')
+class SlaIntervals(Resource):
+    @sla_ns.doc(params=_WINDOW_PARAMS)
+    @sla_ns.response(400, "Invalid time range")
+    @sla_ns.response(404, "Website not found or unauthorized")
+    @token_required
+    def get(self, current_user, website_id):
+        """Up / down intervals of a website overlapping a window, oldest first"""
+        try:
+            since, until = _window()
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        if not Website.query.filter_by(id=website_id, user_id=current_user.id).first():
+            return {"error": "Website not found or unauthorized"}, 404
+
+        return [{
+            "state": interval.state,
+            "started_at": interval.started_at.isoformat(),
+            "ended_at": interval.ended_at.isoformat() if interval.ended_at else None,
+            "cause": interval.cause,
+        } for interval in sla.intervals([website_id], since, until)], 200
@@ -1,9 +1,10 @@
 from flask_restx import Namespace, Resource
 from flask import jsonify
 import requests
+from datetime import datetime
 from flask_jwt_extended import jwt_required
-from app import db
-from app.models import Metric, Website  #Import Metric model
+from app.models import Website
+from app.metric_buffer import metric_buffer
 
 status_ns = Namespace("status", description="Website status monitoring")
 
@@ -21,14 +22,14 @@ class WebsiteStatus(Resource):
             # Find the website ID from the database
             website = Website.query.filter_by(url=url).first()
             if website:
-                #Save metric to database
-                new_metric = Metric(
-                    website_id=website.id,
-                    response_time=response_time,
-                    uptime=is_online  #Store as True (1) or False (0)
-                )
-                db.session.add(new_metric)
-                db.session.commit()
+                #Queue metric for the next batched write
+                metric_buffer.add([{
+                    "website_id": website.id,
+                    "response_time": response_time,
+                    "uptime": is_online,  #Store as True (1) or False (0)
+                    "status_code": status_code,
+                    "timestamp": datetime.utcnow(),
+                }])
 
             return {
                 "status": "online" if is_online else "offline",
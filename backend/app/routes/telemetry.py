@@ -1,52 +1,49 @@
-from collections import defaultdict
 from datetime import datetime, timedelta
 
 from flask import request
 from flask_restx import Namespace, Resource
 
 from app.routes.auth import token_required
-from app.models import OtelSpan
+from app.models import OtelSpan, RouteLatency
+from app.rollups import HOUR, floor_time
+from app.sketch import LatencySketch
 
 telemetry_ns = Namespace('telemetry', description="OpenTelemetry APM Data")
 
 
-def _percentile(sorted_vals, p):
-    if not sorted_vals:
-        return 0.0
-    idx = min(int(len(sorted_vals) * p / 100), len(sorted_vals) - 1)
-    return round(sorted_vals[idx], 1)
-
-
 @telemetry_ns.route('/routes')
 class RouteStats(Resource):
     @token_required
     def get(self, current_user):
         """p50 / p95 / p99 latency per route for the last 24 hours"""
-        since = datetime.utcnow() - timedelta(hours=24)
-        spans = OtelSpan.query.filter(
-            OtelSpan.start_time >= since,
-            OtelSpan.http_method.isnot(None),
-        ).all()
+        # Merges the hourly route sketches, so the window starts at the top of the hour 24h ago
+        since = floor_time(datetime.utcnow() - timedelta(hours=24), HOUR)
+        buckets = RouteLatency.query.filter(RouteLatency.bucket_start >= since).all()
 
-        by_route = defaultdict(list)
-        for span in spans:
-            key = (span.http_method, span.http_route or "unknown")
-            by_route[key].append(span)
+        by_route = {}
+        for bucket in buckets:
+            key = (bucket.http_method, bucket.http_route)
+            route = by_route.setdefault(key, {"count": 0, "errors": 0, "sum": 0.0, "sketch": LatencySketch()})
+            route["count"] += bucket.count
+            route["errors"] += bucket.error_count
+            route["sum"] += bucket.duration_sum
+            route["sketch"].merge(LatencySketch.from_bytes(bucket.latency_sketch))
 
         result = []
-        for (method, route), route_spans in by_route.items():
-            times = sorted(s.duration_ms for s in route_spans)
-            errors = sum(1 for s in route_spans if s.status_code == "ERROR")
+        for (method, route), stats in by_route.items():
+            if not stats["count"]:
+                continue
+            sketch = stats["sketch"]
             result.append({
                 "route": route,
                 "method": method,
-                "count": len(times),
-                "p50": _percentile(times, 50),
-                "p95": _percentile(times, 95),
-                "p99": _percentile(times, 99),
-                "avg": round(sum(times) / len(times), 1),
-                "error_count": errors,
-                "error_rate": round(errors / len(times) * 100, 1),
+                "count": stats["count"],
+                "p50": round(sketch.percentile(50), 1),
+                "p95": round(sketch.percentile(95), 1),
+                "p99": round(sketch.percentile(99), 1),
+                "avg": round(stats["sum"] / stats["count"], 1),
+                "error_count": stats["errors"],
+                "error_rate": round(stats["errors"] / stats["count"] * 100, 1),
             })
 
         result.sort(key=lambda x: x["count"], reverse=True)
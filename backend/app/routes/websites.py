@@ -2,6 +2,7 @@ from flask_restx import Namespace, Resource, fields
 from flask import request, jsonify
 from app import db
 from app.routes.auth import token_required
+from app.probe import CHECK_MODES
 
 
 websites_ns = Namespace("websites", description="Manage Websites")
@@ -15,6 +16,10 @@ website_model = websites_ns.model(
         "url": fields.String,
         "name": fields.String,
         "frequency": fields.Integer,
+        "cold_connection": fields.Boolean,
+        "check_mode": fields.String,
+        "max_body_bytes": fields.Integer,
+        "max_frequency": fields.Integer,
     },
 )
 
@@ -23,7 +28,11 @@ add_website_model = websites_ns.model(
     {
         "url": fields.String(required=True, description="Website URL"),
         "name": fields.String(required=True, description="Website Name"),
-        "frequency": fields.Integer(default=5, description="Monitoring Frequency (minutes)"),
+        "frequency": fields.Integer(default=300, description="Monitoring Frequency (seconds)"),
+        "cold_connection": fields.Boolean(default=False, description="Open a fresh connection for every check"),
+        "check_mode": fields.String(enum=list(CHECK_MODES), description="get, head or stream (default: server setting)"),
+        "max_body_bytes": fields.Integer(description="Stream mode: stop after this many body bytes (0 = headers only)"),
+        "max_frequency": fields.Integer(description="Let stable sites back off up to this interval (seconds)"),
     },
 )
 
@@ -33,7 +42,11 @@ update_website_model = websites_ns.model(
         "website_id": fields.Integer(required=True, description="Website ID"),
         "url": fields.String(description="Updated URL"),
         "name": fields.String(description="Updated Name"),
-        "frequency": fields.Integer(description="Updated Frequency (minutes)"),
+        "frequency": fields.Integer(description="Updated Frequency (seconds)"),
+        "cold_connection": fields.Boolean(description="Open a fresh connection for every check"),
+        "check_mode": fields.String(enum=list(CHECK_MODES), description="get, head or stream"),
+        "max_body_bytes": fields.Integer(description="Stream mode: stop after this many body bytes (0 = headers only)"),
+        "max_frequency": fields.Integer(description="Let stable sites back off up to this interval (seconds)"),
     },
 )
 
@@ -42,6 +55,19 @@ delete_website_model = websites_ns.model(
     {"website_id": fields.Integer(required=True, description="Website ID")},
 )
 
+
+def _check_settings_error(check_mode, max_body_bytes, max_frequency=None, frequency=None):
+    if check_mode is not None and check_mode not in CHECK_MODES:
+        return f"check_mode must be one of: {', '.join(CHECK_MODES)}"
+    if max_body_bytes is not None and (not isinstance(max_body_bytes, int) or max_body_bytes < 0):
+        return "max_body_bytes must be a non-negative integer"
+    if max_frequency is not None:
+        if not isinstance(max_frequency, int) or not (10 <= max_frequency <= 86400):
+            return "max_frequency must be between 10 and 86400 seconds"
+        if frequency and max_frequency < frequency:
+            return "max_frequency must not be lower than frequency"
+    return None
+
 @websites_ns.route("/add", methods=["POST", "OPTIONS"])
 class AddWebsite(Resource):
     @websites_ns.expect(add_website_model)
@@ -55,7 +81,11 @@ class AddWebsite(Resource):
         data = request.get_json()
         url = data.get("url", "")
         name = data.get("name", "")
-        frequency = data.get("frequency", 5)
+        frequency = data.get("frequency", 300)
+        cold_connection = bool(data.get("cold_connection", False))
+        check_mode = data.get("check_mode")
+        max_body_bytes = data.get("max_body_bytes")
+        max_frequency = data.get("max_frequency")
 
         #Validate Required Fields
         if not url or not name:
@@ -64,11 +94,16 @@ class AddWebsite(Resource):
             return {"error": "URL must be 200 characters or fewer"}, 400
         if len(name) > 100:
             return {"error": "Name must be 100 characters or fewer"}, 400
-        if not isinstance(frequency, int) or not (1 <= frequency <= 1440):
-            return {"error": "Frequency must be between 1 and 1440 minutes"}, 400
+        if not isinstance(frequency, int) or not (10 <= frequency <= 86400):
+            return {"error": "Frequency must be between 10 and 86400 seconds"}, 400
+        settings_error = _check_settings_error(check_mode, max_body_bytes, max_frequency, frequency)
+        if settings_error:
+            return {"error": settings_error}, 400
 
         # Create new Website object
-        new_website = Website(user_id=current_user.id, url=url, name=name, frequency=frequency)
+        new_website = Website(user_id=current_user.id, url=url, name=name, frequency=frequency,
+                              cold_connection=cold_connection, check_mode=check_mode, max_body_bytes=max_body_bytes,
+                              max_frequency=max_frequency)
 
         db.session.add(new_website)
         db.session.commit()
@@ -81,6 +116,10 @@ class AddWebsite(Resource):
                 "url": new_website.url,
                 "name": new_website.name,
                 "frequency": new_website.frequency,
+                "cold_connection": new_website.cold_connection,
+                "check_mode": new_website.check_mode,
+                "max_body_bytes": new_website.max_body_bytes,
+                "max_frequency": new_website.max_frequency,
             },
         }, 201
 
@@ -96,24 +135,22 @@ class GetWebsites(Resource):
     @token_required
     def get(self, current_user):
         """Retrieve all monitored websites for the user"""
-        from app.models import Website, Metric
+        from app.models import Website
+        from app.website_status import with_status
 
-        # Query user's websites
-        websites = Website.query.filter_by(user_id=current_user.id).all()
+        # Query user's websites with their latest check in one join
+        rows = with_status(Website.query.filter_by(user_id=current_user.id)).all()
 
         # Serialize data
         websites_data = []
-        for website in websites:
-            # Fetch latest metric for each website
-            latest_metric = Metric.query.filter_by(website_id=website.id).order_by(Metric.timestamp.desc()).first()
-
+        for website, latest in rows:
             websites_data.append({
                 "id": website.id,
                 "url": website.url,
                 "name": website.name,
                 "frequency": website.frequency,
-                "uptime": latest_metric.uptime if latest_metric else 0,
-                "response_time": latest_metric.response_time if latest_metric else "N/A",
+                "uptime": latest.uptime if latest else 0,
+                "response_time": latest.response_time if latest else "N/A",
             })
 
         return websites_data, 200
@@ -166,6 +203,10 @@ class UpdateWebsite(Resource):
         url = data.get("url")
         name = data.get("name")
         frequency = data.get("frequency")
+        cold_connection = data.get("cold_connection")
+        check_mode = data.get("check_mode")
+        max_body_bytes = data.get("max_body_bytes")
+        max_frequency = data.get("max_frequency")
 
         # Validate website_id is provided
         if not website_id:
@@ -176,6 +217,10 @@ class UpdateWebsite(Resource):
         if not website:
             return {"error": "Website not found or unauthorized"}, 404
 
+        settings_error = _check_settings_error(check_mode, max_body_bytes, max_frequency, frequency or website.frequency)
+        if settings_error:
+            return {"error": settings_error}, 400
+
         # Update fields if provided
         if url:
             website.url = url
@@ -183,6 +228,14 @@ class UpdateWebsite(Resource):
             website.name = name
         if frequency:
             website.frequency = frequency
+        if cold_connection is not None:
+            website.cold_connection = bool(cold_connection)
+        if check_mode is not None:
+            website.check_mode = check_mode
+        if max_body_bytes is not None:
+            website.max_body_bytes = max_body_bytes
+        if max_frequency is not None:
+            website.max_frequency = max_frequency
 
         # Commit changes
         db.session.commit()
@@ -195,6 +248,10 @@ class UpdateWebsite(Resource):
                 "url": website.url,
                 "name": website.name,
                 "frequency": website.frequency,
+                "cold_connection": website.cold_connection,
+                "check_mode": website.check_mode,
+                "max_body_bytes": website.max_body_bytes,
+                "max_frequency": website.max_frequency,
             },
         }, 200
 
@@ -207,16 +264,20 @@ class DeleteWebsite(Resource):
     @token_required
     def delete(self, current_user, website_id):
         """Delete a monitored website"""
-        from app.models import Website, Metric, Alert  # Import here to avoid circular dependencies
+        from app.models import Website, Alert, MetricRollup, WebsiteStatus, UptimeInterval  # Import here to avoid circular dependencies
 
         # Query database for website
         website = Website.query.filter_by(id=website_id, user_id=current_user.id).first()
         if not website:
             return {"error": "Website not found or unauthorized"}, 404
 
-        # Delete related metrics and alerts
-        Metric.query.filter_by(website_id=website.id).delete()
+        # Delete related alerts, rollups and status; raw metrics are queued for the retention job
+        from app.retention import forget_websites
+        forget_websites([website.id])
         Alert.query.filter_by(website_id=website.id).delete()
+        MetricRollup.query.filter_by(website_id=website.id).delete()
+        WebsiteStatus.query.filter_by(website_id=website.id).delete()
+        UptimeInterval.query.filter_by(website_id=website.id).delete()
 
         # Delete website
         db.session.delete(website)
@@ -0,0 +1,88 @@
+import bisect
+import hashlib
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import MonitorWorker
+from app.utils.logger import logger
+
+# A worker that has not heartbeated for LEASE_SECONDS is considered dead and
+# its share of the websites is picked up by the remaining workers.
+HEARTBEAT_SECONDS = int(os.getenv("MONITOR_HEARTBEAT_SECONDS", 10))
+LEASE_SECONDS = int(os.getenv("MONITOR_LEASE_SECONDS", 30))
+VIRTUAL_NODES = int(os.getenv("MONITOR_VIRTUAL_NODES", 64))
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring; removing a node only moves the keys that node owned."""
+
+    def __init__(self, nodes=(), virtual_nodes=VIRTUAL_NODES):
+        self.nodes = tuple(sorted(nodes))
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class WorkerMembership:
+    """
+    DB-backed worker leases for partitioning checks across processes and hosts.
+
+    Each monitor process heartbeats a row in ``monitor_worker``. The set of
+    workers with a live lease forms a consistent hash ring, and a worker only
+    checks the websites whose key hashes to it.
+    """
+
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ring = HashRing([self.worker_id])
+
+    def owns(self, key):
+        return self.ring.owner(key) == self.worker_id
+
+    def heartbeat(self):
+        """Renew this worker's lease and rebuild the ring. Returns True if membership changed."""
+        now = datetime.utcnow()
+        worker = db.session.get(MonitorWorker, self.worker_id)
+        if worker is None:
+            worker = MonitorWorker(id=self.worker_id, hostname=socket.gethostname(), pid=os.getpid(), started_at=now)
+            db.session.add(worker)
+        worker.heartbeat_at = now
+
+        # Forget workers that have been dead for a while so the table stays small
+        db.session.execute(
+            db.delete(MonitorWorker).where(MonitorWorker.heartbeat_at < now - timedelta(seconds=LEASE_SECONDS * 10))
+        )
+        db.session.commit()
+
+        live = db.session.execute(
+            db.select(MonitorWorker.id).where(MonitorWorker.heartbeat_at >= now - timedelta(seconds=LEASE_SECONDS))
+        ).scalars().all()
+        nodes = tuple(sorted(set(live) | {self.worker_id}))
+        if nodes == self.ring.nodes:
+            return False
+
+        logger.info(f"🔀 Monitor membership changed: {len(nodes)} live workers ({self.worker_id} is one)")
+        self.ring = HashRing(nodes)
+        return True
+
+    def leave(self):
+        """Drop this worker's lease so its shard is taken over immediately."""
+        db.session.execute(db.delete(MonitorWorker).where(MonitorWorker.id == self.worker_id))
+        db.session.commit()
@@ -0,0 +1,121 @@
+import math
+import struct
+
+from app import db
+
+# Any quantile read from a sketch is within this relative error of an exact one
+RELATIVE_ACCURACY = 0.01
+# At 1% accuracy ~115 bins cover each factor of ten, so ~1300 span 1µs to a day. Beyond
+# MAX_BINS the lowest bins are folded together, losing accuracy on the fastest values only
+MAX_BINS = 2048
+ZERO_THRESHOLD = 1e-3  # values at or below this count as zero
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+_VERSION = 1
+_HEADER = struct.Struct("<BQI")  # version, zero count, number of bins
+_BIN = struct.Struct("<iI")      # bin index, count
+
+
+class LatencySketch:
+    """
+    Mergeable quantile sketch over log-spaced buckets (the DDSketch scheme).
+
+    A value v > 0 lands in bucket ceil(log_gamma(v)), so every bucket spans
+    a fixed ratio and any quantile comes back within RELATIVE_ACCURACY of
+    the exact answer. Merging adds bucket counts, and the size depends on
+    the range of values, not on how many were added.
+    """
+
+    __slots__ = ("bins", "zero_count", "count")
+
+    def __init__(self):
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        if value <= ZERO_THRESHOLD:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / _LOG_GAMMA)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > MAX_BINS:
+                self._collapse()
+        self.count += count
+
+    def merge(self, other):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.bins) > MAX_BINS:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        keep = indexes[-MAX_BINS:]
+        folded = sum(self.bins.pop(index) for index in indexes[:-MAX_BINS])
+        self.bins[keep[0]] += folded
+
+    def percentile(self, p):
+        """Value at the p-th percentile (same rank rule as the raw-row ``_percentile`` helpers)."""
+        if not self.count:
+            return 0.0
+        rank = min(int(self.count * p / 100), self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+                return 2 * _GAMMA ** index / (_GAMMA + 1)
+        return 2 * _GAMMA ** max(self.bins) / (_GAMMA + 1)
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(_VERSION, self.zero_count, len(self.bins))]
+        parts.extend(_BIN.pack(index, count) for index, count in sorted(self.bins.items()))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        sketch = cls()
+        if not data:
+            return sketch
+        data = bytes(data)
+        version, sketch.zero_count, size = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported sketch version {version}")
+        for offset in range(_HEADER.size, _HEADER.size + size * _BIN.size, _BIN.size):
+            index, count = _BIN.unpack_from(data, offset)
+            sketch.bins[index] = count
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+def merge_stored(model, column, sketches, chunk_size=500):
+    """
+    Merge ``sketches`` ({primary key tuple: LatencySketch}) into ``column``
+    of existing ``model`` rows. Call it after the additive upsert of the
+    same rows in the same transaction: the upsert holds their row locks, so
+    the read-merge-write cannot interleave with another writer.
+    """
+    if not sketches:
+        return
+    key_columns = list(model.__table__.primary_key.columns)
+    keys = sorted(sketches)
+    stored = {}
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        rows = db.session.execute(
+            db.select(*key_columns, column).where(db.tuple_(*key_columns).in_(chunk))
+        ).all()
+        stored.update((tuple(row[:-1]), row[-1]) for row in rows)
+
+    updates = []
+    for key in keys:
+        merged = LatencySketch.from_bytes(stored.get(key)).merge(sketches[key])
+        updates.append({**dict(zip((c.name for c in key_columns), key)), column.name: merged.to_bytes()})
+    db.session.execute(db.update(model), updates)  # ORM bulk UPDATE by primary key
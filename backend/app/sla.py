@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.models import Metric, UptimeInterval, Website
+from app.website_status import DOWN, UP, status_of
+
+BACKFILL_BATCH_ROWS = 10000
+
+
+def record(metrics):
+    """
+    Close the current uptime interval of each website whose state changed
+    in ``metrics`` and open the next one (caller commits). Checks older than
+    the current interval's start are too late to place and are ignored.
+    """
+    now = datetime.utcnow()
+    by_site = {}
+    for metric in metrics:
+        by_site.setdefault(metric["website_id"], []).append(metric)
+
+    # Locked in website order, like the status snapshots written alongside
+    current = {interval.website_id: interval for interval in UptimeInterval.query.filter(
+        UptimeInterval.website_id.in_(by_site), UptimeInterval.ended_at.is_(None)
+    ).order_by(UptimeInterval.website_id, UptimeInterval.started_at).with_for_update()}
+
+    for website_id in sorted(by_site):
+        interval = current.get(website_id)
+        for metric in sorted(by_site[website_id], key=lambda row: row.get("timestamp") or now):
+            timestamp = metric.get("timestamp") or now
+            state = status_of(metric.get("uptime"))
+            if interval is not None and (interval.state == state or timestamp < interval.started_at):
+                continue
+            if interval is not None:
+                interval.ended_at = timestamp
+            interval = UptimeInterval(website_id=website_id, state=state, started_at=timestamp,
+                                      cause=metric.get("failure_class") if state == DOWN else None)
+            db.session.add(interval)
+    db.session.flush()
+
+
+def intervals(website_ids, since, until):
+    """Intervals of ``website_ids`` overlapping [since, until), oldest first."""
+    return UptimeInterval.query.filter(
+        UptimeInterval.website_id.in_(website_ids),
+        UptimeInterval.started_at < until,
+        db.or_(UptimeInterval.ended_at.is_(None), UptimeInterval.ended_at > since),
+    ).order_by(UptimeInterval.website_id, UptimeInterval.started_at).all()
+
+
+def summarize(website_ids, since, until=None):
+    """
+    Exact availability of each website over [since, until) (until defaults
+    to, and is capped at, now) from its uptime intervals. The current
+    interval counts up to ``until``. Time before a website's first check is
+    not monitored, so the percentage is of monitored time only and is None
+    when nothing in the window was monitored.
+    """
+    now = datetime.utcnow()
+    until = min(until or now, now)
+    totals = {website_id: {UP: 0.0, DOWN: 0.0, "incidents": 0} for website_id in website_ids}
+    for interval in intervals(website_ids, since, until):
+        start = max(interval.started_at, since)
+        end = min(interval.ended_at or until, until)
+        seconds = (end - start).total_seconds()
+        if seconds <= 0:
+            continue
+        site = totals[interval.website_id]
+        site[interval.state] += seconds
+        if interval.state == DOWN:
+            site["incidents"] += 1
+
+    window = max((until - since).total_seconds(), 0)
+    result = {}
+    for website_id, site in totals.items():
+        monitored = site[UP] + site[DOWN]
+        result[website_id] = {
+            "uptime_percentage": site[UP] / monitored * 100 if monitored else None,
+            "downtime_minutes": site[DOWN] / 60,
+            "monitored_minutes": monitored / 60,
+            "coverage_percentage": monitored / window * 100 if window else 0.0,
+            "incidents": site["incidents"],
+        }
+    return result
+
+
+def backfill(website_ids=None, batch_rows=BACKFILL_BATCH_ROWS):
+    """
+    Rebuild the uptime intervals of ``website_ids`` (default: all) from the
+    raw metric table, one website per transaction. Run it with the monitor
+    stopped: checks written meanwhile would be replayed out of order.
+    Returns the number of metrics read.
+    """
+    if website_ids is None:
+        website_ids = db.session.execute(db.select(Website.id)).scalars().all()
+
+    read = 0
+    for website_id in website_ids:
+        db.session.execute(db.delete(UptimeInterval).where(UptimeInterval.website_id == website_id))
+        metrics = (db.select(Metric.website_id, Metric.uptime, Metric.timestamp, Metric.failure_class)
+                   .where(Metric.website_id == website_id)
+                   .order_by(Metric.timestamp, Metric.id)
+                   .execution_options(yield_per=batch_rows))
+        for batch in db.session.execute(metrics).mappings().partitions():
+            record(batch)
+            read += len(batch)
+        db.session.commit()
+    return read
+
+
+sla_cli = AppGroup("sla", help="Uptime intervals behind the SLA reports.")
+
+
+@sla_cli.command("backfill")
+@click.option("--website", "website_ids", type=int, multiple=True, help="limit to these website ids")
+def backfill_command(website_ids):
+    """Rebuild uptime intervals from the raw metric table."""
+    read = backfill(list(website_ids) or None)
+    click.echo(f"Replayed {read} metrics")
@@ -9,11 +9,14 @@ from opentelemetry.instrumentation.flask import FlaskInstrumentor
 logger = logging.getLogger(__name__)
 
 # URL path prefixes that are too noisy to store (health checks, Swagger UI, static assets)
-_SKIP_PREFIXES = ("/healthz", "/status", "/docs", "/swagger", "/static", "/_")
+_SKIP_PREFIXES = ("/healthz", "/internal", "/status", "/docs", "/swagger", "/static", "/_")
 
 
 class PostgresSpanExporter(SpanExporter):
-    """Exports finished OTel spans to the otel_span PostgreSQL table."""
+    """
+    Exports finished OTel spans to the otel_span PostgreSQL table and adds
+    them to the hourly route_latency sketches in the same transaction.
+    """
 
     def __init__(self, app):
         self._app = app
@@ -67,6 +70,7 @@ class PostgresSpanExporter(SpanExporter):
         try:
             with self._app.app_context():
                 db.session.bulk_save_objects(records)
+                record_route_latency(records)
                 db.session.commit()
             return SpanExportResult.SUCCESS
         except Exception as exc:
@@ -77,6 +81,69 @@ class PostgresSpanExporter(SpanExporter):
         pass
 
 
+def aggregate_routes(spans):
+    """
+    Fold HTTP spans into route_latency rows keyed by (method, route, hour):
+    counts, duration sum and a latency sketch of duration_ms.
+    """
+    from app.rollups import HOUR, floor_time
+    from app.sketch import LatencySketch
+
+    buckets = {}
+    for span in spans:
+        key = (span.http_method, span.http_route or "unknown", floor_time(span.start_time, HOUR))
+        row = buckets.get(key)
+        if row is None:
+            row = buckets[key] = {"http_method": key[0], "http_route": key[1], "bucket_start": key[2],
+                                  "count": 0, "error_count": 0, "duration_sum": 0.0,
+                                  "latency_sketch": LatencySketch()}
+        row["count"] += 1
+        if span.status_code == "ERROR":
+            row["error_count"] += 1
+        row["duration_sum"] += span.duration_ms
+        row["latency_sketch"].add(span.duration_ms)
+    return buckets
+
+
+def record_route_latency(spans):
+    """Add ``spans`` onto the hourly route_latency rows in the current session (caller commits)."""
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    from app import db
+    from app.models import RouteLatency
+    from app.sketch import LatencySketch, merge_stored
+
+    buckets = aggregate_routes(spans)
+    if not buckets:
+        return
+    dialect = db.engine.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        for key in sorted(buckets):
+            row = buckets[key]
+            existing = db.session.get(RouteLatency, key)
+            if existing is None:
+                db.session.add(RouteLatency(**{**row, "latency_sketch": row["latency_sketch"].to_bytes()}))
+                continue
+            for column in ("count", "error_count", "duration_sum"):
+                setattr(existing, column, getattr(existing, column) + row[column])
+            existing.latency_sketch = (LatencySketch.from_bytes(existing.latency_sketch)
+                                       .merge(row["latency_sketch"]).to_bytes())
+        db.session.flush()
+        return
+
+    table = RouteLatency.__table__
+    statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=["http_method", "http_route", "bucket_start"],
+        set_={column: table.c[column] + statement.excluded[column]
+              for column in ("count", "error_count", "duration_sum")},
+    )
+    db.session.execute(statement, [{column: value for column, value in buckets[key].items()
+                                    if column != "latency_sketch"} for key in sorted(buckets)])
+    merge_stored(RouteLatency, RouteLatency.latency_sketch,
+                 {key: row["latency_sketch"] for key, row in buckets.items()})
+
+
 def setup_telemetry(app):
     """
     Attach OpenTelemetry HTTP tracing to the Flask app.
@@ -94,6 +161,6 @@ def setup_telemetry(app):
 
     FlaskInstrumentor().instrument_app(
         app,
-        excluded_urls="healthz,/status$,/docs.*,swagger.*,static.*",
+        excluded_urls="healthz,internal/.*,/status$,/docs.*,swagger.*,static.*",
     )
     logger.info("OpenTelemetry tracing initialised — HTTP spans → otel_span table")
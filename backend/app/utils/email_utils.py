@@ -9,7 +9,7 @@ from app.utils.logger import logger  # Ensure logger is imported
 
 load_dotenv()
 
-CLOUDFLARE_WORKER_URL = "https://watchly-worker.joel-caban2017.workers.dev"
+CLOUDFLARE_WORKER_URL = os.getenv("EMAIL_WORKER_URL", "https://watchly-worker.joel-caban2017.workers.dev")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY") or os.getenv("SENDGRID_DEV_API_KEY")
 FROM_EMAIL = os.getenv("SENDGRID_FROM_EMAIL")
 
@@ -19,9 +19,18 @@ if not SENDGRID_API_KEY:
 if not FROM_EMAIL:
     logger.warning("⚠️ WARNING: FROM_EMAIL is missing! Email sending will be disabled.")
 
-async def send_email_via_cloudflare(to_email, subject, message):
+class EmailDeliveryError(Exception):
+    """The email worker could not be reached or rejected the message."""
+
+
+async def send_email_via_cloudflare(to_email, subject, message, client=None):
     """
-    Sends an email using Cloudflare Worker as a proxy.
+    Sends an email using Cloudflare Worker as a proxy. Returns True, or
+    raises EmailDeliveryError with the HTTP status and response text (or
+    the transport error) so the outbox can record why delivery failed.
+
+    Pass a long-lived ``client`` to reuse its connection pool (the outbox
+    dispatcher does); otherwise a one-off client is created.
     """
     data = {
         "to": to_email,
@@ -29,14 +38,24 @@ async def send_email_via_cloudflare(to_email, subject, message):
         "message": message
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(CLOUDFLARE_WORKER_URL, json=data)
-            logger.info(f"📨 Cloudflare Worker Response: {response.status_code}, {response.text}")
-            return response.status_code == 200  # Return True if success
-        except Exception as e:
-            logger.error(f"❌ Failed to send email via Cloudflare: {str(e)}")
-            return False
+    if client is None:
+        async with httpx.AsyncClient() as one_off_client:
+            return await send_email_via_cloudflare(to_email, subject, message, client=one_off_client)
+
+    try:
+        response = await client.post(CLOUDFLARE_WORKER_URL, json=data)
+    except Exception as e:
+        logger.error(f"❌ Failed to send email via Cloudflare: {str(e)}")
+        raise EmailDeliveryError(f"{type(e).__name__}: {e}") from e
+    logger.info(f"📨 Cloudflare Worker Response: {response.status_code}, {response.text}")
+    if response.status_code != 200:
+        raise EmailDeliveryError(f"HTTP {response.status_code}: {response.text[:500]}")
+    return True
+
+
+def backoff_seconds(attempt, base=2, cap=3600):
+    """Exponential backoff delay before retry number ``attempt`` (1-based): 2s, 4s, 8s, ..."""
+    return min(base ** attempt, cap)
 
 async def send_email_via_sendgrid(to_email, subject, message):
     """
@@ -61,7 +80,7 @@ async def send_email_via_sendgrid(to_email, subject, message):
         except Exception as e:
             logger.error(f"❌ Email Sending Failed (Attempt {attempt + 1}/{max_retries}): {str(e)}")
             if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff (wait 2s, then 4s)
+                await asyncio.sleep(backoff_seconds(attempt))  # Exponential backoff (wait 1s, then 2s)
             else:
                 logger.error("❌ Email sending permanently failed after retries.")
     return False
@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+
+from flask import request
+
+
+def utc_arg(name):
+    """
+    Parse query argument ``name`` as an ISO 8601 timestamp into a naive UTC
+    datetime (how timestamps are stored). Returns None when it is absent and
+    raises ValueError when it does not parse.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid '{name}': use an ISO 8601 timestamp")
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
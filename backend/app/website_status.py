@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import Website, WebsiteStatus
+
+UP, DOWN = "up", "down"
+
+_COLUMNS = ("status", "uptime", "response_time", "status_code", "failure_class", "consecutive_failures",
+            "last_checked_at", "last_change_at")
+
+
+def status_of(uptime):
+    return UP if (uptime or 0) >= 0.5 else DOWN
+
+
+def snapshots(metrics):
+    """
+    Fold metric rows into one snapshot per website, the latest check
+    winning. Returns (snapshot, continues) pairs: ``continues`` is True when
+    every row of the batch had the final status, so the stored failure
+    streak and change time carry on from before the batch.
+    """
+    now = datetime.utcnow()
+    by_site = {}
+    for metric in metrics:
+        by_site.setdefault(metric["website_id"], []).append(metric)
+
+    result = []
+    for website_id, rows in by_site.items():
+        rows.sort(key=lambda row: row.get("timestamp") or now)
+        last = rows[-1]
+        status = status_of(last.get("uptime"))
+        run = 0
+        while run < len(rows) and status_of(rows[-1 - run].get("uptime")) == status:
+            run += 1
+        result.append(({
+            "website_id": website_id,
+            "status": status,
+            "uptime": last.get("uptime") or 0.0,
+            "response_time": last.get("response_time") or 0.0,
+            "status_code": last.get("status_code"),
+            "failure_class": last.get("failure_class"),
+            "consecutive_failures": run if status == DOWN else 0,
+            "last_checked_at": last.get("timestamp") or now,
+            "last_change_at": rows[-run].get("timestamp") or now,
+        }, run == len(rows)))
+    return result
+
+
+def _upsert_statement(dialect, continues):
+    table = WebsiteStatus.__table__
+    statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+    excluded = statement.excluded
+    updates = {column: excluded[column] for column in _COLUMNS}
+    if continues:
+        updates["consecutive_failures"] = db.case(
+            (excluded.status == DOWN, table.c.consecutive_failures + excluded.consecutive_failures), else_=0
+        )
+        updates["last_change_at"] = db.case(
+            (table.c.status == excluded.status, table.c.last_change_at), else_=excluded.last_change_at
+        )
+    # A late flush never overwrites a newer check
+    return statement.on_conflict_do_update(index_elements=["website_id"], set_=updates,
+                                           where=table.c.last_checked_at <= excluded.last_checked_at)
+
+
+def _merge(snapshot, continues):
+    """Read-modify-write fallback for dialects without INSERT ... ON CONFLICT."""
+    existing = db.session.get(WebsiteStatus, snapshot["website_id"])
+    if existing is None:
+        db.session.add(WebsiteStatus(**snapshot))
+        return
+    if existing.last_checked_at > snapshot["last_checked_at"]:
+        return
+    if continues and existing.status == snapshot["status"]:
+        snapshot = {**snapshot, "last_change_at": existing.last_change_at,
+                    "consecutive_failures": existing.consecutive_failures + snapshot["consecutive_failures"]}
+    for column in _COLUMNS:
+        setattr(existing, column, snapshot[column])
+
+
+def record(metrics):
+    """Upsert the status snapshot of every website in ``metrics`` (caller commits)."""
+    pairs = sorted(snapshots(metrics), key=lambda pair: pair[0]["website_id"])  # stable lock order
+    dialect = db.engine.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        for snapshot, continues in pairs:
+            _merge(snapshot, continues)
+        db.session.flush()
+        return
+    for continues in (True, False):
+        rows = [snapshot for snapshot, flag in pairs if flag is continues]
+        if rows:
+            db.session.execute(_upsert_statement(dialect, continues), rows)
+
+
+def with_status(query):
+    """Outer-join each Website row of ``query`` to its snapshot: yields (Website, WebsiteStatus or None)."""
+    return query.add_entity(WebsiteStatus).outerjoin(WebsiteStatus, WebsiteStatus.website_id == Website.id)
@@ -0,0 +1,199 @@
+"""
+Benchmark the website monitor against a local synthetic target farm.
+
+Seeds a throwaway SQLite database with --sites websites pointing at the farm,
+runs the real MonitorService for --duration seconds and reports:
+
+    checks/sec           completed website results per second (after fan-out)
+    scheduling lag       p50 / p99 delay between a deadline and its dispatch
+    CPU per 1k sites     monitor process CPU (cores) per 1000 sites
+    RSS per 1k sites     resident memory added by the monitor per 1000 sites
+
+The farm runs in a child process so its CPU is not charged to the monitor.
+Everything stays on loopback, so it runs offline on a plain Linux box.
+
+    cd backend
+    python -m benchmarks.monitor_bench --sites 5000 --frequency 10 --duration 60
+
+Pass --min-checks-per-sec / --max-p99-lag to exit non-zero on a regression,
+and --json for machine-readable output.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.target_farm import FarmConfig, add_arguments, serve
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(percent / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _start_farm(args):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(FarmConfig.from_args(args), args.hosts, 0, ready),
+                                      daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def _configure_environment(args, port, database_path):
+    # Module-level settings are read at import time, so set them before importing app
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["EMAIL_WORKER_URL"] = f"http://127.0.0.1:{port}/email"
+    os.environ["LOG_LEVEL"] = "DEBUG" if args.verbose else "CRITICAL"
+    os.environ["MONITOR_MIN_FREQUENCY_SECONDS"] = "1"
+    os.environ["MONITOR_DEFAULT_CHECK_MODE"] = args.check_mode
+    if args.max_in_flight is not None:
+        os.environ["MONITOR_MAX_IN_FLIGHT"] = str(args.max_in_flight)
+    # Any other MONITOR_* variable in the environment applies as usual
+
+
+def _seed(app, urls, frequency):
+    from app import db
+    from app.models import User, Website
+
+    with app.app_context():
+        db.create_all()
+        users = max(len(urls) // 10, 1)
+        db.session.execute(db.insert(User), [
+            {"name": f"Bench {i}", "email": f"bench{i}@example.com", "password_hash": "x"} for i in range(users)
+        ])
+        user_ids = db.session.execute(db.select(User.id)).scalars().all()
+        db.session.execute(db.insert(Website), [
+            {"user_id": user_ids[i % len(user_ids)], "url": url, "name": f"Site {i}", "frequency": frequency}
+            for i, url in enumerate(urls)
+        ])
+        db.session.commit()
+
+
+async def _measure(service, lags, args):
+    run = asyncio.create_task(service.run())
+    await asyncio.sleep(args.warmup)
+
+    lags.clear()
+    completed, cpu, started = service.stats["completed"], _cpu_seconds(), time.monotonic()
+    await asyncio.sleep(args.duration)
+    elapsed = time.monotonic() - started
+    result = {
+        "completed": service.stats["completed"] - completed,
+        "cpu_seconds": _cpu_seconds() - cpu,
+        "elapsed": elapsed,
+        "lags": list(lags),
+        "rss": _rss_bytes(),
+        "stats": dict(service.stats),
+    }
+
+    service.stop()
+    await run
+    return result
+
+
+def run(args):
+    farm, port = _start_farm(args)
+    database = tempfile.NamedTemporaryFile(prefix="watchly-bench-", suffix=".db", delete=False)
+    database.close()
+    try:
+        _configure_environment(args, port, database.name)
+        from app import create_app
+        from app.alerting import AlertEvaluator
+        from app.check_scheduler import CheckScheduler
+        from app.monitor import MonitorService, check_key, frequency_seconds
+        from app.registry import SiteRegistry
+        from benchmarks.target_farm import TargetFarm
+
+        with contextlib.redirect_stdout(sys.stderr):  # create_app prints its routes
+            app = create_app()
+        urls = TargetFarm(FarmConfig.from_args(args), hosts=args.hosts, port=port).urls(args.sites)
+        _seed(app, urls, args.frequency)
+        baseline_rss = _rss_bytes()
+
+        lags = []
+        service = MonitorService(
+            app,
+            scheduler=CheckScheduler(min_interval=1, start_spread=args.frequency, lag_observer=lags.append),
+            registry=SiteRegistry(frequency_seconds, check_key),
+            evaluator=AlertEvaluator(),
+        )
+        measured = asyncio.run(_measure(service, lags, args))
+    finally:
+        farm.terminate()
+        os.unlink(database.name)
+
+    per_thousand = 1000 / args.sites
+    return {
+        "sites": args.sites,
+        "frequency_seconds": args.frequency,
+        "duration_seconds": round(measured["elapsed"], 1),
+        "expected_checks_per_sec": round(args.sites / args.frequency, 1),
+        "checks_per_sec": round(measured["completed"] / measured["elapsed"], 1),
+        "lag_p50_ms": round(_percentile(measured["lags"], 50) * 1000, 1),
+        "lag_p99_ms": round(_percentile(measured["lags"], 99) * 1000, 1),
+        "cpu_cores": round(measured["cpu_seconds"] / measured["elapsed"], 3),
+        "cpu_cores_per_1k_sites": round(measured["cpu_seconds"] / measured["elapsed"] * per_thousand, 4),
+        "rss_mb": round(measured["rss"] / 2**20, 1),
+        "rss_mb_per_1k_sites": round(max(measured["rss"] - baseline_rss, 0) / 2**20 * per_thousand, 2),
+        "overruns": measured["stats"]["overruns"],
+        "shed": measured["stats"]["shed"],
+        "errors": measured["stats"]["errors"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=1000)
+    parser.add_argument("--frequency", type=int, default=10, help="check interval of every site (seconds)")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=None, help="seconds before measuring (default: one interval)")
+    parser.add_argument("--max-in-flight", type=int, help="override MONITOR_MAX_IN_FLIGHT")
+    parser.add_argument("--check-mode", choices=("get", "head", "stream"), default="get")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the monitor's logging on")
+    parser.add_argument("--min-checks-per-sec", type=float, help="fail if throughput is below this")
+    parser.add_argument("--max-p99-lag", type=float, help="fail if p99 scheduling lag (ms) is above this")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.warmup is None:
+        args.warmup = args.frequency
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        width = max(len(name) for name in report)
+        for name, value in report.items():
+            print(f"{name:<{width}}  {value}")
+
+    failures = []
+    if args.min_checks_per_sec is not None and report["checks_per_sec"] < args.min_checks_per_sec:
+        failures.append(f"checks/sec {report['checks_per_sec']} < {args.min_checks_per_sec}")
+    if args.max_p99_lag is not None and report["lag_p99_ms"] > args.max_p99_lag:
+        failures.append(f"p99 lag {report['lag_p99_ms']}ms > {args.max_p99_lag}ms")
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Synthetic website farm for benchmarking the monitor offline.
+
+Serves any number of targets at ``/t/<id>`` from plain asyncio sockets on one
+or more loopback addresses (127.0.0.1, 127.0.0.2, ... all route to lo on
+Linux), so the check client sees distinct hosts without any network access.
+Each target's behaviour is a stable function of its id:
+
+    latency    lognormal around --latency-ms (spread --latency-sigma)
+    errors     --error-rate of targets answer 500
+    redirects  --redirect-rate of targets 302 to /t/<id>/final first
+    big bodies --big-rate of targets send --big-bytes instead of a small page
+
+``POST /email`` always answers 200 so alert emails stay local.
+
+Run standalone with ``python -m benchmarks.target_farm --hosts 4``.
+"""
+import argparse
+import asyncio
+import math
+import random
+import zlib
+
+SMALL_BODY = b"<html><body>ok</body></html>"
+
+
+class FarmConfig:
+    def __init__(self, latency_ms=50.0, latency_sigma=0.6, error_rate=0.02, redirect_rate=0.05,
+                 big_rate=0.01, big_bytes=1_048_576):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.redirect_rate = redirect_rate
+        self.big_rate = big_rate
+        self.big_bytes = big_bytes
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(args.latency_ms, args.latency_sigma, args.error_rate, args.redirect_rate,
+                   args.big_rate, args.big_bytes)
+
+
+def _unit(target_id, salt):
+    """Stable pseudo-random number in [0, 1) for a target and a property."""
+    return (zlib.crc32(f"{salt}:{target_id}".encode()) % 1_000_000) / 1_000_000
+
+
+class TargetFarm:
+    def __init__(self, config, hosts=1, port=0):
+        self.config = config
+        self.hosts = [f"127.0.0.{index + 1}" for index in range(hosts)]
+        self.port = port
+        self.requests = 0
+        self._servers = []
+        self._big_body = b"x" * config.big_bytes
+
+    def urls(self, count):
+        """URLs for ``count`` targets, spread round-robin over the farm's hosts."""
+        return [f"http://{self.hosts[i % len(self.hosts)]}:{self.port}/t/{i}" for i in range(count)]
+
+    async def start(self):
+        for host in self.hosts:
+            server = await asyncio.start_server(self._handle, host, self.port, backlog=4096)
+            if not self.port:
+                self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                content_length = 0
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    name = name.strip().lower()
+                    if name == "content-length":
+                        content_length = int(value.strip())
+                    elif name == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                self.requests += 1
+                status, headers, body = await self._respond(method, path)
+                head = [f"HTTP/1.1 {status}", f"Content-Length: {len(body)}"] + headers
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, path):
+        if path == "/email":
+            return "200 OK", [], b"{}"
+        parts = path.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "t" or not parts[1].isdigit():
+            return "404 Not Found", [], b"not found"
+        target_id = int(parts[1])
+        config = self.config
+
+        # Lognormal latency with a per-request jitter around the target's own median
+        median = config.latency_ms * math.exp(config.latency_sigma * (2 * _unit(target_id, "latency") - 1))
+        await asyncio.sleep(random.lognormvariate(math.log(max(median, 0.01)), config.latency_sigma / 2) / 1000)
+
+        if _unit(target_id, "redirect") < config.redirect_rate and parts[2:] != ["final"]:
+            return "302 Found", [f"Location: /t/{target_id}/final"], b""
+        if _unit(target_id, "error") < config.error_rate:
+            return "500 Internal Server Error", [], b"error"
+        if _unit(target_id, "big") < config.big_rate:
+            return "200 OK", ["Content-Type: application/octet-stream"], self._big_body
+        return "200 OK", ["Content-Type: text/html"], SMALL_BODY
+
+
+def add_arguments(parser):
+    parser.add_argument("--hosts", type=int, default=4, help="loopback addresses to listen on")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="median target latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.6, help="lognormal spread of latencies")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of targets answering 500")
+    parser.add_argument("--redirect-rate", type=float, default=0.05, help="share of targets redirecting once")
+    parser.add_argument("--big-rate", type=float, default=0.01, help="share of targets with a large body")
+    parser.add_argument("--big-bytes", type=int, default=1_048_576, help="size of a large body")
+
+
+def serve(config, hosts, port, ready=None):
+    """Run a farm until the process is terminated; ``ready`` receives the bound port."""
+    async def main():
+        farm = TargetFarm(config, hosts=hosts, port=port)
+        await farm.start()
+        if ready is not None:
+            ready.put(farm.port)
+        else:
+            print(f"Target farm listening on {', '.join(farm.hosts)} port {farm.port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+    serve(FarmConfig.from_args(args), args.hosts, args.port)
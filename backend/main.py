@@ -1,5 +1,4 @@
 import os
-import socket
 import threading
 
 from flask_migrate import Migrate
@@ -14,19 +13,12 @@ app = create_app()
 migrate = Migrate(app, db)
 
 
-def is_main_worker():
+def monitoring_enabled():
     """
-    Ensures that background tasks are only started by ONE worker process
-    when running multi-worker WSGI servers like Gunicorn.
+    Every worker process (on every host) runs a monitor; websites are sharded
+    between them by app.sharding. Set MONITOR_ENABLED=0 on web-only nodes.
     """
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.bind(("127.0.0.1", 47200))
-        # Save socket reference so it's not garbage collected and stays bound.
-        initialize_app._lock_socket = s
-        return True
-    except socket.error:
-        return False
+    return os.getenv("MONITOR_ENABLED", "1").lower() in ("1", "true", "yes")
 
 
 def initialize_app():
@@ -40,8 +32,8 @@ def initialize_app():
         # Idempotent — only creates tables that don't exist yet, never drops or alters.
         db.create_all()
 
-    if is_main_worker():
-        print("Primary worker elected: Starting background monitoring scheduler...")
+    if monitoring_enabled():
+        print(f"Worker {os.getpid()}: Starting sharded background monitoring...")
         monitoring_thread = threading.Thread(target=start_monitoring, args=(app,), daemon=True)
         monitoring_thread.start()
 
@@ -0,0 +1,28 @@
+"""Add website.check_mode and website.max_body_bytes for bounded-body checks
+
+Revision ID: 0d3a7c5e9b18
+Revises: e81f4c6b2a57
+Create Date: 2026-10-18 14:20:53.117642
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d3a7c5e9b18'
+down_revision = 'e81f4c6b2a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('check_mode', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('max_body_bytes', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.drop_column('max_body_bytes')
+        batch_op.drop_column('check_mode')
@@ -0,0 +1,28 @@
+"""Store website check frequency in seconds
+
+Revision ID: 3f1c2a9d7b40
+Revises: 8317bb261285
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b40'
+down_revision = '8317bb261285'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows created through the old AddWebsite default were stored in minutes
+    # (1-9); everything the frontend sends is already seconds (10-3600).
+    op.execute(sa.text("UPDATE website SET frequency = 300 WHERE frequency IS NULL"))
+    op.execute(sa.text("UPDATE website SET frequency = frequency * 60 WHERE frequency < 10"))
+
+
+def downgrade():
+    # Data-only migration: minute and second values cannot be told apart again.
+    pass
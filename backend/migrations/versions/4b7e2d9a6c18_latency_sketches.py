@@ -0,0 +1,40 @@
+"""Add latency sketches to metric rollups and the route_latency table
+
+Revision ID: 4b7e2d9a6c18
+Revises: 9e5a1c7d3f60
+Create Date: 2026-10-18 20:12:37.804215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d9a6c18'
+down_revision = '9e5a1c7d3f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rollups keep a NULL sketch and fall back to their histogram; `flask rollups backfill` fills them
+    with op.batch_alter_table('metric_rollup', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latency_sketch', sa.LargeBinary(), nullable=True))
+
+    op.create_table('route_latency',
+    sa.Column('http_method', sa.String(length=10), nullable=False),
+    sa.Column('http_route', sa.String(length=200), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('error_count', sa.Integer(), nullable=False),
+    sa.Column('duration_sum', sa.Float(), nullable=False),
+    sa.Column('latency_sketch', sa.LargeBinary(), nullable=True),
+    sa.PrimaryKeyConstraint('http_method', 'http_route', 'bucket_start')
+    )
+
+
+def downgrade():
+    op.drop_table('route_latency')
+
+    with op.batch_alter_table('metric_rollup', schema=None) as batch_op:
+        batch_op.drop_column('latency_sketch')
@@ -0,0 +1,34 @@
+"""Add website.updated_at watermark for the monitor's site registry
+
+Revision ID: 7a2c9e4f1b65
+Revises: 0d3a7c5e9b18
+Create Date: 2026-10-18 15:06:38.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2c9e4f1b65'
+down_revision = '0d3a7c5e9b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE website SET updated_at = CURRENT_TIMESTAMP")
+
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False,
+                              server_default=sa.func.now())
+        batch_op.create_index(batch_op.f('ix_website_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_website_updated_at'))
+        batch_op.drop_column('updated_at')
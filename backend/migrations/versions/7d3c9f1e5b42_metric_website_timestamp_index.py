@@ -0,0 +1,27 @@
+"""Replace the metric website_id index with (website_id, timestamp)
+
+Revision ID: 7d3c9f1e5b42
+Revises: 4b7e2d9a6c18
+Create Date: 2026-10-18 21:03:51.226840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3c9f1e5b42'
+down_revision = '4b7e2d9a6c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # On Postgres the index is created on the partitioned parent and cascades to every partition
+    op.create_index('ix_metric_website_id_timestamp', 'metric', ['website_id', 'timestamp'], unique=False)
+    op.drop_index('ix_metric_website_id', table_name='metric')
+
+
+def downgrade():
+    op.create_index('ix_metric_website_id', 'metric', ['website_id'], unique=False)
+    op.drop_index('ix_metric_website_id_timestamp', table_name='metric')
@@ -0,0 +1,49 @@
+"""Add website_status snapshot of each website's latest check
+
+Revision ID: 9e5a1c7d3f60
+Revises: f2b6d9c41e83
+Create Date: 2026-10-18 18:44:09.527131
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e5a1c7d3f60'
+down_revision = 'f2b6d9c41e83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('website_status',
+    sa.Column('website_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('uptime', sa.Float(), nullable=False),
+    sa.Column('response_time', sa.Float(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('failure_class', sa.String(length=20), nullable=True),
+    sa.Column('consecutive_failures', sa.Integer(), nullable=False),
+    sa.Column('last_checked_at', sa.DateTime(), nullable=False),
+    sa.Column('last_change_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['website_id'], ['website.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('website_id')
+    )
+    # Seed from each website's latest metric; the failure streak and change time start from that check
+    op.execute("""
+        INSERT INTO website_status (website_id, status, uptime, response_time, status_code, failure_class,
+                                    consecutive_failures, last_checked_at, last_change_at)
+        SELECT m.website_id,
+               CASE WHEN m.uptime >= 0.5 THEN 'up' ELSE 'down' END,
+               m.uptime, m.response_time, m.status_code, m.failure_class,
+               CASE WHEN m.uptime >= 0.5 THEN 0 ELSE 1 END,
+               m.timestamp, m.timestamp
+        FROM metric m
+        JOIN website w ON w.id = m.website_id
+        WHERE m.id IN (SELECT max(id) FROM metric GROUP BY website_id)
+    """)
+
+
+def downgrade():
+    op.drop_table('website_status')
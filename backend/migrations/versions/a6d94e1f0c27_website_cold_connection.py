@@ -0,0 +1,26 @@
+"""Add website.cold_connection opt-out for the pooled check client
+
+Revision ID: a6d94e1f0c27
+Revises: 3f1c2a9d7b40
+Create Date: 2026-10-18 10:02:11.503417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d94e1f0c27'
+down_revision = '3f1c2a9d7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cold_connection', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.drop_column('cold_connection')
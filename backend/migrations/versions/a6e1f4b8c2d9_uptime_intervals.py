@@ -0,0 +1,46 @@
+"""Add uptime_interval state-change periods for SLA reports
+
+Revision ID: a6e1f4b8c2d9
+Revises: 7d3c9f1e5b42
+Create Date: 2026-10-18 21:47:15.390562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1f4b8c2d9'
+down_revision = '7d3c9f1e5b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uptime_interval',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('website_id', sa.Integer(), nullable=False),
+    sa.Column('state', sa.String(length=10), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('ended_at', sa.DateTime(), nullable=True),
+    sa.Column('cause', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['website_id'], ['website.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('uptime_interval', schema=None) as batch_op:
+        batch_op.create_index('ix_uptime_interval_website_id_started_at', ['website_id', 'started_at'], unique=False)
+
+    # Open each website's current interval from its status snapshot; `flask sla backfill` replays older history
+    op.execute("""
+        INSERT INTO uptime_interval (website_id, state, started_at, ended_at, cause)
+        SELECT website_id, status, last_change_at, NULL,
+               CASE WHEN status = 'down' THEN failure_class END
+        FROM website_status
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('uptime_interval', schema=None) as batch_op:
+        batch_op.drop_index('ix_uptime_interval_website_id_started_at')
+
+    op.drop_table('uptime_interval')
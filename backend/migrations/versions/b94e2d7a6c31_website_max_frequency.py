@@ -0,0 +1,26 @@
+"""Add website.max_frequency ceiling for adaptive check cadence
+
+Revision ID: b94e2d7a6c31
+Revises: 7a2c9e4f1b65
+Create Date: 2026-10-18 15:48:02.661903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b94e2d7a6c31'
+down_revision = '7a2c9e4f1b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('max_frequency', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('website', schema=None) as batch_op:
+        batch_op.drop_column('max_frequency')
@@ -0,0 +1,41 @@
+"""Add metric_rollup for minute / hour / day metric aggregates
+
+Revision ID: c3f58a1d7e24
+Revises: b94e2d7a6c31
+Create Date: 2026-10-18 16:37:12.104588
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f58a1d7e24'
+down_revision = 'b94e2d7a6c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('metric_rollup',
+    sa.Column('website_id', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('up_count', sa.Float(), nullable=False),
+    sa.Column('latency_count', sa.Integer(), nullable=False),
+    sa.Column('latency_sum', sa.Float(), nullable=False),
+    sa.Column('latency_min', sa.Float(), nullable=True),
+    sa.Column('latency_max', sa.Float(), nullable=True),
+    sa.Column('bucket_50', sa.Integer(), nullable=False),
+    sa.Column('bucket_200', sa.Integer(), nullable=False),
+    sa.Column('bucket_500', sa.Integer(), nullable=False),
+    sa.Column('bucket_1000', sa.Integer(), nullable=False),
+    sa.Column('bucket_inf', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['website_id'], ['website.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('website_id', 'resolution', 'bucket_start')
+    )
+
+
+def downgrade():
+    op.drop_table('metric_rollup')
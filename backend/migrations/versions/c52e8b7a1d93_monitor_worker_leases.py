@@ -0,0 +1,36 @@
+"""Add monitor_worker heartbeat leases for sharded checking
+
+Revision ID: c52e8b7a1d93
+Revises: a6d94e1f0c27
+Create Date: 2026-10-18 11:20:47.902361
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e8b7a1d93'
+down_revision = 'a6d94e1f0c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monitor_worker',
+    sa.Column('id', sa.String(length=100), nullable=False),
+    sa.Column('hostname', sa.String(length=100), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('monitor_worker', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monitor_worker_heartbeat_at'), ['heartbeat_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('monitor_worker', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monitor_worker_heartbeat_at'))
+
+    op.drop_table('monitor_worker')
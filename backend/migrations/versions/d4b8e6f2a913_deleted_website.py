@@ -0,0 +1,35 @@
+"""Add deleted_website, the queue of websites whose raw metrics retention purges
+
+Revision ID: d4b8e6f2a913
+Revises: a6e1f4b8c2d9
+Create Date: 2026-10-19 10:12:44.207318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e6f2a913'
+down_revision = 'a6e1f4b8c2d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deleted_website',
+    sa.Column('website_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('website_id')
+    )
+
+    # Queue the metrics already orphaned; this is the last scan of the metric table for them
+    op.execute("""
+        INSERT INTO deleted_website (website_id, deleted_at)
+        SELECT DISTINCT website_id, CURRENT_TIMESTAMP FROM metric
+        WHERE website_id NOT IN (SELECT id FROM website)
+    """)
+
+
+def downgrade():
+    op.drop_table('deleted_website')
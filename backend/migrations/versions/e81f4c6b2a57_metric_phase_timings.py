@@ -0,0 +1,40 @@
+"""Add per-phase timings, status code, size and failure class to metric
+
+Revision ID: e81f4c6b2a57
+Revises: 5b7e0d3c9a12
+Create Date: 2026-10-18 13:41:27.918204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81f4c6b2a57'
+down_revision = '5b7e0d3c9a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('metric', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status_code', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('response_bytes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('failure_class', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('dns_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('connect_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('tls_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('ttfb_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('transfer_ms', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('metric', schema=None) as batch_op:
+        batch_op.drop_column('transfer_ms')
+        batch_op.drop_column('ttfb_ms')
+        batch_op.drop_column('tls_ms')
+        batch_op.drop_column('connect_ms')
+        batch_op.drop_column('dns_ms')
+        batch_op.drop_column('failure_class')
+        batch_op.drop_column('response_bytes')
+        batch_op.drop_column('status_code')
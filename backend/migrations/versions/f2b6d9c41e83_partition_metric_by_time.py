@@ -0,0 +1,76 @@
+"""Partition metric by timestamp on Postgres and drop its website foreign key
+
+Revision ID: f2b6d9c41e83
+Revises: c3f58a1d7e24
+Create Date: 2026-10-18 17:52:40.318207
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d9c41e83'
+down_revision = 'c3f58a1d7e24'
+branch_labels = None
+depends_on = None
+
+PREMAKE_PARTITIONS = 3
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # SQLite never enforced metric.website_id (foreign keys are off), so only stop
+        # website ids from being reused while metrics of deleted websites await purging
+        with op.batch_alter_table('website', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        return
+    if dialect != 'postgresql':
+        return
+
+    # Everything up to tomorrow stays in the existing table, attached as one partition;
+    # new rows go to daily partitions from then on
+    boundary = datetime.utcnow().date() + timedelta(days=1)
+    op.execute("ALTER TABLE metric DROP CONSTRAINT IF EXISTS metric_website_id_fkey")
+    op.execute("ALTER TABLE metric RENAME TO metric_legacy")
+    op.execute("ALTER TABLE metric_legacy RENAME CONSTRAINT metric_pkey TO metric_legacy_pkey")
+    op.execute("ALTER INDEX ix_metric_website_id RENAME TO ix_metric_legacy_website_id")
+    op.execute("CREATE TABLE metric (LIKE metric_legacy INCLUDING DEFAULTS, PRIMARY KEY (id, timestamp)) "
+               "PARTITION BY RANGE (timestamp)")
+    op.execute("ALTER SEQUENCE metric_id_seq OWNED BY metric.id")
+    op.execute("CREATE INDEX ix_metric_website_id ON metric (website_id)")
+
+    # A validated CHECK matching the bound lets ATTACH skip its own scan of the table
+    op.execute(f"ALTER TABLE metric_legacy ADD CONSTRAINT metric_legacy_range CHECK (timestamp < '{boundary}')")
+    op.execute(f"ALTER TABLE metric ATTACH PARTITION metric_legacy FOR VALUES FROM (MINVALUE) TO ('{boundary}')")
+    op.execute("ALTER TABLE metric_legacy DROP CONSTRAINT metric_legacy_range")
+
+    op.execute("CREATE TABLE metric_default PARTITION OF metric DEFAULT")
+    for index in range(PREMAKE_PARTITIONS + 1):
+        lower = boundary + timedelta(days=index)
+        op.execute(f"CREATE TABLE metric_p{lower:%Y%m%d} PARTITION OF metric "
+                   f"FOR VALUES FROM ('{lower}') TO ('{lower + timedelta(days=1)}')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        with op.batch_alter_table('website', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
+        return
+    if dialect != 'postgresql':
+        return
+
+    op.execute("CREATE TABLE metric_flat (LIKE metric INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO metric_flat SELECT * FROM metric")
+    op.execute("ALTER SEQUENCE metric_id_seq OWNED BY metric_flat.id")
+    op.execute("DROP TABLE metric")
+    op.execute("ALTER TABLE metric_flat RENAME TO metric")
+    op.execute("ALTER TABLE metric ADD CONSTRAINT metric_pkey PRIMARY KEY (id)")
+    op.execute("CREATE INDEX ix_metric_website_id ON metric (website_id)")
+    # Metrics of deleted websites would violate the restored foreign key
+    op.execute("DELETE FROM metric WHERE website_id NOT IN (SELECT id FROM website)")
+    op.create_foreign_key('metric_website_id_fkey', 'metric', 'website', ['website_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,17 @@
+import pytest
+from app import create_app, db
+from app.cache import response_cache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Flask app bound to a throwaway SQLite database."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app()
+    app.config["TESTING"] = True
+    response_cache.clear()  # user ids repeat across test databases
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime
+
+from app import db
+from app.alerting import AlertEvaluator
+from app.models import Alert, NotificationOutbox, User, Website
+
+
+def _result(website_id, uptime):
+    return {"website_id": website_id, "uptime": uptime, "response_time": 0 if not uptime else 120.0,
+            "timestamp": datetime.utcnow()}
+
+
+def _site():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    return website.id
+
+
+def test_only_transitions_touch_the_database(app):
+    website_id = _site()
+    evaluator = AlertEvaluator(confirm_failures=1)
+    evaluator.hydrate()
+
+    assert evaluator.evaluate([_result(website_id, 1)]) == []
+
+    notifications = evaluator.apply(evaluator.evaluate([_result(website_id, 0)]))
+    assert notifications[0]["to"] == "owner@example.com"
+    assert "DOWN" in notifications[0]["subject"]
+    assert Alert.query.filter_by(website_id=website_id, status="unresolved").count() == 1
+    assert NotificationOutbox.query.filter_by(status="pending").count() == 1
+
+    # Still down: no duplicate alert, no transition
+    assert evaluator.evaluate([_result(website_id, 0)]) == []
+
+    notifications = evaluator.apply(evaluator.evaluate([_result(website_id, 1)]))
+    assert "back UP" in notifications[0]["subject"]
+    assert Alert.query.filter_by(website_id=website_id, status="unresolved").count() == 0
+
+
+def test_hydrate_picks_up_existing_open_alerts(app):
+    website_id = _site()
+    db.session.add(Alert(website_id=website_id, alert_type="Website Down", status="unresolved"))
+    db.session.commit()
+
+    evaluator = AlertEvaluator()
+    evaluator.hydrate()
+    assert evaluator.evaluate([_result(website_id, 0)]) == []
+    assert evaluator.evaluate([_result(website_id, 1)])[0][1] == "up"
+
+
+def test_down_needs_confirmation_re_checks():
+    evaluator = AlertEvaluator(confirm_failures=2, confirm_checks=3)
+
+    assert evaluator.evaluate([_result(1, 0)]) == []
+    assert 1 in evaluator.confirming
+    assert evaluator.evaluate([_result(1, 1)]) == []
+    transitions = evaluator.evaluate([_result(1, 0)])
+    assert [(website_id, kind) for website_id, kind, _ in transitions] == [(1, "down")]
+    assert evaluator.confirming == {}
+
+
+def test_single_failure_within_window_is_a_blip():
+    evaluator = AlertEvaluator(confirm_failures=2, confirm_checks=3)
+
+    assert evaluator.evaluate([_result(1, 0)]) == []
+    assert evaluator.evaluate([_result(1, 1)]) == []
+    assert evaluator.evaluate([_result(1, 1)]) == []
+    assert evaluator.confirming == {}
+    # A later failure opens a fresh window rather than completing the old one
+    assert evaluator.evaluate([_result(1, 0)]) == []
+
+
+def test_hydrate_does_not_swap_in_a_snapshot_older_than_an_apply(app, monkeypatch):
+    website_id = _site()
+    evaluator = AlertEvaluator(confirm_failures=1)
+    evaluator.hydrate()
+    transitions = evaluator.evaluate([_result(website_id, 0)])
+
+    snapshot_taken, resume = threading.Event(), threading.Event()
+    execute = db.session.execute
+
+    def pausing_execute(*args, **kwargs):
+        result = execute(*args, **kwargs)
+        if threading.current_thread().name == "hydrate":
+            snapshot_taken.set()
+            resume.wait(timeout=0.5)  # another batch's apply commits here unless hydrate holds the lock
+        return result
+
+    def in_app_context(fn, *args):
+        with app.app_context():
+            fn(*args)
+
+    monkeypatch.setattr(db.session, "execute", pausing_execute)
+    hydrate = threading.Thread(target=in_app_context, args=(evaluator.hydrate,), name="hydrate")
+    hydrate.start()
+    snapshot_taken.wait(timeout=1)
+    apply = threading.Thread(target=in_app_context, args=(evaluator.apply, transitions), name="apply")
+    apply.start()
+    apply.join(timeout=0.2)
+    resume.set()
+    hydrate.join()
+    apply.join()
+
+    alert = Alert.query.filter_by(website_id=website_id, status="unresolved").one()
+    assert evaluator.open_alerts == {website_id: alert.id}
+    assert evaluator.evaluate([_result(website_id, 0)]) == []  # no second alert for the same outage
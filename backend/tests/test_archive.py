@@ -0,0 +1,95 @@
+import os
+from datetime import datetime, timedelta
+
+from app import archive, db, retention
+from app.metric_buffer import write_metrics
+from app.models import Metric, User, Website
+from app.routes.metrics import ExportMetrics, GetMetrics
+
+T0 = datetime(2026, 1, 31, 23, 58)
+
+
+def _row(metric_id, minutes, **extra):
+    row = {"id": metric_id, "website_id": 1, "timestamp": T0 + timedelta(minutes=minutes), "uptime": 1.0,
+           "response_time": 10.0 * metric_id, "status_code": 200, "response_bytes": 512, "failure_class": None,
+           "dns_ms": 1.5, "connect_ms": None, "tls_ms": None, "ttfb_ms": 4.0, "transfer_ms": 0.5}
+    row.update(extra)
+    return row
+
+
+def test_append_and_read_round_trip_columns(tmp_path):
+    rows = [_row(1, 0), _row(2, 1, uptime=0.0, status_code=None, response_bytes=None, failure_class="timeout"),
+            _row(3, 3)]
+    assert archive.append(1, "2026-01", rows[:2], root=tmp_path) == 2
+    assert archive.append(1, "2026-02", rows[2:], root=tmp_path) == 1
+
+    read = list(archive.read([1], root=tmp_path))
+    assert read == rows
+    # Only the months overlapping the range are opened
+    assert [row["id"] for row in archive.read([1], since=T0 + timedelta(minutes=1), root=tmp_path)] == [2, 3]
+    assert [row["id"] for row in archive.read([1], until=datetime(2026, 2, 1), root=tmp_path)] == [1, 2]
+
+
+def test_appends_skip_archived_ids_and_repair_torn_writes(tmp_path):
+    archive.append(1, "2026-01", [_row(1, 0), _row(2, 1)], root=tmp_path)
+    # A crash after writing the first column of the next append
+    with open(tmp_path / "1" / "2026-01" / "id.bin", "ab") as handle:
+        handle.write(b"\x07" * 8)
+
+    with archive.Segment(str(tmp_path / "1" / "2026-01")) as segment:
+        assert len(segment) == 2
+    assert archive.append(1, "2026-01", [_row(2, 1), _row(3, 2)], root=tmp_path) == 1
+    assert [row["id"] for row in archive.read([1], root=tmp_path)] == [1, 2, 3]
+    assert os.path.getsize(tmp_path / "1" / "2026-01" / "id.bin") == 3 * 8
+
+
+def _websites(count=1):
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    websites = [Website(user_id=user.id, url=f"http://example{i}.com", name=f"Example {i}") for i in range(count)]
+    db.session.add_all(websites)
+    db.session.commit()
+    return user, [website.id for website in websites]
+
+
+def test_retention_moves_expired_rows_to_the_archive(app, tmp_path, monkeypatch):
+    root = tmp_path / "archive"  # tmp_path also holds the test database
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(root))
+    user, [website_id, removed] = _websites(2)
+    now = datetime(2026, 3, 31, 12)
+    for site in (website_id, removed):
+        write_metrics([{"website_id": site, "response_time": float(day), "uptime": 1,
+                        "timestamp": now - timedelta(days=day)} for day in range(1, 41)])
+
+    summary = retention.run_retention(now=now, retention_days=30)
+    assert summary["rows_archived"] == summary["rows_deleted"] == 2 * 10
+    assert Metric.query.count() == 2 * 30
+
+    with app.test_request_context(f"/metrics/export?website_id={website_id}&format=ndjson"):
+        response = ExportMetrics.get.__wrapped__(ExportMetrics(), user)
+        body = b"".join(response.response).decode()
+    # Archived rows come back first, then the hot ones, oldest first throughout
+    assert [float(line.split('"response_time": ')[1].split(",")[0]) for line in body.splitlines()] == \
+        [float(day) for day in range(40, 0, -1)]
+
+    # Range history pages straight through from the archive into the table
+    history = f"/metrics?website_id={website_id}&from=2026-01-01T00:00:00Z"
+    seen, cursor = [], ""
+    while cursor is not None:
+        with app.test_request_context(f"{history}&limit=15" + (f"&cursor={cursor}" if cursor else "")):
+            page, status = GetMetrics.get.__wrapped__(GetMetrics(), user)
+        assert status == 200
+        seen.extend(metric["response_time"] for metric in page["metrics"])
+        cursor = page["next_cursor"]
+    assert seen == [float(day) for day in range(40, 0, -1)]
+    with app.test_request_context(f"{history}&points=5"):
+        series, _ = GetMetrics.get.__wrapped__(GetMetrics(), user)
+    assert series["total"] == 40 and len(series["metrics"]) == 5
+    assert series["metrics"][0]["response_time"] == 40.0 and series["metrics"][-1]["response_time"] == 1.0
+
+    db.session.delete(db.session.get(Website, removed))
+    db.session.commit()
+    assert retention.run_retention(now=now, retention_days=30)["archives_removed"] == 1
+    assert os.listdir(root) == [str(website_id)]
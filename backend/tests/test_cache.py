@@ -0,0 +1,105 @@
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import jwt
+
+from app import db
+from app.cache import MemoryBackend, ResponseCache, response_cache
+from app.metric_buffer import write_metrics
+from app.models import User, Website
+from app.routes.auth import SECRET_KEY
+
+
+class Counter:
+    def __init__(self, status=200, delay=0):
+        self.calls, self.status, self.delay = 0, status, delay
+
+    def get(self, resource, current_user):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"calls": self.calls}, self.status
+
+
+def test_memory_backend_expires_and_evicts_least_recently_used(monkeypatch):
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    assert backend.get("a") == 1
+    backend.set("c", 3, ttl=60)
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (1, None, 3)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert backend.get("a") is None
+
+
+def test_cached_responses_follow_the_users_data_version(app):
+    cache = ResponseCache(MemoryBackend(), ttl=60)
+    counter = Counter()
+    get = cache.cached("summary")(counter.get)
+    alice, bob = SimpleNamespace(id=1), SimpleNamespace(id=2)
+
+    with app.test_request_context("/summary"):
+        assert get(None, current_user=alice) == ({"calls": 1}, 200)
+        assert get(None, current_user=alice) == ({"calls": 1}, 200)
+        assert get(None, current_user=bob) == ({"calls": 2}, 200)
+        cache.bump([alice.id])
+        assert get(None, current_user=alice) == ({"calls": 3}, 200)
+        assert get(None, current_user=bob) == ({"calls": 2}, 200)
+    with app.test_request_context("/summary?days=7"):
+        assert get(None, current_user=alice) == ({"calls": 4}, 200)
+
+    failing = Counter(status=500)
+    get = cache.cached("failing")(failing.get)
+    with app.test_request_context("/failing"):
+        get(None, current_user=alice)
+        get(None, current_user=alice)
+    assert failing.calls == 2
+
+
+def test_concurrent_misses_compute_once(app):
+    cache = ResponseCache(MemoryBackend(), ttl=60)
+    counter = Counter(delay=0.2)
+    get = cache.cached("slow")(counter.get)
+    results = []
+
+    def request():
+        with app.test_request_context("/slow"):
+            results.append(get(None, current_user=SimpleNamespace(id=1)))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.calls == 1
+    assert results == [({"calls": 1}, 200)] * 8
+
+
+def _user_with_website():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    return user.id, website.id
+
+
+def test_monitor_writes_and_write_routes_bump_the_owner(app):
+    user_id, website_id = _user_with_website()
+    version = response_cache.backend.version(user_id)
+
+    write_metrics([{"website_id": website_id, "response_time": 10.0, "uptime": 1, "timestamp": datetime.utcnow()}])
+    assert response_cache.backend.version(user_id) == version + 1
+
+    headers = {"Authorization": f"Bearer {jwt.encode({'user_id': user_id}, SECRET_KEY, algorithm='HS256')}"}
+    client = app.test_client()
+    assert client.get("/containers/summary", headers=headers).status_code == 200
+    assert response_cache.backend.version(user_id) == version + 1
+    assert client.post("/containers/", json={"name": "web", "image": "nginx"}, headers=headers).status_code == 201
+    assert response_cache.backend.version(user_id) == version + 2
+    assert client.get("/containers/summary", headers=headers).get_json()["total"] == 1
@@ -0,0 +1,38 @@
+from app.check_scheduler import CheckScheduler
+
+
+def test_sites_fire_on_their_own_interval():
+    scheduler = CheckScheduler(min_interval=10, start_spread=1)
+    scheduler.sync({1: 60, 2: 300}, now=0)
+
+    fired = {1: 0, 2: 0}
+    for second in range(0, 601):
+        for website_id in scheduler.pop_due(now=second):
+            fired[website_id] += 1
+
+    assert fired[1] == 10
+    assert fired[2] == 2
+
+
+def test_start_times_are_spread_and_lag_is_reported():
+    scheduler = CheckScheduler(min_interval=10, start_spread=60)
+    scheduler.sync({website_id: 300 for website_id in range(1000)}, now=0)
+
+    first_second = scheduler.pop_due(now=1)
+    assert 0 < len(first_second) < 100  # ~1/60th of the sites, not all of them
+
+    scheduler.pop_due(now=120)
+    stats = scheduler.lag_stats()
+    assert stats["dispatched"] == 1000
+    assert stats["max_lag"] > 0
+
+
+def test_removed_sites_are_not_dispatched_and_missed_slots_are_skipped():
+    scheduler = CheckScheduler(min_interval=10, start_spread=1)
+    scheduler.sync({1: 10, 2: 10}, now=0)
+    scheduler.sync({1: 10}, now=0)
+
+    assert scheduler.pop_due(now=5) == [1]
+    # Stalled for 100s: site 1 fires once, not ten times
+    assert scheduler.pop_due(now=105) == [1]
+    assert scheduler.lag_stats()["missed_slots"] > 0
@@ -0,0 +1,46 @@
+from app.instrumentation import Registry
+
+
+def test_text_exposition_format():
+    registry = Registry()
+    checks = registry.counter("checks_total", "Checks by outcome", ["outcome"])
+    depth = registry.gauge("queue_depth", "Queued rows")
+    latency = registry.histogram("latency_seconds", "Check latency", buckets=(0.1, 1))
+
+    checks.inc(outcome="up")
+    checks.inc(2, outcome='timeout"x')
+    depth.set_function(lambda: 7)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3)
+
+    text = registry.render()
+    assert "# TYPE checks_total counter" in text
+    assert 'checks_total{outcome="up"} 1' in text
+    assert 'checks_total{outcome="timeout\\"x"} 2' in text
+    assert "queue_depth 7" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+    assert "latency_seconds_sum 3.55" in text
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = Registry()
+    assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+
+
+def test_metrics_endpoint(app, monkeypatch):
+    from app import monitor  # noqa: F401 — registers the monitor's metrics
+
+    client = app.test_client()
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/internal/metrics").status_code == 404  # disabled until a token is configured
+
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    assert client.get("/internal/metrics").status_code == 401
+    response = client.get("/internal/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "watchly_monitor_checks_total" in response.get_data(as_text=True)
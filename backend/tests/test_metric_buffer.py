@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from app import db
+from app.metric_buffer import MetricBuffer, write_metrics
+from app.models import Metric, User, Website
+
+
+def _website():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    return website.id
+
+
+def test_rows_are_written_on_flush(app):
+    website_id = _website()
+    buffer = MetricBuffer(app, flush_rows=1000, flush_seconds=60)
+
+    buffer.add([{"website_id": website_id, "response_time": 12.5, "uptime": 1, "status_code": 200}] * 3)
+    assert Metric.query.count() == 0
+    assert len(buffer) == 3
+
+    assert buffer.flush() == 3
+    assert len(buffer) == 0
+    metrics = Metric.query.all()
+    assert [metric.status_code for metric in metrics] == [200, 200, 200]
+    assert all(metric.timestamp is not None for metric in metrics)
+    assert metrics[0].dns_ms is None
+
+
+def test_reaching_flush_rows_wakes_the_writer(app):
+    website_id = _website()
+    buffer = MetricBuffer(app, flush_rows=2, flush_seconds=60)
+
+    buffer.add([{"website_id": website_id, "response_time": 1.0, "uptime": 1}] * 2)
+    buffer._thread.join(timeout=0.5)  # the writer loops forever; just give it a moment
+    db.session.remove()
+    assert Metric.query.count() == 2
+
+
+def test_failed_flush_keeps_rows_and_caps_the_buffer(app, monkeypatch):
+    buffer = MetricBuffer(app, flush_rows=1000, flush_seconds=60, max_rows=4)
+
+    def broken(rows):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr("app.metric_buffer.write_metrics", broken)
+    buffer.add([{"website_id": 1, "response_time": float(i), "uptime": 1} for i in range(6)])
+    assert len(buffer) == 4  # oldest rows dropped
+    assert buffer.flush() == 0
+    assert len(buffer) == 4
+    buffer._rows.clear()  # nothing left for the background writer once the patch is undone
+
+
+def test_failed_flush_requeues_ahead_of_newer_rows(app, monkeypatch):
+    buffer = MetricBuffer(app, flush_rows=1000, flush_seconds=60, max_rows=4)
+    buffer.add([{"website_id": 1, "response_time": float(i), "uptime": 1} for i in range(3)])
+    stamped = [row["timestamp"] for row in buffer._rows]
+
+    def broken(rows):
+        # Checks finishing while the write hangs land in the buffer behind the batch
+        buffer.add([{"website_id": 1, "response_time": float(i), "uptime": 1} for i in (3, 4)])
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr("app.metric_buffer.write_metrics", broken)
+    assert buffer.flush() == 0
+    assert [row["response_time"] for row in buffer._rows] == [1.0, 2.0, 3.0, 4.0]  # oldest dropped
+    assert [row["timestamp"] for row in buffer._rows[:2]] == stamped[1:]
+
+    buffer.add([{"website_id": 1, "response_time": 5.0, "uptime": 1}])
+    assert [row["response_time"] for row in buffer._rows] == [2.0, 3.0, 4.0, 5.0]
+    buffer._rows.clear()
+
+
+def test_write_metrics_uses_one_statement_for_the_batch(app):
+    website_id = _website()
+    now = datetime.utcnow()
+    write_metrics([{"website_id": website_id, "response_time": 1.0, "uptime": 1, "timestamp": now}
+                   for _ in range(50)])
+    assert Metric.query.count() == 50
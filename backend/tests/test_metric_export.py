@@ -0,0 +1,67 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Metric, User, Website
+from app.routes import metrics
+from app.routes.metrics import ExportMetrics
+
+T0 = datetime(2026, 3, 1, 12)
+
+
+def _seed():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    other = User(name="Other", email="other@example.com")
+    other.set_password("securepass")
+    db.session.add_all([user, other])
+    db.session.commit()
+    websites = [Website(user_id=owner.id, url=f"http://{owner.name.lower()}.com", name=owner.name)
+                for owner in (user, user, other)]
+    db.session.add_all(websites)
+    db.session.commit()
+    db.session.add_all([Metric(website_id=website.id, response_time=10.0 * minute, uptime=1,
+                               status_code=200, timestamp=T0 + timedelta(minutes=minute))
+                        for website in websites for minute in range(5)])
+    db.session.commit()
+    return user, [website.id for website in websites]
+
+
+def _export(app, user, query):
+    with app.test_request_context(f"/metrics/export?{query}"):
+        response = ExportMetrics.get.__wrapped__(ExportMetrics(), user)
+        if isinstance(response, tuple):
+            return response
+        return response, b"".join(response.response)
+
+
+def test_export_streams_csv_in_batches(app, monkeypatch):
+    monkeypatch.setattr(metrics, "EXPORT_BATCH_ROWS", 2)
+    user, (first, _, _) = _seed()
+
+    response, body = _export(app, user, f"website_id={first}&from=2026-03-01T12:01:00Z&to=2026-03-01T12:04:00")
+
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert [row["response_time"] for row in rows] == ["10.0", "20.0", "30.0"]
+    assert rows[0]["timestamp"] == "2026-03-01T12:01:00"
+    assert list(rows[0]) == list(metrics.EXPORT_COLUMNS)
+
+
+def test_export_ndjson_gzip_covers_only_the_users_websites(app):
+    user, (first, second, foreign) = _seed()
+
+    response, body = _export(app, user, "format=ndjson&gzip=true")
+
+    assert response.mimetype == "application/gzip"
+    rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+    assert len(rows) == 10
+    assert {row["website_id"] for row in rows} == {first, second}
+    assert [row["timestamp"] for row in rows] == sorted(row["timestamp"] for row in rows)
+
+    assert _export(app, user, f"website_id={foreign}")[1] == 404
+    assert _export(app, user, "format=xml")[1] == 400
+    assert _export(app, user, "from=yesterday")[1] == 400
@@ -0,0 +1,89 @@
+import math
+from datetime import datetime, timedelta
+
+from app import db
+from app.downsample import lttb
+from app.models import Metric, User, Website
+from app.routes.metrics import AddMetric, GetMetrics
+
+T0 = datetime(2026, 3, 1, 12)
+
+
+def test_lttb_keeps_the_ends_and_the_spikes():
+    xs = list(range(1000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[437] = 25.0
+
+    picked = lttb(xs, ys, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert picked == sorted(set(picked))
+    assert 437 in picked
+
+    assert lttb(xs[:10], ys[:10], 50) == list(range(10))
+    assert lttb(xs, ys, 2) == [0, 999]
+
+
+def _seed(rows=30):
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    # Two checks share every timestamp, so paging has to break ties on id
+    db.session.add_all([Metric(website_id=website.id, response_time=float(index), uptime=1,
+                               timestamp=T0 + timedelta(minutes=index // 2)) for index in range(rows)])
+    db.session.commit()
+    return user, website.id
+
+
+def _get(app, user, query):
+    with app.test_request_context(f"/metrics?{query}"):
+        return GetMetrics.get.__wrapped__(GetMetrics(), user)
+
+
+def test_range_pages_with_a_keyset_cursor(app):
+    user, website_id = _seed()
+
+    seen, cursor = [], None
+    while True:
+        query = f"website_id={website_id}&from=2026-03-01T12:02:00Z&to=2026-03-01T12:12:00&limit=7"
+        body, status = _get(app, user, query + (f"&cursor={cursor}" if cursor else ""))
+        assert status == 200
+        seen.extend(metric["response_time"] for metric in body["metrics"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [float(index) for index in range(4, 24)]
+
+    # Without range parameters the endpoint still returns the latest rows, newest first
+    body, status = _get(app, user, f"website_id={website_id}&limit=3")
+    assert [metric["response_time"] for metric in body] == [29.0, 28.0, 27.0]
+
+
+def test_points_downsample_the_whole_range(app):
+    user, website_id = _seed(rows=400)
+
+    body, status = _get(app, user, f"website_id={website_id}&from=2026-03-01T00:00:00&points=40")
+    assert status == 200
+    assert (len(body["metrics"]), body["total"], body["downsampled"]) == (40, 400, True)
+    assert body["metrics"][0]["response_time"] == 0.0 and body["metrics"][-1]["response_time"] == 399.0
+
+    assert _get(app, user, f"website_id={website_id}&points=40&cursor=abc")[1] == 400
+    assert _get(app, user, f"website_id={website_id}&cursor=not-a-cursor")[1] == 400
+    assert _get(app, user, f"website_id={website_id + 1}&points=40")[1] == 404
+
+
+def test_metrics_are_only_added_to_your_live_websites(app):
+    user, website_id = _seed(rows=0)
+
+    def add(target_id):
+        with app.test_request_context("/metrics/add", method="POST",
+                                      json={"website_id": target_id, "response_time": 12.0, "uptime": 1}):
+            return AddMetric.post.__wrapped__(AddMetric(), user)
+
+    assert add(website_id)[1] == 201
+    assert add(website_id + 1)[1] == 404  # no such website: metric has no foreign key to stop it
+    assert Metric.query.count() == 1
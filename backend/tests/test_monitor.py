@@ -0,0 +1,264 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app import db
+from app.alerting import AlertEvaluator
+from app.models import Metric, User, Website
+from app.check_scheduler import CheckScheduler
+from app.monitor import (CONFIRM_DELAY_SECONDS, METRIC_FIELDS, STABLE_CHECKS, MonitorService, adaptive_interval,
+                         check_key, check_websites, close_http_client, frequency_seconds, get_http_client, run_checks)
+from app.metric_buffer import metric_buffer
+from app.registry import SiteRegistry
+
+
+@pytest.fixture
+def target():
+    """Local HTTP target that counts the requests it receives per path."""
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] = hits.get(self.path, 0) + 1
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}", hits
+    server.shutdown()
+
+
+@pytest.fixture
+def keepalive_target():
+    """Local HTTP/1.1 target that counts the TCP connections it accepts."""
+    connections = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}", connections
+    server.shutdown()
+
+
+def _sites(*specs):
+    ids = []
+    for i, (url, settings) in enumerate(specs):
+        user = User(name=f"User {i}", email=f"user{i}@example.com")
+        user.set_password("securepass")
+        db.session.add(user)
+        db.session.commit()
+        website = Website(user_id=user.id, url=url, name=f"Site {i}", **settings)
+        db.session.add(website)
+        db.session.commit()
+        ids.append(website.id)
+    return ids
+
+
+def test_equivalent_urls_share_a_check_key(app):
+    a, b, c = (db.session.get(Website, website_id) for website_id in _sites(
+        ("HTTP://Example.com:80", {}),
+        ("http://example.com/#top", {}),
+        ("http://example.com/", {"check_mode": "head"}),
+    ))
+
+    assert check_key(a) == check_key(b)
+    assert check_key(a) != check_key(c)
+
+
+def test_one_request_fans_out_to_every_subscriber(app, target):
+    host, hits = target
+    ids = _sites(
+        (f"http://{host}/shared", {}),
+        (f"HTTP://{host}/shared#frag", {}),
+        (f"http://{host}/shared", {}),
+        (f"http://{host}/other", {}),
+    )
+
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+    assert len(registry.groups) == 2
+
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await run_checks(app, registry.get(ids), client, asyncio.Semaphore(5), AlertEvaluator())
+
+    results = asyncio.run(run())
+    metric_buffer.flush()
+
+    assert hits == {"/shared": 1, "/other": 1}
+    assert sorted(result["website_id"] for result in results) == sorted(ids)
+    assert Metric.query.count() == 4
+    assert {metric.website_id for metric in Metric.query.filter_by(status_code=200)} == set(ids)
+
+
+def test_warm_sites_reuse_pooled_connections_and_cold_sites_do_not(app, keepalive_target):
+    host, connections = keepalive_target
+    warm, cold = (db.session.get(Website, website_id) for website_id in _sites(
+        (f"http://{host}/warm", {}),
+        (f"http://{host}/cold", {"cold_connection": True}),
+    ))
+
+    async def run():
+        client = get_http_client()
+        try:
+            assert get_http_client() is client
+            warm_results = [await check_websites(warm, client) for _ in range(3)]
+            warm_connections = len(connections)
+            cold_results = [await check_websites(cold, client) for _ in range(3)]
+            return warm_results + cold_results, warm_connections
+        finally:
+            await close_http_client()
+
+    results, warm_connections = asyncio.run(run())
+
+    assert [result["uptime"] for result in results] == [1] * 6
+    assert warm_connections == 1  # three checks over one keep-alive connection
+    assert len(connections) == 4  # plus a fresh one per cold check
+
+
+def test_group_members_keep_their_own_interval(app):
+    service = MonitorService(app, registry=SiteRegistry(frequency_seconds, check_key))
+    service.registry.groups = {"key": {1: 60, 2: 300}}
+
+    assert sorted(service._due_members("key", now=1000)) == [1, 2]
+    assert service._due_members("key", now=1060) == [1]
+    assert service._due_members("key", now=1240) == [1]
+    assert sorted(service._due_members("key", now=1300)) == [1, 2]
+
+
+def test_stable_sites_back_off_up_to_their_ceiling(app):
+    site = db.session.get(Website, _sites(("http://example.com", {"frequency": 60, "max_frequency": 300}))[0])
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+    target = registry.targets[site.id]
+
+    assert adaptive_interval(target, 0) == 60
+    assert adaptive_interval(target, STABLE_CHECKS) == 120
+    assert adaptive_interval(target, STABLE_CHECKS * 2) == 240
+    assert adaptive_interval(target, STABLE_CHECKS * 10) == 300
+
+
+def test_unconfirmed_failure_pulls_the_next_check_in(app):
+    site_id = _sites(("http://example.com", {"frequency": 300}))[0]
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+    scheduler = CheckScheduler(min_interval=1, start_spread=0)
+    service = MonitorService(app, scheduler=scheduler, registry=registry,
+                             evaluator=AlertEvaluator(confirm_failures=2, confirm_checks=3))
+    key = registry.targets[site_id].key
+    scheduler.sync(service._intervals())
+    assert scheduler.pop_due(now=time.monotonic() + 1) == [key]
+
+    results = [{"website_id": site_id, "uptime": 0, "response_time": 0}]
+    service.evaluator.evaluate(results)
+    service._adapt([key], results)
+
+    assert 0 < scheduler.seconds_until_next() <= CONFIRM_DELAY_SECONDS
+    assert service.stats["rechecks"] == 1
+
+
+class SlowProbe:
+    """Stands in for check_websites: every check hangs until ``release`` is set."""
+
+    def __init__(self):
+        self.calls, self.active, self.peak = 0, 0, 0
+        self.release = None
+
+    async def __call__(self, website, client=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await self.release.wait()
+        self.active -= 1
+        return {"website_id": website.id, "timestamp": datetime.utcnow(),
+                **dict.fromkeys(METRIC_FIELDS), "response_time": 1.0, "uptime": 1}
+
+
+def _slow_service(app, monkeypatch, sites):
+    probe = SlowProbe()
+    monkeypatch.setattr("app.monitor.check_websites", probe)
+    _sites(*((f"http://site{i}.example.com", {"frequency": 10}) for i in range(sites)))
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+    clock = [time.monotonic()]
+    scheduler = CheckScheduler(min_interval=1, start_spread=0, clock=lambda: clock[0])
+    service = MonitorService(app, scheduler=scheduler, registry=registry, evaluator=AlertEvaluator())
+    scheduler.sync(service._intervals())
+    clock[0] += 1  # past every start phase
+    return service, probe, clock
+
+
+def test_slow_checks_are_capped_and_coalesced(app, monkeypatch):
+    service, probe, clock = _slow_service(app, monkeypatch, sites=3)
+
+    async def run():
+        probe.release = asyncio.Event()
+        service._semaphore = asyncio.Semaphore(2)
+        service._dispatch(None)
+        await asyncio.sleep(0.05)
+        assert (probe.calls, probe.peak) == (2, 2)  # the third check waits for a slot
+
+        for _ in range(3):  # every site is still running at its next deadlines
+            clock[0] += 10
+            service._dispatch(None)
+        await asyncio.sleep(0.05)
+        assert probe.calls == 2
+
+        probe.release.set()
+        await asyncio.gather(*service._tasks)
+
+    asyncio.run(run())
+    metric_buffer.flush()
+
+    assert probe.calls == 3 and probe.peak == 2
+    assert service.stats["dispatched"] == 3 and service.stats["overruns"] == 9
+    assert service.stats["completed"] == 3 and not service.in_flight
+    assert Metric.query.count() == 3
+
+
+def test_checks_over_max_pending_are_shed(app, monkeypatch):
+    monkeypatch.setattr("app.monitor.MAX_PENDING", 2)
+    service, probe, clock = _slow_service(app, monkeypatch, sites=3)
+
+    async def run():
+        probe.release = asyncio.Event()
+        service._semaphore = asyncio.Semaphore(10)
+        service._dispatch(None)
+        await asyncio.sleep(0.05)
+        assert len(service.in_flight) == 2
+
+        probe.release.set()
+        await asyncio.gather(*service._tasks)
+
+    asyncio.run(run())
+    metric_buffer.flush()
+
+    assert probe.calls == 2
+    assert service.stats["shed"] == 1 and service.stats["dispatched"] == 2
+    assert not service.in_flight
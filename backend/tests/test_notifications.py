@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app import db
+from app.models import NotificationOutbox
+from app.notifications import QUEUE_DEPTH, OutboxDispatcher
+from app.utils import email_utils
+
+
+@pytest.fixture
+def email_worker(monkeypatch):
+    """Local stand-in for the Cloudflare email worker; set ``status`` to control its reply."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        status = 200
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(json.loads(body))
+            reply = b"" if Handler.status == 200 else b"upstream mail relay unavailable"
+            self.send_response(Handler.status)
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(email_utils, "CLOUDFLARE_WORKER_URL", f"http://127.0.0.1:{server.server_address[1]}/")
+    yield Handler, received
+    server.shutdown()
+
+
+def _queue(count):
+    for i in range(count):
+        db.session.add(NotificationOutbox(to_email=f"user{i}@example.com", subject="Down", message="body",
+                                          next_attempt_at=datetime.utcnow()))
+    db.session.commit()
+
+
+def _dispatch(app):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return await OutboxDispatcher(app).dispatch_once(client)
+    return asyncio.run(run())
+
+
+def test_pending_notifications_are_delivered_once(app, email_worker):
+    _, received = email_worker
+    _queue(3)
+
+    assert _dispatch(app) == 3
+    assert _dispatch(app) == 0
+    assert sorted(r["to"] for r in received) == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert NotificationOutbox.query.filter_by(status="sent").count() == 3
+    assert QUEUE_DEPTH.value() == 0
+
+
+def test_failed_delivery_backs_off_then_gives_up(app, email_worker, monkeypatch):
+    handler, received = email_worker
+    handler.status = 502
+    monkeypatch.setattr("app.notifications.MAX_ATTEMPTS", 2)
+    _queue(1)
+
+    assert _dispatch(app) == 1
+    row = NotificationOutbox.query.one()
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert row.last_error == "HTTP 502: upstream mail relay unavailable"
+    assert QUEUE_DEPTH.value() == 1  # still waiting for its retry
+    assert row.next_attempt_at > datetime.utcnow()
+    assert _dispatch(app) == 0  # not due yet
+
+    row.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    assert _dispatch(app) == 1
+    db.session.expire_all()
+    assert NotificationOutbox.query.one().status == "failed"
+    assert len(received) == 2
+
+
+def test_unreachable_worker_error_is_recorded(app, monkeypatch):
+    monkeypatch.setattr(email_utils, "CLOUDFLARE_WORKER_URL", "http://127.0.0.1:9/")  # discard port: refused
+    _queue(1)
+
+    assert _dispatch(app) == 1
+    row = NotificationOutbox.query.one()
+    assert row.status == "pending"
+    assert row.last_error.startswith("ConnectError")
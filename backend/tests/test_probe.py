@@ -0,0 +1,141 @@
+import asyncio
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.probe import _new_phases, _tracer, probe, timed_transport
+
+
+@pytest.fixture(scope="module")
+def target():
+    """Local HTTP target: /slow sleeps before replying, /error returns 500, /big is 4 MB, /nohead rejects HEAD."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/slow":
+                time.sleep(0.5)
+            size = 4 * 1024 * 1024 if self.path == "/big" else 2048
+            self.send_response(500 if self.path == "/error" else 200)
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            try:
+                self.wfile.write(b"x" * size)
+            except OSError:
+                pass  # the client stopped reading
+
+        def do_HEAD(self):
+            self.send_response(405 if self.path == "/nohead" else 200)
+            self.send_header("Content-Length", "0" if self.path == "/nohead" else "2048")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"localhost:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _probe(url, timeout=2, **settings):
+    async def run():
+        async with httpx.AsyncClient(transport=timed_transport()) as client:
+            return await probe(client, url, timeout, **settings)
+    return asyncio.run(run())
+
+
+def test_successful_check_records_phases(target):
+    outcome = _probe(f"http://{target}/")
+
+    assert outcome["uptime"] == 1
+    assert outcome["failure_class"] is None
+    assert outcome["status_code"] == 200
+    assert outcome["response_bytes"] == 2048
+    assert outcome["dns_ms"] > 0  # "localhost" went through the resolver
+    assert outcome["ttfb_ms"] > 0
+    assert outcome["tls_ms"] == 0
+    phases = outcome["dns_ms"] + outcome["connect_ms"] + outcome["ttfb_ms"] + outcome["transfer_ms"]
+    assert phases <= outcome["response_time"]
+
+
+def test_ttfb_starts_when_the_request_is_sent(monkeypatch):
+    phases = _new_phases()
+    trace = _tracer(phases)
+    clock = iter([0.0, 0.01, 0.02, 0.05, 0.1, 0.3])
+    monkeypatch.setattr("app.probe.time.perf_counter", lambda: next(clock))
+
+    async def run():
+        for step in ("send_request_headers", "send_request_body", "receive_response_headers"):
+            await trace(f"http11.{step}.started", {})
+            await trace(f"http11.{step}.complete", {})
+
+    asyncio.run(run())
+    assert phases["ttfb_ms"] == pytest.approx(300)  # request headers, body and the wait for the response
+    assert phases["_marks"] == {}
+
+
+def test_http_error_status_is_classified(target):
+    outcome = _probe(f"http://{target}/error")
+
+    assert outcome["uptime"] == 0
+    assert outcome["status_code"] == 500
+    assert outcome["failure_class"] == "http_error"
+
+
+def test_timeout_is_classified(target):
+    outcome = _probe(f"http://{target}/slow", timeout=0.1)
+
+    assert outcome["uptime"] == 0
+    assert outcome["response_time"] == 0
+    assert outcome["failure_class"] == "timeout"
+
+
+def test_refused_connection_is_classified():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # nothing listens once the socket is closed
+
+    outcome = _probe(f"http://127.0.0.1:{port}/")
+
+    assert outcome["failure_class"] == "connect_refused"
+    assert outcome["dns_ms"] == 0
+
+
+def test_unresolvable_host_is_classified():
+    outcome = _probe("http://does-not-exist.invalid/")
+
+    assert outcome["failure_class"] == "dns"
+
+
+def test_stream_mode_stops_at_byte_cap(target):
+    outcome = _probe(f"http://{target}/big", mode="stream", max_body_bytes=16 * 1024)
+
+    assert outcome["uptime"] == 1
+    assert 16 * 1024 <= outcome["response_bytes"] < 4 * 1024 * 1024
+
+
+def test_stream_mode_with_zero_cap_reads_headers_only(target):
+    outcome = _probe(f"http://{target}/big", mode="stream", max_body_bytes=0)
+
+    assert outcome["status_code"] == 200
+    assert outcome["response_bytes"] < 4 * 1024 * 1024
+
+
+def test_head_mode_sends_no_body(target):
+    outcome = _probe(f"http://{target}/", mode="head")
+
+    assert outcome["uptime"] == 1
+    assert outcome["response_bytes"] == 0
+
+
+def test_head_mode_falls_back_to_get_when_rejected(target):
+    outcome = _probe(f"http://{target}/nohead", mode="head")
+
+    assert outcome["status_code"] == 200
+    assert outcome["uptime"] == 1
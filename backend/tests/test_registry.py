@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import User, Website
+from app.monitor import check_key, frequency_seconds
+from app.registry import SiteRegistry
+
+
+def _site(url, frequency=60):
+    user = User.query.first()
+    if user is None:
+        user = User(name="Owner", email="owner@example.com")
+        user.set_password("securepass")
+        db.session.add(user)
+        db.session.commit()
+    website = Website(user_id=user.id, url=url, name=url, frequency=frequency)
+    db.session.add(website)
+    db.session.commit()
+    return website
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_refresh_only_reads_changed_rows(app):
+    first = _site("http://a.example.com")
+    registry = SiteRegistry(frequency_seconds, check_key)
+    assert registry.refresh() is True
+    assert registry.targets[first.id].url == "http://a.example.com"
+
+    # Nothing changed since the watermark
+    assert registry.refresh() is False
+
+    second = _site("http://b.example.com", frequency=120)
+    first.frequency = 30
+    db.session.commit()
+    assert registry.refresh() is True
+    assert registry.targets[first.id].interval == 30
+    assert registry.intervals()[registry.targets[second.id].key] == 120
+
+
+def test_rows_outside_the_overlap_window_are_not_reread(app):
+    site = _site("http://a.example.com")
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+
+    # Simulate a row last touched long ago: its update must not be re-read
+    db.session.execute(db.update(Website).where(Website.id == site.id)
+                       .values(frequency=600, updated_at=datetime.utcnow() - timedelta(days=1)))
+    db.session.commit()
+    registry.refresh()
+    assert registry.targets[site.id].interval == 60
+
+
+def test_deleted_websites_are_reconciled(app):
+    clock = FakeClock()
+    site = _site("http://a.example.com")
+    registry = SiteRegistry(frequency_seconds, check_key, clock=clock)
+    registry.refresh()
+
+    db.session.delete(site)
+    db.session.commit()
+    clock.now = 10_000
+    assert registry.refresh() is True
+    assert registry.targets == {}
+    assert registry.groups == {}
+
+
+def test_owner_filter_applies_without_reloading(app):
+    a = _site("http://a.example.com")
+    b = _site("http://b.example.com")
+    registry = SiteRegistry(frequency_seconds, check_key)
+    registry.refresh()
+
+    owned_key = registry.targets[a.id].key
+    registry.set_owner(lambda key: key == owned_key)
+    assert list(registry.groups) == [owned_key]
+
+    registry.set_owner(None)
+    assert set(registry.groups) == {owned_key, registry.targets[b.id].key}
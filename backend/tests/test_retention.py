@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import jwt
+
+from app import db, retention, rollups
+from app.metric_buffer import write_metrics
+from app.models import Alert, DeletedWebsite, Metric, MetricRollup, UptimeInterval, User, Website, WebsiteStatus
+from app.routes.auth import SECRET_KEY
+from app.sharding import WorkerMembership
+
+
+def _websites(count=1):
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    websites = [Website(user_id=user.id, url=f"http://example{i}.com", name=f"Example {i}") for i in range(count)]
+    db.session.add_all(websites)
+    db.session.commit()
+    return [website.id for website in websites]
+
+
+def _metrics(website_id, start, count, step=timedelta(hours=1)):
+    write_metrics([{"website_id": website_id, "response_time": 10.0, "uptime": 1, "timestamp": start + i * step}
+                   for i in range(count)])
+
+
+def test_expired_rows_are_deleted_in_primary_key_windows(app):
+    [website_id] = _websites()
+    now = datetime(2026, 3, 31, 12)
+    _metrics(website_id, now - timedelta(days=40), 24 * 40)
+
+    deleted = retention.delete_expired_rows(now - timedelta(days=30), batch_rows=100)
+
+    assert deleted == 24 * 10
+    assert db.session.execute(db.select(db.func.min(Metric.timestamp))).scalar() >= now - timedelta(days=30)
+    assert Metric.query.count() == 24 * 30
+
+
+def test_metrics_of_deleted_websites_are_purged(app):
+    kept, deleted = _websites(2)
+    now = datetime.utcnow()
+    _metrics(kept, now, 3)
+    _metrics(deleted, now, 7)
+    retention.forget_websites([deleted])
+    db.session.delete(db.session.get(Website, deleted))
+    db.session.commit()
+    assert Metric.query.count() == 10  # deleting the website leaves its metrics behind
+
+    assert retention.purge_orphans(batch_rows=2) == 7
+    assert {metric.website_id for metric in Metric.query.all()} == {kept}
+    assert DeletedWebsite.query.count() == 0
+    assert retention.purge_orphans() == 0
+
+
+def test_deleting_a_user_leaves_only_raw_metrics_for_retention(app):
+    website_ids = _websites(2)
+    user_id = db.session.get(Website, website_ids[0]).user_id
+    for website_id in website_ids:
+        _metrics(website_id, datetime.utcnow() - timedelta(hours=2), 2)
+        db.session.add(Alert(website_id=website_id, alert_type="downtime"))
+    db.session.commit()
+
+    headers = {"Authorization": f"Bearer {jwt.encode({'user_id': user_id}, SECRET_KEY, algorithm='HS256')}"}
+    assert app.test_client().delete("/auth/delete", headers=headers).status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(User, user_id) is None
+    for model in (Website, Alert, MetricRollup, WebsiteStatus, UptimeInterval):
+        assert model.query.count() == 0, model.__tablename__
+    assert Metric.query.count() == 4
+    assert retention.purge_orphans() == 4
+
+
+def test_raw_metrics_are_kept_unless_retention_is_configured(app):
+    kept, deleted = _websites(2)
+    now = datetime(2026, 3, 31, 12)
+    _metrics(kept, now - timedelta(days=400), 3, step=timedelta(days=100))
+    _metrics(deleted, now, 2)
+    retention.forget_websites([deleted])
+    db.session.delete(db.session.get(Website, deleted))
+    db.session.commit()
+
+    summary = retention.run_retention(now=now)
+
+    assert retention.RETENTION_DAYS == 0
+    assert summary["rows_deleted"] == 0 and summary["orphans_deleted"] == 2
+    assert Metric.query.count() == 3
+
+
+def test_run_retention_downsamples_rollups(app, monkeypatch):
+    monkeypatch.setitem(rollups.RETENTION_DAYS, rollups.MINUTE, 2)
+    monkeypatch.setitem(rollups.RETENTION_DAYS, rollups.HOUR, 5)
+    [website_id] = _websites()
+    now = datetime(2026, 3, 31, 12)
+    _metrics(website_id, now - timedelta(days=10), 24 * 10)
+
+    summary = retention.run_retention(now=now, retention_days=3)
+
+    assert summary["rows_deleted"] == 24 * 7
+    assert summary["partitions_created"] == summary["partitions_dropped"] == 0
+    oldest = dict(db.session.execute(
+        db.select(MetricRollup.resolution, db.func.min(MetricRollup.bucket_start)).group_by(MetricRollup.resolution)
+    ).all())
+    assert oldest[rollups.MINUTE] >= now - timedelta(days=2)
+    assert oldest[rollups.HOUR] >= now - timedelta(days=5)
+    assert oldest[rollups.DAY] == datetime(2026, 3, 21)  # day rollups keep the full history
+    assert rollups.totals(MetricRollup.query.filter_by(resolution=rollups.DAY).all())["count"] == 24 * 10
+
+
+def test_covering_starts_on_the_hour_once_minutes_are_downsampled(app, monkeypatch):
+    monkeypatch.setitem(rollups.RETENTION_DAYS, rollups.MINUTE, 1)
+    [website_id] = _websites()
+    since = datetime.utcnow() - timedelta(days=2)
+    _metrics(website_id, since, 3, step=timedelta(minutes=1))
+
+    rows = rollups.covering([website_id], since, rollups.DAY)
+    assert rollups.MINUTE not in {row.resolution for row in rows}
+    assert rollups.totals(rows)["count"] == 3
+
+
+def test_partition_bounds_are_parsed():
+    assert retention._parse_bound("'2026-03-01 00:00:00'") == datetime(2026, 3, 1)
+    assert retention._parse_bound("MINVALUE") is None
+
+
+def test_only_the_ring_owner_runs_the_job(app):
+    membership = WorkerMembership("worker-a")
+    assert retention.RetentionJob(app, membership).leads()
+    membership.owns = lambda key: False
+    assert not retention.RetentionJob(app, membership).leads()
+    assert retention.RetentionJob(app).leads()
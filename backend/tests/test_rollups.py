@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from app import db, rollups
+from app.metric_buffer import write_metrics
+from app.models import Metric, MetricRollup, User, Website
+
+
+def _website():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    return website.id
+
+
+def _rollup(website_id, resolution, bucket_start):
+    return db.session.get(MetricRollup, (website_id, resolution, bucket_start))
+
+
+def test_aggregate_fills_every_resolution_and_the_histogram():
+    at = datetime(2026, 3, 1, 10, 15, 30)
+    rows = rollups.aggregate([
+        {"website_id": 1, "response_time": 20.0, "uptime": 1, "timestamp": at},
+        {"website_id": 1, "response_time": 700.0, "uptime": 1, "timestamp": at + timedelta(seconds=10)},
+        {"website_id": 1, "response_time": 0.0, "uptime": 0, "timestamp": at + timedelta(minutes=5)},
+    ])
+
+    minute = rows[(1, rollups.MINUTE, datetime(2026, 3, 1, 10, 15))]
+    assert minute["count"] == 2
+    assert (minute["latency_min"], minute["latency_max"]) == (20.0, 700.0)
+    assert (minute["bucket_50"], minute["bucket_1000"]) == (1, 1)
+
+    day = rows[(1, rollups.DAY, datetime(2026, 3, 1))]
+    assert (day["count"], day["up_count"], day["latency_count"], day["latency_sum"]) == (3, 2, 2, 720.0)
+    assert len(rows) == 2 + 1 + 1  # two minutes, one hour, one day
+
+
+def test_write_metrics_upserts_rollups_incrementally(app):
+    website_id = _website()
+    at = datetime(2026, 3, 1, 10, 15)
+    write_metrics([{"website_id": website_id, "response_time": 100.0, "uptime": 1, "timestamp": at}])
+    write_metrics([{"website_id": website_id, "response_time": 1500.0, "uptime": 0, "timestamp": at},
+                   {"website_id": website_id, "response_time": 0.0, "uptime": 0, "timestamp": at}])
+
+    rollup = _rollup(website_id, rollups.HOUR, datetime(2026, 3, 1, 10))
+    assert (rollup.count, rollup.up_count, rollup.latency_count) == (3, 1, 2)
+    assert (rollup.latency_min, rollup.latency_max, rollup.latency_sum) == (100.0, 1500.0, 1600.0)
+    assert (rollup.bucket_200, rollup.bucket_inf) == (1, 1)
+
+
+def test_covering_uses_fine_buckets_only_at_the_ragged_start(app):
+    website_id = _website()
+    yesterday = rollups.floor_time(datetime.utcnow(), rollups.DAY) - timedelta(days=1)
+    since = yesterday + timedelta(hours=22, minutes=30, seconds=20)
+    write_metrics([
+        {"website_id": website_id, "response_time": 1.0, "uptime": 1, "timestamp": since - timedelta(minutes=1)},
+        {"website_id": website_id, "response_time": 2.0, "uptime": 1, "timestamp": since + timedelta(seconds=30)},
+        {"website_id": website_id, "response_time": 3.0, "uptime": 1, "timestamp": since + timedelta(minutes=35)},
+        {"website_id": website_id, "response_time": 4.0, "uptime": 1, "timestamp": yesterday + timedelta(days=1)},
+    ])
+
+    rows = rollups.covering([website_id], since, rollups.DAY)
+    assert sorted((r.resolution, r.bucket_start) for r in rows) == [
+        (rollups.MINUTE, yesterday + timedelta(hours=22, minutes=30)),
+        (rollups.HOUR, yesterday + timedelta(hours=23)),
+        (rollups.DAY, yesterday + timedelta(days=1)),
+    ]
+    assert rollups.totals(rows)["latency_sum"] == 9.0
+
+    hourly = rollups.covering([website_id], since, rollups.HOUR)
+    assert {r.resolution for r in hourly} == {rollups.MINUTE, rollups.HOUR}
+    assert rollups.totals(hourly)["count"] == 3
+
+    # The same window summed in SQL, per website and per calendar day
+    (site,) = rollups.grouped_totals([website_id], since, rollups.DAY, MetricRollup.website_id)
+    assert (site["website_id"], site["count"], site["latency_sum"]) == (website_id, 3, 9.0)
+    day = db.func.date(MetricRollup.bucket_start, type_=db.Date).label("day")
+    by_day = {row["day"]: row["latency_sum"] for row in rollups.grouped_totals([website_id], since, rollups.DAY, day)}
+    assert by_day == {yesterday.date(): 5.0, (yesterday + timedelta(days=1)).date(): 4.0}
+
+
+def test_backfill_matches_incremental_rollups(app):
+    website_id = _website()
+    start = datetime(2026, 3, 1, 23, 50)
+    rows = [{"website_id": website_id, "response_time": float(i * 37 % 1200), "uptime": i % 5 != 0,
+             "timestamp": start + timedelta(minutes=i)} for i in range(30)]
+    write_metrics(rows)
+    incremental = {(r.resolution, r.bucket_start): (r.count, r.up_count, r.latency_sum, r.bucket_500)
+                   for r in MetricRollup.query.all()}
+
+    assert rollups.backfill(batch_rows=7) == 30
+    db.session.expire_all()
+    rebuilt = {(r.resolution, r.bucket_start): (r.count, r.up_count, r.latency_sum, r.bucket_500)
+               for r in MetricRollup.query.all()}
+    assert rebuilt == incremental
+
+    # A day range only replaces that day
+    assert rollups.backfill(since=datetime(2026, 3, 2), website_ids=[website_id]) == 20
+    assert Metric.query.count() == 30
+    assert _rollup(website_id, rollups.DAY, datetime(2026, 3, 1)).count == 10
+
+
+def test_estimate_percentile_interpolates_inside_the_bucket():
+    metrics = [{"website_id": 1, "response_time": float(v), "uptime": 1} for v in (10, 20, 30, 60, 120, 180, 240, 900)]
+    row = next(row for key, row in rollups.aggregate(metrics).items() if key[1] == rollups.DAY)
+
+    assert rollups.estimate_percentile(row, 0) < 50
+    assert 50 <= rollups.estimate_percentile(row, 50) < 200
+    assert 500 <= rollups.estimate_percentile(row, 99) <= 900
+    assert rollups.estimate_percentile(rollups.totals([]), 50) == 0.0
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import MonitorWorker
+from app.sharding import HashRing, WorkerMembership
+
+
+def test_ring_spreads_keys_and_only_moves_a_dead_nodes_share():
+    ring = HashRing(["a", "b", "c", "d"])
+    before = {key: ring.owner(key) for key in range(10000)}
+
+    counts = {node: list(before.values()).count(node) for node in ring.nodes}
+    assert min(counts.values()) > 1500
+
+    smaller = HashRing(["a", "b", "c"])
+    moved = [key for key, owner in before.items() if smaller.owner(key) != owner]
+    assert all(before[key] == "d" for key in moved)
+
+
+def test_expired_lease_hands_shard_to_live_workers(app):
+    first = WorkerMembership("worker-1")
+    second = WorkerMembership("worker-2")
+    first.heartbeat()
+    assert second.heartbeat() is True
+    assert first.heartbeat() is True
+    assert not all(first.owns(key) for key in range(100))
+
+    # worker-2 stops heartbeating; once its lease lapses worker-1 owns everything
+    stale = db.session.get(MonitorWorker, "worker-2")
+    stale.heartbeat_at = datetime.utcnow() - timedelta(minutes=5)
+    db.session.commit()
+
+    assert first.heartbeat() is True
+    assert all(first.owns(key) for key in range(100))
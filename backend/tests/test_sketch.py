@@ -0,0 +1,92 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app import db, rollups, sketch
+from app.metric_buffer import write_metrics
+from app.models import MetricRollup, RouteLatency, User, Website
+from app.routes.telemetry import RouteStats
+from app.sketch import LatencySketch
+from app.telemetry import record_route_latency
+
+
+def _exact(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def test_percentiles_stay_within_the_relative_accuracy():
+    generator = random.Random(7)
+    values = [generator.lognormvariate(5, 1) for _ in range(20000)]
+    latencies = LatencySketch()
+    for value in values:
+        latencies.add(value)
+
+    for p in (50, 95, 99):
+        exact = _exact(values, p)
+        assert abs(latencies.percentile(p) - exact) <= exact * sketch.RELATIVE_ACCURACY
+
+
+def test_merge_matches_a_single_sketch_and_survives_bytes():
+    values = [float(v) for v in range(1, 1001)] + [0.0] * 10
+    whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+    for index, value in enumerate(values):
+        whole.add(value)
+        (first if index % 2 else second).add(value)
+
+    merged = LatencySketch.from_bytes(first.to_bytes()).merge(LatencySketch.from_bytes(second.to_bytes()))
+    assert merged.count == whole.count == 1010
+    assert [merged.percentile(p) for p in (0, 50, 95, 99)] == [whole.percentile(p) for p in (0, 50, 95, 99)]
+    assert LatencySketch.from_bytes(None).count == 0
+
+
+def _website():
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    website = Website(user_id=user.id, url="http://example.com", name="Example")
+    db.session.add(website)
+    db.session.commit()
+    return website.id
+
+
+def test_rollup_sketches_merge_across_flushes(app):
+    with app.app_context():
+        website_id = _website()
+        at = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=1)
+        values = [float(v) for v in range(10, 1010, 10)]
+        for half in (values[:50], values[50:]):
+            write_metrics([{"website_id": website_id, "response_time": value, "uptime": 1, "timestamp": at}
+                           for value in half])
+
+        day = db.session.get(MetricRollup, (website_id, rollups.DAY, rollups.floor_time(at, rollups.DAY)))
+        combined = rollups.totals([day])
+        assert combined["latency_sketch"].count == combined["latency_count"] == 100
+        exact = _exact(values, 95)
+        assert abs(rollups.percentile(combined, 95) - exact) <= exact * sketch.RELATIVE_ACCURACY
+
+        # Rows written before sketches existed fall back to the histogram estimate
+        day.latency_sketch = None
+        combined = rollups.totals([day])
+        assert rollups.percentile(combined, 95) == rollups.estimate_percentile(combined, 95)
+
+
+def test_route_stats_merge_hourly_sketches(app):
+    now = datetime.utcnow()
+    spans = [SimpleNamespace(http_method="GET", http_route="/api/websites", start_time=now - timedelta(hours=hours),
+                             duration_ms=float(duration), status_code="ERROR" if duration == 100 else "OK")
+             for hours in (0, 2, 30) for duration in range(1, 101)]
+    with app.app_context():
+        record_route_latency(spans[:150])
+        record_route_latency(spans[150:])
+        db.session.commit()
+        assert RouteLatency.query.count() == 3
+
+        body, status = RouteStats.get.__wrapped__(RouteStats(), None)
+
+    assert status == 200
+    (route,) = body
+    assert (route["method"], route["route"], route["count"]) == ("GET", "/api/websites", 200)
+    assert (route["error_count"], route["error_rate"], route["avg"]) == (2, 1.0, 50.5)
+    assert abs(route["p95"] - 96) <= 96 * sketch.RELATIVE_ACCURACY
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from app import db, sla
+from app.metric_buffer import write_metrics
+from app.models import UptimeInterval, User, Website
+from app.routes.sla import SlaIntervals, SlaSummary
+
+T0 = datetime(2026, 3, 1, 12)
+
+
+def _websites(count=1):
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    websites = [Website(user_id=user.id, url=f"http://example{i}.com", name=f"Example {i}") for i in range(count)]
+    db.session.add_all(websites)
+    db.session.commit()
+    return user, [website.id for website in websites]
+
+
+def _checks(website_id, states, start=T0, step=timedelta(minutes=1)):
+    return [{"website_id": website_id, "response_time": 40.0 if up else 0.0, "uptime": 1 if up else 0,
+             "failure_class": None if up else "timeout", "timestamp": start + index * step}
+            for index, up in enumerate(states)]
+
+
+def _intervals(website_id):
+    return [(i.state, i.started_at, i.ended_at, i.cause) for i in
+            UptimeInterval.query.filter_by(website_id=website_id).order_by(UptimeInterval.started_at)]
+
+
+def test_intervals_change_only_on_state_transitions_across_flushes(app):
+    _, [website_id] = _websites()
+    checks = _checks(website_id, [True, True, False, False, False, True, True])
+    write_metrics(checks[:3])
+    write_metrics(checks[3:] + _checks(website_id, [False], start=T0 - timedelta(hours=1)))  # one late check
+
+    minute = timedelta(minutes=1)
+    assert _intervals(website_id) == [
+        ("up", T0, T0 + 2 * minute, None),
+        ("down", T0 + 2 * minute, T0 + 5 * minute, "timeout"),
+        ("up", T0 + 5 * minute, None, None),
+    ]
+
+
+def test_summary_is_exact_over_any_window(app):
+    _, [website_id, unmonitored] = _websites(2)
+    # Up for an hour, down for 15 minutes, then up until the window closes
+    write_metrics(_checks(website_id, [True]) + _checks(website_id, [False], start=T0 + timedelta(minutes=60)) +
+                  _checks(website_id, [True], start=T0 + timedelta(minutes=75)))
+
+    summary = sla.summarize([website_id, unmonitored], T0 - timedelta(hours=1), T0 + timedelta(hours=3))
+    site = summary[website_id]
+    assert site["downtime_minutes"] == 15
+    assert site["monitored_minutes"] == 180
+    assert site["uptime_percentage"] == 165 / 180 * 100
+    assert site["coverage_percentage"] == 75
+    assert site["incidents"] == 1
+    assert summary[unmonitored]["uptime_percentage"] is None
+
+    # A window cutting through the outage only counts the overlap
+    inside = sla.summarize([website_id], T0 + timedelta(minutes=70), T0 + timedelta(minutes=80))[website_id]
+    assert (inside["downtime_minutes"], inside["uptime_percentage"]) == (5, 50)
+
+
+def test_sla_endpoints(app):
+    user, [website_id] = _websites()
+    write_metrics(_checks(website_id, [True, False, True], step=timedelta(minutes=30)))
+
+    with app.test_request_context(f"/sla?from=2026-03-01T12:00:00Z&to=2026-03-01T13:30:00Z"):
+        body, status = SlaSummary.get.__wrapped__(SlaSummary(), user)
+    assert status == 200
+    (site,) = body["websites"]
+    assert (site["uptime_percentage"], site["downtime_minutes"], site["incidents"]) == (66.6667, 30, 1)
+
+    with app.test_request_context("/sla/1/intervals?from=2026-03-01T12:40:00&to=2026-03-01T13:30:00"):
+        body, status = SlaIntervals.get.__wrapped__(SlaIntervals(), user, website_id)
+        assert [interval["state"] for interval in body] == ["down", "up"]
+        assert SlaIntervals.get.__wrapped__(SlaIntervals(), user, website_id + 1)[1] == 404
+    with app.test_request_context("/sla?from=2026-03-02&to=2026-03-01"):
+        assert SlaSummary.get.__wrapped__(SlaSummary(), user)[1] == 400
+
+
+def test_backfill_rebuilds_intervals_from_metrics(app):
+    _, [website_id] = _websites()
+    write_metrics(_checks(website_id, [True, False, False, True]))
+    expected = _intervals(website_id)
+    UptimeInterval.query.delete()
+    db.session.commit()
+
+    assert sla.backfill(batch_rows=3) == 4
+    assert _intervals(website_id) == expected
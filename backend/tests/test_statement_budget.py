@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from app import db
+from app.db_stats import count_statements
+from app.metric_buffer import write_metrics
+from app.models import Alert, User, Website
+from app.routes.auth import SECRET_KEY
+
+SITE_COUNTS = (1, 10, 100)
+# Read endpoints whose statement count must not grow with the number of websites
+ENDPOINTS = (
+    "/websites",
+    "/dashboard/summary",
+    "/analytics/summary",
+    "/api-monitoring/summary",
+    "/alerts",
+    "/alerts/history",
+    "/sla",
+)
+
+
+def _seed_user(index, sites):
+    user = User(name=f"Owner {index}", email=f"owner{index}@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    websites = [Website(user_id=user.id, url=f"http://site{index}-{n}.example.com", name=f"Site {n}")
+                for n in range(sites)]
+    db.session.add_all(websites)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    write_metrics([{"website_id": website.id, "response_time": 100.0 + minutes, "uptime": int(minutes != 20),
+                    "status_code": 200 if minutes != 20 else 503, "timestamp": now - timedelta(minutes=minutes)}
+                   for website in websites for minutes in (40, 20, 5)])
+    db.session.add_all(Alert(website_id=website.id, alert_type="downtime", timestamp=now - timedelta(minutes=20))
+                       for website in websites)
+    db.session.commit()
+    return {"Authorization": f"Bearer {jwt.encode({'user_id': user.id}, SECRET_KEY, algorithm='HS256')}"}
+
+
+@pytest.fixture
+def owners(app):
+    return [_seed_user(index, sites) for index, sites in enumerate(SITE_COUNTS)]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_statement_count_does_not_grow_with_websites(app, owners, path):
+    client = app.test_client()
+    counts = []
+    for headers in owners:
+        db.session.expire_all()
+        with count_statements() as stats:
+            response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        counts.append(stats.statements)
+    assert len(set(counts)) == 1, f"{path} issued {dict(zip(SITE_COUNTS, counts))} statements per website count"
+
+
+def test_debug_mode_reports_statements_in_headers(app, owners):
+    client = app.test_client()
+    assert "X-DB-Statements" not in client.get("/websites", headers=owners[0]).headers
+
+    app.debug = True
+    with count_statements() as stats:
+        response = client.get("/websites", headers=owners[0])
+    assert int(response.headers["X-DB-Statements"]) == stats.statements > 0
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.metric_buffer import write_metrics
+from app.models import Metric, User, Website, WebsiteStatus
+from app.website_status import snapshots, with_status
+
+T0 = datetime(2026, 3, 1, 12)
+
+
+def _websites(count=1):
+    user = User(name="Owner", email="owner@example.com")
+    user.set_password("securepass")
+    db.session.add(user)
+    db.session.commit()
+    websites = [Website(user_id=user.id, url=f"http://example{i}.com", name=f"Example {i}") for i in range(count)]
+    db.session.add_all(websites)
+    db.session.commit()
+    return [website.id for website in websites]
+
+
+def _check(website_id, minute, up=True):
+    return {"website_id": website_id, "response_time": 40.0 if up else 0.0, "uptime": 1 if up else 0,
+            "status_code": 200 if up else None, "failure_class": None if up else "timeout",
+            "timestamp": T0 + timedelta(minutes=minute)}
+
+
+def test_snapshot_keeps_the_latest_check_and_its_streak():
+    [(snapshot, continues)] = snapshots([_check(1, 2, up=False), _check(1, 0), _check(1, 1, up=False)])
+    assert continues is False
+    assert snapshot["status"] == "down"
+    assert snapshot["consecutive_failures"] == 2
+    assert snapshot["last_change_at"] == T0 + timedelta(minutes=1)
+    assert snapshot["failure_class"] == "timeout"
+
+
+def test_failure_streak_and_change_time_carry_across_flushes(app):
+    [website_id] = _websites()
+    write_metrics([_check(website_id, 0), _check(website_id, 1, up=False)])
+    write_metrics([_check(website_id, 2, up=False)])
+    write_metrics([_check(website_id, 3, up=False), _check(website_id, 4, up=False)])
+
+    status = db.session.get(WebsiteStatus, website_id)
+    assert (status.status, status.consecutive_failures) == ("down", 4)
+    assert status.last_change_at == T0 + timedelta(minutes=1)
+    assert status.last_checked_at == T0 + timedelta(minutes=4)
+
+    write_metrics([_check(website_id, 5)])
+    db.session.expire_all()
+    status = db.session.get(WebsiteStatus, website_id)
+    assert (status.status, status.consecutive_failures, status.response_time) == ("up", 0, 40.0)
+    assert status.last_change_at == T0 + timedelta(minutes=5)
+
+
+def test_a_late_flush_does_not_overwrite_a_newer_check(app):
+    [website_id] = _websites()
+    write_metrics([_check(website_id, 5)])
+    write_metrics([_check(website_id, 1, up=False)])
+
+    status = db.session.get(WebsiteStatus, website_id)
+    assert (status.status, status.last_checked_at) == ("up", T0 + timedelta(minutes=5))
+    assert Metric.query.count() == 2  # the late row is still stored
+
+
+def test_rows_for_deleted_websites_are_dropped(app):
+    kept, deleted = _websites(2)
+    db.session.delete(db.session.get(Website, deleted))
+    db.session.commit()
+
+    write_metrics([_check(kept, 0), _check(deleted, 0)])
+    assert [metric.website_id for metric in Metric.query.all()] == [kept]
+    assert db.session.get(WebsiteStatus, deleted) is None
+
+
+def test_with_status_outer_joins_unchecked_websites(app):
+    checked, unchecked = _websites(2)
+    write_metrics([_check(checked, 0)])
+
+    rows = dict((website.id, status) for website, status in with_status(Website.query).all())
+    assert rows[checked].status == "up"
+    assert rows[unchecked] is None